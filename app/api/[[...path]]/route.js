@@ -5,6 +5,15 @@ import bcrypt from 'bcryptjs'
 import jwt from 'jsonwebtoken'
 import { v2 as cloudinary } from 'cloudinary'
 import sgMail from '@sendgrid/mail'
+import { createHash, createHmac } from 'crypto'
+import zlib from 'zlib'
+import { promisify } from 'util'
+import { AsyncLocalStorage } from 'async_hooks'
+import { performance } from 'perf_hooks'
+import { Worker } from 'worker_threads'
+import os from 'os'
+import fs from 'fs'
+import gazetteer from '@/lib/gazetteer.json'
 
 // MongoDB connection
 let client
@@ -56,13 +65,1410 @@ const CATEGORIES = [
 
 async function connectToMongo() {
   if (!client) {
-    client = new MongoClient(process.env.MONGO_URL)
+    client = new MongoClient(process.env.MONGO_URL, { monitorCommands: true })
+    instrumentMongo(client)
     await client.connect()
     db = client.db(process.env.DB_NAME || 'expertbridge')
+    await ensureIndexes(db)
+    startBackgroundJobs(db)
   }
   return db
 }
 
+// Periodic maintenance jobs; each interval is configurable through env (0 disables it)
+function startBackgroundJobs(db) {
+  const ratingsInterval = parseInt(process.env.RATINGS_RECONCILE_INTERVAL_MS)
+  if (ratingsInterval > 0) {
+    setInterval(() => {
+      reconcileRatings(db).catch(error => console.error('Ratings reconciliation error:', error))
+    }, ratingsInterval).unref()
+  }
+
+  const statsInterval = parseInt(process.env.STATS_RECOUNT_INTERVAL_MS)
+  if (statsInterval > 0) {
+    setInterval(() => {
+      recountStats(db).catch(error => console.error('Stats recount error:', error))
+    }, statsInterval).unref()
+  }
+
+  // Picks up retries that came due and jobs queued by other instances
+  const jobsInterval = parseInt(process.env.JOB_POLL_INTERVAL_MS || 5000)
+  if (jobsInterval > 0) {
+    setInterval(() => runJobs(db), jobsInterval).unref()
+  }
+  runJobs(db)
+}
+
+// Indexes backing search and listing queries, by collection. Each is created on its own so one that
+// conflicts with an existing definition is logged without blocking the rest (createIndex is a
+// no-op when an identical index exists).
+async function ensureIndexes(db) {
+  const indexes = {
+    professionals: [
+      { key: { id: 1 }, name: 'id_unique', unique: true },
+      { key: { email: 1 }, name: 'email' },
+      { key: { 'search.tokens': 1 }, name: 'search_tokens' },
+      { key: { 'search.country': 1, 'search.city': 1 }, name: 'search_location' },
+      { key: { 'search.geo': '2dsphere' }, name: 'search_geo' },
+      {
+        key: { 'verification.status': 1, isActive: 1, 'featured.isFeatured': -1, 'ratings.average': -1, createdAt: -1, id: -1 },
+        name: 'listing'
+      },
+      {
+        key: { 'verification.status': 1, isActive: 1, category: 1, 'featured.isFeatured': -1, 'ratings.average': -1, createdAt: -1, id: -1 },
+        name: 'listing_category'
+      },
+      { key: { createdAt: -1, id: -1 }, name: 'admin_listing' },
+      { key: { 'verification.status': 1, createdAt: -1, id: -1 }, name: 'admin_listing_status' },
+      { key: { 'featured.isFeatured': 1, 'featured.featuredUntil': 1 }, name: 'featured_active' }
+    ],
+    reviews: [
+      { key: { professionalId: 1, status: 1, createdAt: -1 }, name: 'professional_reviews' }
+    ],
+    jobs: [
+      { key: { id: 1 }, name: 'id_unique', unique: true },
+      { key: { status: 1, priority: -1, runAt: 1 }, name: 'status_priority_run_at' },
+      { key: { status: 1, lockedUntil: 1 }, name: 'status_locked_until' },
+      { key: { updatedAt: -1 }, name: 'updated_at' },
+      { key: { finishedAt: 1 }, name: 'finished_ttl', expireAfterSeconds: JOB_RETENTION_DAYS * 24 * 60 * 60 }
+    ],
+    analytics_daily: [
+      { key: { professionalId: 1, day: -1 }, name: 'professional_day', unique: true }
+    ]
+  }
+  await Promise.all(Object.entries(indexes).flatMap(([collection, specs]) =>
+    specs.map(({ key, ...options }) =>
+      db.collection(collection).createIndex(key, options).catch(error => {
+        console.error(`Index creation error (${collection}.${options.name}):`, error.message)
+      })
+    )
+  ))
+}
+
+// ==================== SEARCH INDEX ====================
+
+const SEARCH_MIN_PREFIX = 2
+const SEARCH_MAX_PREFIX = 15
+const SEARCH_MAX_BIO_WORDS = 60
+const SEARCH_STOPWORDS = new Set([
+  'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'i', 'in', 'is', 'it',
+  'my', 'of', 'on', 'or', 'our', 'the', 'to', 'with', 'we', 'you', 'your', 'over', 'years'
+])
+
+// Lowercase, strip accents and punctuation so "São Paulo" and "sao paulo" match
+function normalizeText(value) {
+  return String(value || '')
+    .normalize('NFD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim()
+}
+
+function tokenize(value) {
+  return normalizeText(value).split(' ').filter(word => word && !SEARCH_STOPWORDS.has(word))
+}
+
+// Every prefix of each word, so a multikey index can answer prefix queries
+function prefixes(words) {
+  const out = new Set()
+  for (const word of words) {
+    if (word.length < SEARCH_MIN_PREFIX) {
+      out.add(word)
+      continue
+    }
+    const max = Math.min(word.length, SEARCH_MAX_PREFIX)
+    for (let i = SEARCH_MIN_PREFIX; i <= max; i++) out.add(word.slice(0, i))
+  }
+  return out
+}
+
+// Searchable fields stored on each professional; kept in sync on register/update
+function buildSearchFields(professional) {
+  const nameWords = [...tokenize(professional.fullName), ...tokenize(professional.subcategory), ...tokenize(professional.category)]
+  const bioWords = [...new Set(tokenize(professional.bio))].slice(0, SEARCH_MAX_BIO_WORDS)
+  return {
+    tokens: [...prefixes([...nameWords, ...bioWords])],
+    nameTokens: [...prefixes(nameWords)],
+    country: normalizeText(professional.location?.country),
+    city: normalizeText(professional.location?.city),
+    ...geoFields(professional)
+  }
+}
+
+// Query terms truncated to the longest indexed prefix
+function searchTerms(keyword) {
+  return [...new Set(tokenize(keyword).map(word => word.slice(0, SEARCH_MAX_PREFIX)))]
+}
+
+function escapeRegex(value) {
+  return value.replace(/[.*+?^${}()|[\]\\]/g, '\\$&')
+}
+
+// ==================== SEARCH FACETS ====================
+
+// Lower bounds of the rating and experience bands counted by ?facets=true
+const RATING_BUCKETS = [0, 1, 2, 3, 4]
+const EXPERIENCE_BANDS = [0, 3, 6, 11, 21]
+const FACET_LIMIT = 50
+
+function countBy(field) {
+  return [{ $group: { _id: field, count: { $sum: 1 } } }, { $sort: { count: -1, _id: 1 } }, { $limit: FACET_LIMIT }]
+}
+
+// $facet sub-pipelines that count the matched set, next to the page and total computed from the same match
+const SEARCH_FACETS = {
+  category: countBy('$category'),
+  country: countBy('$location.country'),
+  serviceType: [{
+    $group: {
+      _id: null,
+      virtual: { $sum: { $cond: [{ $eq: ['$serviceOptions.virtual', true] }, 1, 0] } },
+      inPerson: { $sum: { $cond: [{ $eq: ['$serviceOptions.inPerson', true] }, 1, 0] } }
+    }
+  }],
+  rating: [{ $bucket: { groupBy: { $ifNull: ['$ratings.average', 0] }, boundaries: [...RATING_BUCKETS, 6], default: 'other' } }],
+  experience: [{ $bucket: { groupBy: { $ifNull: ['$experience', 0] }, boundaries: [...EXPERIENCE_BANDS, Infinity], default: 'other' } }]
+}
+
+// Bucket ids are lower bounds; report each band as { min, max, count } with max null for the open top band.
+// Values outside every band (negative, missing a number) land in the 'other' default bucket and are
+// reported as a trailing { min: null, max: null } band, so band counts always add up to the total.
+function bands(bounds, buckets) {
+  const counts = new Map(buckets.map(bucket => [bucket._id, bucket.count]))
+  const result = bounds.map((min, i) => ({ min, max: i + 1 < bounds.length ? bounds[i + 1] : null, count: counts.get(min) || 0 }))
+  if (counts.get('other')) result.push({ min: null, max: null, count: counts.get('other') })
+  return result
+}
+
+function formatFacets(facets) {
+  const serviceType = facets.serviceType[0] || {}
+  return {
+    category: facets.category.map(row => ({ value: row._id, count: row.count })),
+    country: facets.country.map(row => ({ value: row._id, count: row.count })),
+    serviceType: { virtual: serviceType.virtual || 0, inPerson: serviceType.inPerson || 0 },
+    rating: bands(RATING_BUCKETS, facets.rating),
+    experience: bands(EXPERIENCE_BANDS, facets.experience)
+  }
+}
+
+// ==================== GEO SEARCH ====================
+
+// Kilometres covered by each serviceOptions.serviceRadius label, measured from the professional's city
+const SERVICE_RADIUS_KM = { city: 50, state: 250, country: 1500 }
+const GEO_DEFAULT_KM = 50
+const GEO_MAX_KM = 2000
+const GEO_SORT = [['distanceKm', 1], ['id', 1]]
+
+// Bundled offline gazetteer (lib/gazetteer.json) keyed by normalized "city|country", city alone and
+// "state|country"; the first city listed for a state stands in for the whole state
+const GAZETTEER = { byCity: new Map(), byCityName: new Map(), byState: new Map() }
+for (const place of gazetteer.places) {
+  const point = [place.lng, place.lat]
+  const city = normalizeText(place.city)
+  const country = normalizeText(place.country)
+  const state = normalizeText(place.state)
+  if (!GAZETTEER.byCity.has(`${city}|${country}`)) GAZETTEER.byCity.set(`${city}|${country}`, point)
+  if (!GAZETTEER.byCityName.has(city)) GAZETTEER.byCityName.set(city, point)
+  if (!GAZETTEER.byState.has(`${state}|${country}`)) GAZETTEER.byState.set(`${state}|${country}`, point)
+}
+
+// [lng, lat] for a { city, state, country } location, or null when the gazetteer does not know it
+function geocodeLocation(location) {
+  const city = normalizeText(location?.city)
+  const state = normalizeText(location?.state)
+  const country = normalizeText(location?.country)
+  if (city) {
+    const point = country ? GAZETTEER.byCity.get(`${city}|${country}`) : GAZETTEER.byCityName.get(city)
+    if (point) return point
+  }
+  return (state && country && GAZETTEER.byState.get(`${state}|${country}`)) || null
+}
+
+// GeoJSON point (behind the search_geo 2dsphere index) and service radius stored with the search fields
+function geoFields(professional) {
+  const point = geocodeLocation(professional.location)
+  if (!point) return {}
+  const radius = professional.serviceOptions?.serviceRadius
+  return {
+    geo: { type: 'Point', coordinates: point },
+    radiusKm: SERVICE_RADIUS_KM[radius] || SERVICE_RADIUS_KM.city
+  }
+}
+
+// Search origin from ?lat=&lng= or a gazetteer place in ?near= (qualified by ?country= when given),
+// with the ?withinKm= radius (GEO_DEFAULT_KM when absent, capped at GEO_MAX_KM)
+function geoOrigin(url) {
+  const lat = url.searchParams.get('lat')
+  const lng = url.searchParams.get('lng')
+  const near = url.searchParams.get('near')
+  if (lat === null && lng === null && !near) return null
+
+  const within = url.searchParams.get('withinKm')
+  const withinKm = within === null || within === '' ? GEO_DEFAULT_KM : Number(within)
+  if (!(Number.isFinite(withinKm) && withinKm > 0)) return { error: 'withinKm must be a positive number' }
+
+  if (lat !== null || lng !== null) {
+    const point = [parseFloat(lng), parseFloat(lat)]
+    if (!(Math.abs(point[0]) <= 180 && Math.abs(point[1]) <= 90)) return { error: 'Invalid coordinates' }
+    return { point, withinKm: Math.min(withinKm, GEO_MAX_KM) }
+  }
+  const point = geocodeLocation({ city: near, state: near, country: url.searchParams.get('country') })
+  return point ? { point, withinKm: Math.min(withinKm, GEO_MAX_KM) } : { error: `Unknown location: ${near}` }
+}
+
+// $geoNear has to open the pipeline: it applies the searcher's distance and the other filters, then
+// each professional's own service radius drops anyone who would not travel that far
+function geoStages(point, withinKm, query) {
+  return [
+    {
+      $geoNear: {
+        near: { type: 'Point', coordinates: point },
+        key: 'search.geo',
+        distanceField: 'distanceKm',
+        distanceMultiplier: 0.001,
+        maxDistance: withinKm * 1000,
+        spherical: true,
+        query
+      }
+    },
+    { $match: { $expr: { $lte: ['$distanceKm', '$search.radiusKm'] } } }
+  ]
+}
+
+// ==================== PAGINATION ====================
+
+// Keyset pagination: the cursor carries the sort values of the last item on the page,
+// so page N costs the same index seek as page 1 instead of skipping N * limit documents
+const LISTING_SORT = [['featured.isFeatured', -1], ['ratings.average', -1], ['createdAt', -1], ['id', -1]]
+const FEATURED_SORT = [['ratings.average', -1], ['createdAt', -1], ['id', -1]]
+const ADMIN_LISTING_SORT = [['createdAt', -1], ['id', -1]]
+const COUNT_CACHE_TTL = 60 * 1000
+const COUNT_CACHE_MAX = 500
+const countCache = new Map()
+
+function sortSpec(sortFields) {
+  return Object.fromEntries(sortFields)
+}
+
+function getPath(doc, path) {
+  return path.split('.').reduce((value, key) => (value == null ? undefined : value[key]), doc)
+}
+
+function encodeCursor(doc, sortFields) {
+  const values = sortFields.map(([field]) => {
+    const value = getPath(doc, field)
+    if (value instanceof Date) return { $date: value.toISOString() }
+    return Number.isNaN(value) ? { $nan: true } : value ?? null
+  })
+  return Buffer.from(JSON.stringify(values)).toString('base64url')
+}
+
+// Returns the decoded sort values, or null when the cursor is malformed
+function decodeCursor(cursor, sortFields) {
+  try {
+    const values = JSON.parse(Buffer.from(cursor, 'base64url').toString())
+    if (!Array.isArray(values) || values.length !== sortFields.length) return null
+    return values.map(value => {
+      if (value && typeof value === 'object' && value.$date) return new Date(value.$date)
+      return value && typeof value === 'object' && value.$nan ? NaN : value
+    })
+  } catch (error) {
+    return null
+  }
+}
+
+// Conditions on `field` for documents after `value`. Mongo sorts null/missing lowest, then NaN,
+// then numbers, but $lt/$gt never match null or NaN, so a descending sort names them explicitly;
+// otherwise legacy rows without the field (or with a NaN experience) vanish after the first page.
+function keysetAfter(field, direction, value) {
+  if (direction > 0) return [{ [field]: value === null ? { $ne: null } : { $gt: value } }]
+  if (value === null) return []
+  if (Number.isNaN(value)) return [{ [field]: null }]
+  return [
+    { [field]: { $lt: value } },
+    ...(typeof value === 'number' ? [{ [field]: NaN }] : []),
+    { [field]: null }
+  ]
+}
+
+// Documents strictly after `values` in `sortFields` order
+function keysetFilter(sortFields, values) {
+  const or = sortFields.flatMap(([field, direction], i) => {
+    const prefix = {}
+    for (let j = 0; j < i; j++) prefix[sortFields[j][0]] = values[j]
+    return keysetAfter(field, direction, values[i]).map(after => ({ ...prefix, ...after }))
+  })
+  return { $or: or }
+}
+
+// Reads ?cursor= (empty for the first page). Returns null when the request uses page numbers.
+function parseCursor(url, sortFields) {
+  if (!url.searchParams.has('cursor')) return null
+  const raw = url.searchParams.get('cursor')
+  if (!raw) return { values: null }
+  const values = decodeCursor(raw, sortFields)
+  return values ? { values } : { invalid: true }
+}
+
+function cursorPage(docs, limit, sortFields) {
+  const hasMore = docs.length > limit
+  const items = hasMore ? docs.slice(0, limit) : docs
+  return {
+    items,
+    pagination: {
+      limit,
+      hasMore,
+      nextCursor: hasMore ? encodeCursor(items[items.length - 1], sortFields) : null
+    }
+  }
+}
+
+// countDocuments memoized per normalized query for COUNT_CACHE_TTL; totals may lag by up to a minute
+async function cachedCount(collection, query, cacheKey) {
+  const cached = countCache.get(cacheKey)
+  if (cached && cached.expiresAt > Date.now()) return cached.total
+  const total = await collection.countDocuments(query)
+  if (countCache.size >= COUNT_CACHE_MAX) countCache.delete(countCache.keys().next().value)
+  countCache.set(cacheKey, { total, expiresAt: Date.now() + COUNT_CACHE_TTL })
+  return total
+}
+
+// ==================== LIST PROJECTIONS ====================
+
+// Listing endpoints return whole documents by default. ?view=card trims them to what a card in
+// app/page.js renders (bio cut to CARD_BIO_CHARS), and ?fields=a,b picks from LIST_FIELDS. Either
+// way `id` and the sort keys are always kept, since nextCursor is built from them.
+const LIST_FIELDS = [
+  'id', 'fullName', 'category', 'subcategory', 'bio', 'experience', 'languages', 'socialLinks',
+  'location', 'location.country', 'location.state', 'location.city', 'serviceOptions',
+  'profilePhoto', 'profilePhoto.url', 'ratings', 'ratings.average', 'ratings.count',
+  'featured', 'featured.isFeatured', 'featured.featuredUntil', 'verification.status',
+  'createdAt', 'updatedAt', 'distanceKm'
+]
+const CARD_FIELDS = [
+  'id', 'fullName', 'category', 'experience', 'location.country', 'location.city', 'serviceOptions',
+  'profilePhoto.url', 'ratings.average', 'ratings.count', 'featured.isFeatured', 'featured.featuredUntil',
+  'verification.status', 'distanceKm'
+]
+const CARD_BIO_CHARS = 160
+const FULL_PROJECTION = { password: 0, search: 0 }
+
+// Mongo rejects a projection holding both a path and its parent ("location" and "location.city")
+function includePaths(paths) {
+  const unique = [...new Set(paths)]
+  return unique.filter(path => !unique.some(other => path.startsWith(`${other}.`)))
+}
+
+// Projection for ?view= / ?fields=, or { error } for a 400
+function listProjection(url, sortFields) {
+  const view = url.searchParams.get('view')
+  const requested = url.searchParams.get('fields') || null
+  if (view && view !== 'card' && view !== 'full') return { error: `Unknown view: ${view}` }
+  if (requested == null && view !== 'card') return { projection: FULL_PROJECTION }
+
+  const fields = requested ? requested.split(',').map(field => field.trim()).filter(Boolean) : CARD_FIELDS
+  const unknown = fields.filter(field => !LIST_FIELDS.includes(field))
+  if (unknown.length) return { error: `Unknown fields: ${unknown.join(', ')}` }
+
+  const projection = Object.fromEntries(includePaths(['id', ...fields, ...sortFields.map(([field]) => field)])
+    .map(path => [path, 1]))
+  projection._id = 0
+  if (view === 'card' && !requested) {
+    projection.bio = { $substrCP: [{ $ifNull: ['$bio', ''] }, 0, CARD_BIO_CHARS] }
+  }
+  return { projection }
+}
+
+// ==================== RATINGS ====================
+
+const EMPTY_RATINGS = { average: 0, count: 0, sum: 0, histogram: { 1: 0, 2: 0, 3: 0, 4: 0, 5: 0 } }
+
+// Atomically fold one approved review into the stored aggregate. Documents created before
+// sum/histogram existed fall back to average * count until the next reconciliation.
+async function applyRating(db, professionalId, rating) {
+  await db.collection('professionals').updateOne({ id: professionalId }, [
+    {
+      $set: {
+        'ratings.sum': {
+          $add: [{ $ifNull: ['$ratings.sum', { $multiply: [{ $ifNull: ['$ratings.average', 0] }, { $ifNull: ['$ratings.count', 0] }] }] }, rating]
+        },
+        'ratings.count': { $add: [{ $ifNull: ['$ratings.count', 0] }, 1] },
+        [`ratings.histogram.${rating}`]: { $add: [{ $ifNull: [`$ratings.histogram.${rating}`, 0] }, 1] }
+      }
+    },
+    { $set: { 'ratings.average': { $round: [{ $divide: ['$ratings.sum', '$ratings.count'] }, 1] } } }
+  ])
+}
+
+// Rebuild ratings from approved reviews in bulk (all professionals, or just `professionalIds`).
+// Every rebuilt row is stamped with this run's start time, so the stale reset can find the rest
+// without holding their ids.
+async function reconcileRatings(db, professionalIds = null) {
+  const runStartedAt = new Date()
+  const match = { status: 'approved' }
+  if (professionalIds) match.professionalId = { $in: professionalIds }
+
+  const cursor = db.collection('reviews').aggregate([
+    { $match: match },
+    { $group: { _id: { professionalId: '$professionalId', rating: '$rating' }, count: { $sum: 1 } } },
+    { $group: { _id: '$_id.professionalId', stars: { $push: { rating: '$_id.rating', count: '$count' } } } }
+  ], { allowDiskUse: true })
+
+  let batch = []
+  let updated = 0
+  const flush = async () => {
+    if (batch.length === 0) return
+    await db.collection('professionals').bulkWrite(batch, { ordered: false })
+    updated += batch.length
+    batch = []
+  }
+
+  for await (const group of cursor) {
+    const histogram = { ...EMPTY_RATINGS.histogram }
+    let sum = 0
+    let count = 0
+    for (const { rating, count: n } of group.stars) {
+      histogram[rating] = n
+      sum += rating * n
+      count += n
+    }
+    batch.push({
+      updateOne: {
+        filter: { id: group._id },
+        update: {
+          $set: { ratings: { average: Math.round((sum / count) * 10) / 10, count, sum, histogram, reconciledAt: runStartedAt } }
+        }
+      }
+    })
+    if (batch.length === 500) await flush()
+  }
+  await flush()
+
+  // Professionals whose approved reviews are all gone: rated, but not stamped by this run
+  const staleFilter = { 'ratings.count': { $gt: 0 }, 'ratings.reconciledAt': { $ne: runStartedAt } }
+  if (professionalIds) staleFilter.id = { $in: professionalIds }
+  const reset = await db.collection('professionals').updateMany(staleFilter, { $set: { ratings: EMPTY_RATINGS } })
+
+  return { updated, reset: reset.modifiedCount }
+}
+
+// ==================== STATS ====================
+
+// Counters for /admin/stats and /categories live in one snapshot document that every
+// registration, approval, review and subscription event adjusts with $inc. A periodic
+// recount rebuilds it from the collections to correct any drift.
+const STATS_ID = 'marketplace'
+
+function statsKey(category) {
+  return String(category || 'Uncategorized').replace(/[.$]/g, '_')
+}
+
+// Display names for snapshot keys; other categories carry their name from the last recount
+const STATS_CATEGORY_NAMES = new Map(CATEGORIES.map(category => [statsKey(category), category]))
+
+// Counters one professional document contributes to the snapshot
+function professionalStats(professional) {
+  if (!professional) return {}
+  const status = professional.verification?.status || 'pending'
+  const category = statsKey(professional.category)
+  return {
+    'professionals.total': 1,
+    [`professionals.${status}`]: 1,
+    [`categories.${category}.total`]: 1,
+    [`categories.${category}.listed`]: status === 'approved' && professional.isActive ? 1 : 0
+  }
+}
+
+async function incrementStats(db, inc) {
+  const changes = Object.entries(inc).filter(([, value]) => value !== 0)
+  if (changes.length === 0) return
+  await db.collection('stats').updateOne({ _id: STATS_ID }, { $inc: Object.fromEntries(changes) }, { upsert: true })
+}
+
+// Move a professional's counters from its `before` state to its `after` state (either may be null)
+async function updateProfessionalStats(db, before, after) {
+  const inc = professionalStats(after)
+  for (const [key, value] of Object.entries(professionalStats(before))) {
+    inc[key] = (inc[key] || 0) - value
+  }
+  await incrementStats(db, inc)
+}
+
+async function recountStats(db) {
+  const professionals = db.collection('professionals')
+  const [statusCounts, categoryCounts, totalReviews, pendingReviews, completedSubscriptions] = await Promise.all([
+    professionals.aggregate([{ $group: { _id: '$verification.status', count: { $sum: 1 } } }]).toArray(),
+    professionals.aggregate([
+      {
+        $group: {
+          _id: '$category',
+          total: { $sum: 1 },
+          listed: { $sum: { $cond: [{ $and: [{ $eq: ['$verification.status', 'approved'] }, { $eq: ['$isActive', true] }] }, 1, 0] } }
+        }
+      }
+    ]).toArray(),
+    db.collection('reviews').countDocuments(),
+    db.collection('reviews').countDocuments({ status: 'pending' }),
+    db.collection('subscriptions').countDocuments({ status: 'completed' })
+  ])
+
+  const snapshot = {
+    professionals: { total: 0, pending: 0, approved: 0, rejected: 0 },
+    categories: {},
+    reviews: { total: totalReviews, pending: pendingReviews },
+    subscriptions: { completed: completedSubscriptions },
+    recountedAt: new Date()
+  }
+  for (const { _id, count } of statusCounts) {
+    snapshot.professionals[_id || 'pending'] = (snapshot.professionals[_id || 'pending'] || 0) + count
+    snapshot.professionals.total += count
+  }
+  for (const { _id, total, listed } of categoryCounts) {
+    snapshot.categories[statsKey(_id)] = { name: _id || 'Uncategorized', total, listed }
+  }
+
+  await db.collection('stats').replaceOne({ _id: STATS_ID }, snapshot, { upsert: true })
+  return snapshot
+}
+
+async function getStats(db) {
+  const snapshot = await db.collection('stats').findOne({ _id: STATS_ID })
+  return snapshot?.recountedAt ? snapshot : recountStats(db)
+}
+
+// ==================== ANALYTICS ====================
+
+// Profile views and contact clicks are buffered in memory per professional and day, then
+// flushed with one bulkWrite each to the professional documents and the analytics_daily buckets.
+// Counts can lag by up to ANALYTICS_FLUSH_INTERVAL; an unflushed buffer is lost if the process dies.
+const ANALYTICS_FLUSH_INTERVAL = parseInt(process.env.ANALYTICS_FLUSH_INTERVAL_MS) || 5000
+const ANALYTICS_FLUSH_MAX = 1000 // buffered (professional, day) pairs that force an early flush
+let analyticsBuffer = new Map()
+let analyticsTimer = null
+
+function recordAnalytics(db, professionalId, field) {
+  const now = new Date()
+  const day = now.toISOString().slice(0, 10)
+  const key = `${professionalId}|${day}`
+  let entry = analyticsBuffer.get(key)
+  if (!entry) {
+    entry = { professionalId, day, views: 0, contacts: 0, lastViewedAt: null }
+    analyticsBuffer.set(key, entry)
+  }
+  entry[field] += 1
+  if (field === 'views') entry.lastViewedAt = now
+
+  // Timers capture the async context they are created in, so both paths leave the request's span
+  if (analyticsBuffer.size >= ANALYTICS_FLUSH_MAX) {
+    detached(() => flushAnalytics(db)).catch(error => console.error('Analytics flush error:', error))
+  } else if (!analyticsTimer) {
+    analyticsTimer = detached(() => setTimeout(() => {
+      flushAnalytics(db).catch(error => console.error('Analytics flush error:', error))
+    }, ANALYTICS_FLUSH_INTERVAL))
+  }
+}
+
+// Ops whose write failed, as [collection, op] pairs, retried by the next flush
+let analyticsRetry = []
+
+// Write one collection's increments. An unordered bulkWrite applies every op except those listed in
+// writeErrors, so only those are queued again; any other error queues the whole batch.
+async function writeAnalytics(db, collection, ops) {
+  if (ops.length === 0) return null
+  try {
+    await db.collection(collection).bulkWrite(ops, { ordered: false })
+    return null
+  } catch (error) {
+    const failed = error.writeErrors ? [].concat(error.writeErrors).map(writeError => ops[writeError.index]) : ops
+    analyticsRetry.push(...failed.map(op => [collection, op]))
+    return error
+  }
+}
+
+async function flushAnalytics(db) {
+  clearTimeout(analyticsTimer)
+  analyticsTimer = null
+  if (analyticsBuffer.size === 0 && analyticsRetry.length === 0) return
+  const entries = [...analyticsBuffer.values()]
+  const retry = analyticsRetry
+  analyticsBuffer = new Map()
+  analyticsRetry = []
+
+  const totals = new Map()
+  for (const entry of entries) {
+    const total = totals.get(entry.professionalId) || { views: 0, contacts: 0, lastViewedAt: null }
+    total.views += entry.views
+    total.contacts += entry.contacts
+    if (entry.lastViewedAt && (!total.lastViewedAt || entry.lastViewedAt > total.lastViewedAt)) {
+      total.lastViewedAt = entry.lastViewedAt
+    }
+    totals.set(entry.professionalId, total)
+  }
+
+  const retried = collection => retry.filter(([name]) => name === collection).map(([, op]) => op)
+  // Each collection is written and retried on its own, so a failure on one side never replays the other
+  const professionalsError = await writeAnalytics(db, 'professionals', [
+    ...retried('professionals'),
+    ...[...totals].map(([professionalId, total]) => ({
+      updateOne: {
+        filter: { id: professionalId },
+        update: {
+          $inc: { 'analytics.profileViews': total.views, 'analytics.contactClicks': total.contacts },
+          ...(total.lastViewedAt && { $max: { 'analytics.lastViewedAt': total.lastViewedAt } })
+        }
+      }
+    }))
+  ])
+  const dailyError = await writeAnalytics(db, 'analytics_daily', [
+    ...retried('analytics_daily'),
+    ...entries.map(entry => ({
+      updateOne: {
+        filter: { professionalId: entry.professionalId, day: entry.day },
+        update: { $inc: { views: entry.views, contacts: entry.contacts } },
+        upsert: true
+      }
+    }))
+  ])
+
+  const error = professionalsError || dailyError
+  if (error) {
+    if (!analyticsTimer) {
+      analyticsTimer = setTimeout(() => {
+        flushAnalytics(db).catch(err => console.error('Analytics flush error:', err))
+      }, ANALYTICS_FLUSH_INTERVAL)
+    }
+    throw error
+  }
+}
+
+// ==================== RESPONSE CACHE ====================
+
+// Serialized public responses keyed on route + normalized query, evicted LRU and by TTL.
+// Writes that change what these routes return invalidate by tag. The cache is per process,
+// so across several instances the TTL bounds how long another instance can serve stale data.
+const RESPONSE_CACHE_TTL = parseInt(process.env.RESPONSE_CACHE_TTL_MS) || 30 * 1000
+const RESPONSE_CACHE_MAX = parseInt(process.env.RESPONSE_CACHE_MAX) || 1000
+const RESPONSE_CACHE_PAGES = 3 // first pages of /professionals worth caching
+const responseCache = new Map()
+
+// Blank values stay in the key: a bare "cursor=" selects cursor mode
+function responseCacheKey(route, url) {
+  const params = [...url.searchParams.entries()]
+    .sort(([a, aValue], [b, bValue]) => a.localeCompare(b) || aValue.localeCompare(bValue))
+  return `${route}?${new URLSearchParams(params)}`
+}
+
+function invalidateResponses(...tags) {
+  for (const [key, entry] of responseCache) {
+    if (entry.tags.some(tag => tags.includes(tag))) responseCache.delete(key)
+  }
+}
+
+// Serve `build()`'s payload from the cache when possible, honouring If-None-Match.
+// Pass a null key to bypass the cache for requests that should not be stored.
+async function cachedJSON(request, key, { tags, maxAge = 0 }, build) {
+  let entry = key && responseCache.get(key)
+  let status = 'HIT'
+  if (entry && entry.expiresAt > Date.now()) {
+    // Refresh LRU position
+    responseCache.delete(key)
+    responseCache.set(key, entry)
+  } else {
+    const body = JSON.stringify(await build())
+    entry = {
+      body,
+      etag: `W/"${createHash('sha1').update(body).digest('base64url')}"`,
+      tags,
+      expiresAt: Date.now() + RESPONSE_CACHE_TTL
+    }
+    entry.encoded = {}
+    status = key ? 'MISS' : 'BYPASS'
+    if (key) {
+      responseCache.delete(key)
+      if (responseCache.size >= RESPONSE_CACHE_MAX) responseCache.delete(responseCache.keys().next().value)
+      responseCache.set(key, entry)
+    }
+  }
+
+  const headers = {
+    'Content-Type': 'application/json',
+    ETag: entry.etag,
+    'Cache-Control': `public, max-age=${maxAge}, must-revalidate`,
+    'X-Cache': status,
+    Vary: 'Accept-Encoding'
+  }
+  const ifNoneMatch = request.headers.get('if-none-match')
+  if (ifNoneMatch && ifNoneMatch.split(',').some(tag => tag.trim() === entry.etag)) {
+    return handleCORS(new NextResponse(null, { status: 304, headers }))
+  }
+  // Encoded bodies are kept on the entry, so a cache hit is served without compressing again; a
+  // failed compression is dropped so the next request retries it instead of failing the same way
+  const encoding = Buffer.byteLength(entry.body) >= COMPRESS_MIN_BYTES && negotiateEncoding(request)
+  if (encoding) {
+    if (!entry.encoded[encoding]) {
+      const encoded = timePhase('compress', () => ENCODERS[encoding](entry.body)).catch(error => {
+        if (entry.encoded[encoding] === encoded) delete entry.encoded[encoding]
+        throw error
+      })
+      entry.encoded[encoding] = encoded
+    }
+    headers['Content-Encoding'] = encoding
+    return handleCORS(new NextResponse(await entry.encoded[encoding], { status: 200, headers }))
+  }
+  return handleCORS(new NextResponse(entry.body, { status: 200, headers }))
+}
+
+// ==================== COMPRESSION ====================
+
+// JSON bodies of COMPRESS_MIN_BYTES or more go out brotli- or gzip-encoded, whichever the client
+// prefers (brotli on a tie). Listing pages are repetitive JSON and shrink several-fold, which
+// matters more than server time on slow mobile links. Brotli runs at a low quality level: near
+// its best ratio on payloads this size, at about the CPU cost of gzip.
+const COMPRESS_MIN_BYTES = parseInt(process.env.COMPRESS_MIN_BYTES) || 1024
+const BROTLI_QUALITY = parseInt(process.env.BROTLI_QUALITY) || 4
+const brotliCompress = promisify(zlib.brotliCompress)
+const gzip = promisify(zlib.gzip)
+const ENCODERS = {
+  br: body => brotliCompress(body, { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: BROTLI_QUALITY } }),
+  gzip: body => gzip(body)
+}
+
+// Preferred encoding in Accept-Encoding (q=0 refuses one), or null to send the body as is
+function negotiateEncoding(request) {
+  const weights = new Map()
+  for (const part of (request.headers.get('accept-encoding') || '').split(',')) {
+    const [name, ...params] = part.trim().toLowerCase().split(';')
+    const q = params.map(param => param.trim()).find(param => param.startsWith('q='))
+    if (name) weights.set(name, q ? parseFloat(q.slice(2)) || 0 : 1)
+  }
+  const weight = encoding => weights.get(encoding) ?? weights.get('*') ?? 0
+  let best = null
+  for (const encoding of Object.keys(ENCODERS)) {
+    if (weight(encoding) > 0 && (!best || weight(encoding) > weight(best))) best = encoding
+  }
+  return best
+}
+
+// Compress an uncached JSON response. Streams (exports), 304s and already encoded bodies pass through.
+async function compressResponse(request, response) {
+  if (response.headers.has('content-encoding') || !response.body) return response
+  if (!response.headers.get('content-type')?.startsWith('application/json')) return response
+  const encoding = negotiateEncoding(request)
+  if (!encoding) return response
+  const body = Buffer.from(await response.arrayBuffer())
+  const headers = new Headers(response.headers)
+  if (!headers.get('vary')?.includes('Accept-Encoding')) headers.append('Vary', 'Accept-Encoding')
+  if (body.length < COMPRESS_MIN_BYTES) return new NextResponse(body, { status: response.status, headers })
+  headers.set('Content-Encoding', encoding)
+  headers.delete('content-length')
+  const encoded = await timePhase('compress', () => ENCODERS[encoding](body))
+  return new NextResponse(encoded, { status: response.status, headers })
+}
+
+// ==================== EXPORT ====================
+
+// Fields an export may select (dotted paths into the professional document)
+const EXPORT_FIELDS = [
+  'id', 'fullName', 'email', 'phone', 'category', 'subcategory', 'experience',
+  'location.country', 'location.state', 'location.city', 'verification.status',
+  'featured.isFeatured', 'featured.featuredUntil', 'subscription.plan', 'subscription.status',
+  'ratings.average', 'ratings.count', 'analytics.profileViews', 'analytics.contactClicks',
+  'isActive', 'createdAt', 'updatedAt'
+]
+const EXPORT_DEFAULT_FIELDS = ['id', 'fullName', 'email', 'category', 'location.country', 'location.city', 'verification.status', 'createdAt']
+const EXPORT_BATCH_SIZE = 500
+
+function csvValue(value) {
+  if (value == null) return ''
+  const text = value instanceof Date ? value.toISOString() : String(value)
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text
+}
+
+// Stream `query` as NDJSON or CSV straight from a Mongo cursor. The stream is pull-based, so a
+// document is only read once the client has consumed the previous chunk and memory stays flat.
+function exportStream(collection, query, fields, format) {
+  const cursor = collection
+    .find(query)
+    .project(Object.fromEntries(fields.map(field => [field, 1])))
+    .sort({ createdAt: -1, id: -1 })
+    .batchSize(EXPORT_BATCH_SIZE)
+  const encoder = new TextEncoder()
+  let headerSent = format !== 'csv'
+
+  return new ReadableStream({
+    async pull(controller) {
+      try {
+        if (!headerSent) {
+          headerSent = true
+          controller.enqueue(encoder.encode(fields.join(',') + '\n'))
+          return
+        }
+        const doc = await cursor.next()
+        if (!doc) {
+          await cursor.close()
+          controller.close()
+          return
+        }
+        const line = format === 'csv'
+          ? fields.map(field => csvValue(getPath(doc, field))).join(',')
+          : JSON.stringify(Object.fromEntries(fields.map(field => [field, getPath(doc, field) ?? null])))
+        controller.enqueue(encoder.encode(line + '\n'))
+      } catch (error) {
+        console.error('Export stream error:', error)
+        await cursor.close().catch(() => {})
+        controller.error(error)
+      }
+    },
+    async cancel() {
+      await cursor.close()
+    }
+  })
+}
+
+// ==================== BATCH MODERATION ====================
+
+const MODERATION_BATCH_MAX = 5000
+const MODERATION_STATUS = { approve: 'approved', reject: 'rejected' }
+
+// Approve or reject many professionals with one updateMany per current status. Targets come from
+// explicit `ids` or a `filter` ({ status, category, createdBefore }); returns per-item results.
+// Each update only matches documents still in the status they were read with, so stats, emails
+// and results cover exactly the professionals this call moved.
+async function moderateProfessionals(db, admin, action, { ids, filter, reason }) {
+  const status = MODERATION_STATUS[action]
+  const query = {}
+  if (Array.isArray(ids)) {
+    query.id = { $in: ids.slice(0, MODERATION_BATCH_MAX) }
+  } else {
+    query['verification.status'] = filter?.status || 'pending'
+    if (filter?.category) query.category = filter.category
+    if (filter?.createdBefore) query.createdAt = { $lt: new Date(filter.createdBefore) }
+  }
+
+  const targets = await db.collection('professionals')
+    .find(query)
+    .project({ id: 1, email: 1, fullName: 1, category: 1, verification: 1, isActive: 1 })
+    .sort({ createdAt: 1 })
+    .limit(MODERATION_BATCH_MAX + 1)
+    .toArray()
+  const hasMore = !Array.isArray(ids) && targets.length > MODERATION_BATCH_MAX
+  if (hasMore) targets.pop()
+
+  const eligible = targets.filter(p => p.verification?.status !== status)
+  const results = targets.map(p => ({ id: p.id, result: p.verification?.status === status ? 'unchanged' : status }))
+  if (Array.isArray(ids)) {
+    const found = new Set(targets.map(p => p.id))
+    for (const id of ids.slice(0, MODERATION_BATCH_MAX)) {
+      if (!found.has(id)) results.push({ id, result: 'not_found' })
+    }
+  }
+
+  const applied = []
+  if (eligible.length > 0) {
+    const now = new Date()
+    const set = action === 'approve'
+      ? { 'verification.status': status, 'verification.verifiedAt': now, 'verification.verifiedBy': admin.id, updatedAt: now }
+      : { 'verification.status': status, 'verification.rejectionReason': reason || 'Does not meet requirements', updatedAt: now }
+
+    const byStatus = new Map()
+    for (const professional of eligible) {
+      const from = professional.verification?.status || 'pending'
+      byStatus.set(from, [...(byStatus.get(from) || []), professional])
+    }
+    for (const [from, group] of byStatus) {
+      const groupIds = group.map(p => p.id)
+      const result = await db.collection('professionals').updateMany(
+        { id: { $in: groupIds }, 'verification.status': from },
+        { $set: set }
+      )
+      if (result.modifiedCount === group.length) {
+        applied.push(...group)
+        continue
+      }
+      // Some changed status since the read; keep only the documents this update stamped
+      const moved = new Set(await db.collection('professionals')
+        .distinct('id', { id: { $in: groupIds }, 'verification.status': status, updatedAt: now }))
+      applied.push(...group.filter(p => moved.has(p.id)))
+    }
+  }
+
+  const appliedIds = new Set(applied.map(p => p.id))
+  for (const item of results) {
+    if (item.result === status && !appliedIds.has(item.id)) item.result = 'conflict'
+  }
+
+  if (applied.length > 0) {
+    const inc = {}
+    for (const professional of applied) {
+      const before = professionalStats(professional)
+      const after = professionalStats({ ...professional, verification: { status } })
+      for (const [key, value] of Object.entries(after)) inc[key] = (inc[key] || 0) + value
+      for (const [key, value] of Object.entries(before)) inc[key] = (inc[key] || 0) - value
+    }
+    await incrementStats(db, inc)
+    invalidateResponses('professionals', 'categories')
+    invalidateSessionUsers(...applied.map(p => p.id))
+
+    await queueEmailBatch(db, applied.map(p => action === 'approve'
+      ? { to: p.email, subject: 'Your ExpertBridge Profile is Approved!', html: getApprovalEmailTemplate(p.fullName) }
+      : { to: p.email, subject: 'ExpertBridge Profile Review Update', html: getRejectionEmailTemplate(p.fullName, reason) }))
+  }
+
+  return { action, matched: targets.length, updated: applied.length, hasMore, results }
+}
+
+// ==================== INSTRUMENTATION ====================
+
+// Each request runs inside a span (AsyncLocalStorage) that collects per-phase durations: Mongo
+// commands via driver command monitoring, bcrypt, JWT verification and waits on outbound jobs.
+// Spans surface as a Server-Timing header, feed the Prometheus counters behind GET /metrics and,
+// with SLOW_QUERY_MS set, slow Mongo commands are logged (SLOW_QUERY_EXPLAIN=true adds the
+// documents and keys examined from an executionStats explain).
+const requestSpans = new AsyncLocalStorage()
+const SLOW_QUERY_MS = parseInt(process.env.SLOW_QUERY_MS) || 0
+const SLOW_QUERY_EXPLAIN = process.env.SLOW_QUERY_EXPLAIN === 'true'
+const METRICS_TOKEN = process.env.METRICS_TOKEN || null
+const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+const EXPLAINABLE_COMMANDS = new Set(['find', 'aggregate', 'count', 'distinct'])
+const metrics = {
+  requests: new Map(), // "method route status" -> count
+  durations: new Map(), // route -> { buckets, sum, count }
+  phases: new Map(), // phase -> { sum, count }
+  commands: new Map(), // "op collection" -> { sum, count, docs }
+  slowQueries: 0
+}
+const pendingCommands = new Map()
+
+// Ids and references collapse to :id so metric labels stay bounded
+function routeLabel(route) {
+  return route.split('/').map(segment => (/\d/.test(segment) && segment.length >= 8 ? ':id' : segment)).join('/')
+}
+
+function addSample(map, key, seconds, extra = {}) {
+  const entry = map.get(key) || { sum: 0, count: 0 }
+  entry.sum += seconds
+  entry.count += 1
+  for (const [field, value] of Object.entries(extra)) entry[field] = (entry[field] || 0) + value
+  map.set(key, entry)
+}
+
+// Run `fn` outside the current request's span. Work a request starts but does not wait for (job
+// workers, password rehash, analytics flushes, slow-query explains) would otherwise inherit the
+// span through AsyncLocalStorage and charge its Mongo time to that request; detached, it is
+// counted under route="background".
+function detached(fn) {
+  return requestSpans.exit(fn)
+}
+
+function startSpan(request, route) {
+  return { method: request.method, route: routeLabel(route), startedAt: performance.now(), phases: new Map(), queries: 0, docs: 0 }
+}
+
+// Add `ms` to a phase of the current request's span (if any) and to the process-wide totals
+function recordPhase(name, ms, span = requestSpans.getStore()) {
+  addSample(metrics.phases, name, ms / 1000)
+  if (!span) return
+  const phase = span.phases.get(name) || { ms: 0, count: 0, desc: new Set() }
+  phase.ms += ms
+  phase.count += 1
+  span.phases.set(name, phase)
+  return phase
+}
+
+async function timePhase(name, fn) {
+  const startedAt = performance.now()
+  try {
+    return await fn()
+  } finally {
+    recordPhase(name, performance.now() - startedAt)
+  }
+}
+
+// countDocuments is sent as an aggregate ending in { $group: { _id: 1, n: { $sum: 1 } } }
+function commandOp(event) {
+  const { commandName, command } = event
+  const last = commandName === 'aggregate' && command.pipeline?.[command.pipeline.length - 1]
+  if (last?.$group?.n?.$sum === 1 && Object.keys(last.$group).length === 2) return 'countDocuments'
+  return commandName
+}
+
+function commandDocs(reply) {
+  const batch = reply?.cursor?.firstBatch || reply?.cursor?.nextBatch
+  if (batch) return batch.length
+  return typeof reply?.n === 'number' ? reply.n : 0
+}
+
+// Literal values replaced by "?" so the slow log groups by query shape and never carries user data
+function queryShape(value) {
+  if (Array.isArray(value)) return value.map(queryShape)
+  if (value && typeof value === 'object' && value.constructor === Object) {
+    return Object.fromEntries(Object.entries(value).map(([key, inner]) => [key, queryShape(inner)]))
+  }
+  return '?'
+}
+
+function findStat(explain, key) {
+  if (!explain || typeof explain !== 'object') return undefined
+  if (typeof explain[key] === 'number') return explain[key]
+  for (const value of Object.values(explain)) {
+    const found = findStat(value, key)
+    if (found !== undefined) return found
+  }
+  return undefined
+}
+
+async function logSlowQuery(pending, durationMs, docs) {
+  metrics.slowQueries += 1
+  const { command, op, collection, route } = pending
+  const entry = {
+    slowQuery: true,
+    route,
+    op,
+    collection,
+    durationMs: Math.round(durationMs * 10) / 10,
+    docsReturned: docs,
+    shape: queryShape(command.filter || command.pipeline || command.query || {})
+  }
+  if (SLOW_QUERY_EXPLAIN && EXPLAINABLE_COMMANDS.has(pending.commandName)) {
+    const { $db, lsid, $clusterTime, $readPreference, txnNumber, ...explainable } = command
+    try {
+      const explain = await client.db($db).command({ explain: explainable, verbosity: 'executionStats' })
+      entry.docsExamined = findStat(explain, 'totalDocsExamined')
+      entry.keysExamined = findStat(explain, 'totalKeysExamined')
+    } catch (error) {
+      entry.explainError = error.message
+    }
+  }
+  console.warn(JSON.stringify(entry))
+}
+
+function instrumentMongo(mongoClient) {
+  mongoClient.on('commandStarted', event => {
+    const span = requestSpans.getStore()
+    const { command, commandName } = event
+    pendingCommands.set(event.requestId, {
+      span,
+      commandName,
+      op: commandOp(event),
+      collection: commandName === 'getMore' ? command.collection : String(command[commandName]),
+      route: span?.route || 'background',
+      command: SLOW_QUERY_MS > 0 ? command : null
+    })
+  })
+  const finish = (event, reply) => {
+    const pending = pendingCommands.get(event.requestId)
+    if (!pending) return
+    pendingCommands.delete(event.requestId)
+    const docs = commandDocs(reply)
+    addSample(metrics.commands, `${pending.op} ${pending.collection}`, event.duration / 1000, { docs })
+    const phase = recordPhase(`db-${pending.op}`, event.duration, pending.span)
+    if (phase) {
+      phase.desc.add(pending.collection)
+      pending.span.queries += 1
+      pending.span.docs += docs
+    }
+    if (SLOW_QUERY_MS > 0 && event.duration >= SLOW_QUERY_MS) {
+      detached(() => logSlowQuery(pending, event.duration, docs)).catch(() => {})
+    }
+  }
+  mongoClient.on('commandSucceeded', event => finish(event, event.reply))
+  mongoClient.on('commandFailed', event => finish(event, null))
+}
+
+function serverTiming(span, totalMs) {
+  const entries = [`total;dur=${totalMs.toFixed(1)}`]
+  if (span.queries) {
+    const dbMs = [...span.phases].filter(([name]) => name.startsWith('db-')).reduce((sum, [, p]) => sum + p.ms, 0)
+    entries.push(`db;dur=${dbMs.toFixed(1)};desc="${span.queries} queries, ${span.docs} docs"`)
+  }
+  for (const [name, phase] of span.phases) {
+    const desc = phase.desc.size ? `${[...phase.desc].join(' ')} x${phase.count}` : `x${phase.count}`
+    entries.push(`${name};dur=${phase.ms.toFixed(1)};desc="${desc}"`)
+  }
+  return entries.join(', ')
+}
+
+function finishSpan(span, response) {
+  const totalMs = performance.now() - span.startedAt
+  const seconds = totalMs / 1000
+  const requestKey = `${span.method} ${span.route} ${response.status}`
+  metrics.requests.set(requestKey, (metrics.requests.get(requestKey) || 0) + 1)
+
+  const duration = metrics.durations.get(span.route) || { buckets: LATENCY_BUCKETS.map(() => 0), sum: 0, count: 0 }
+  LATENCY_BUCKETS.forEach((bound, i) => { if (seconds <= bound) duration.buckets[i] += 1 })
+  duration.sum += seconds
+  duration.count += 1
+  metrics.durations.set(span.route, duration)
+
+  response.headers.set('Server-Timing', serverTiming(span, totalMs))
+  return response
+}
+
+function labels(values) {
+  return `{${Object.entries(values).map(([key, value]) => `${key}="${String(value).replace(/["\\\n]/g, '\\$&')}"`).join(',')}}`
+}
+
+// Prometheus text exposition format (version 0.0.4)
+function renderMetrics() {
+  const lines = [
+    '# HELP expertbridge_http_requests_total API requests by route and status.',
+    '# TYPE expertbridge_http_requests_total counter'
+  ]
+  for (const [key, count] of metrics.requests) {
+    const [method, route, status] = key.split(' ')
+    lines.push(`expertbridge_http_requests_total${labels({ method, route, status })} ${count}`)
+  }
+
+  lines.push('# HELP expertbridge_http_request_duration_seconds API request latency.',
+    '# TYPE expertbridge_http_request_duration_seconds histogram')
+  for (const [route, duration] of metrics.durations) {
+    LATENCY_BUCKETS.forEach((bound, i) => {
+      lines.push(`expertbridge_http_request_duration_seconds_bucket${labels({ route, le: bound })} ${duration.buckets[i]}`)
+    })
+    lines.push(`expertbridge_http_request_duration_seconds_bucket${labels({ route, le: '+Inf' })} ${duration.count}`,
+      `expertbridge_http_request_duration_seconds_sum${labels({ route })} ${duration.sum}`,
+      `expertbridge_http_request_duration_seconds_count${labels({ route })} ${duration.count}`)
+  }
+
+  lines.push('# HELP expertbridge_phase_duration_seconds Time spent per phase (db-<op>, bcrypt, jwt, job-wait, job-<type>).',
+    '# TYPE expertbridge_phase_duration_seconds summary')
+  for (const [phase, sample] of metrics.phases) {
+    lines.push(`expertbridge_phase_duration_seconds_sum${labels({ phase })} ${sample.sum}`,
+      `expertbridge_phase_duration_seconds_count${labels({ phase })} ${sample.count}`)
+  }
+
+  lines.push('# HELP expertbridge_db_command_duration_seconds Mongo command latency by operation and collection.',
+    '# TYPE expertbridge_db_command_duration_seconds summary')
+  for (const [key, sample] of metrics.commands) {
+    const [op, collection] = key.split(' ')
+    lines.push(`expertbridge_db_command_duration_seconds_sum${labels({ op, collection })} ${sample.sum}`,
+      `expertbridge_db_command_duration_seconds_count${labels({ op, collection })} ${sample.count}`)
+  }
+
+  lines.push('# HELP expertbridge_db_documents_returned_total Documents returned or written by Mongo commands.',
+    '# TYPE expertbridge_db_documents_returned_total counter')
+  for (const [key, sample] of metrics.commands) {
+    const [op, collection] = key.split(' ')
+    lines.push(`expertbridge_db_documents_returned_total${labels({ op, collection })} ${sample.docs}`)
+  }
+
+  lines.push('# HELP expertbridge_slow_queries_total Mongo commands slower than SLOW_QUERY_MS.',
+    '# TYPE expertbridge_slow_queries_total counter',
+    `expertbridge_slow_queries_total ${metrics.slowQueries}`)
+  return lines.join('\n') + '\n'
+}
+
+// ==================== REQUEST CAPTURE ====================
+
+// With REQUEST_CAPTURE_PATH set, every API request is appended to that file as one NDJSON record
+// that `backend_test.py --mode replay` can play back (the format is described there):
+//   { ts, session, method, path, auth, account, body, status, ms }
+// `session` is the token hash for signed-in callers, else client IP + user agent; requests that
+// share one are replayed in order. Password fields are redacted. Unless REQUEST_CAPTURE_PII=true,
+// email addresses are replaced by a keyed hash (stable, so a replayed login still matches its
+// registration) and names, phone numbers and review text by "<pii>". Uploads are not captured,
+// and bodies whose Content-Length exceeds CAPTURE_BODY_MAX are left out without being read.
+// Captures from several instances can be concatenated.
+const CAPTURE_FORMAT = 'expertbridge-capture'
+const CAPTURE_BODY_MAX = 64 * 1024
+const CAPTURE_SECRET_FIELDS = ['password', 'currentPassword', 'newPassword']
+const CAPTURE_HASHED_FIELDS = ['email', 'clientEmail']
+const CAPTURE_PII_FIELDS = ['fullName', 'clientName', 'phone', 'comment']
+const CAPTURE_KEEP_PII = process.env.REQUEST_CAPTURE_PII === 'true'
+const requestCapture = process.env.REQUEST_CAPTURE_PATH
+  ? fs.createWriteStream(process.env.REQUEST_CAPTURE_PATH, { flags: 'a' })
+  : null
+requestCapture?.write(JSON.stringify({ format: CAPTURE_FORMAT, version: 1, startedAt: new Date().toISOString() }) + '\n')
+
+function captureEmail(email) {
+  return `${createHmac('sha256', JWT_SECRET).update(email.toLowerCase()).digest('hex').slice(0, 16)}@capture.invalid`
+}
+
+function redactCapture(value) {
+  if (Array.isArray(value)) return value.map(redactCapture)
+  if (!value || typeof value !== 'object') return value
+  return Object.fromEntries(Object.entries(value).map(([field, inner]) => {
+    if (CAPTURE_SECRET_FIELDS.includes(field)) return [field, '<redacted>']
+    if (!CAPTURE_KEEP_PII && typeof inner === 'string') {
+      if (CAPTURE_HASHED_FIELDS.includes(field)) return [field, captureEmail(inner)]
+      if (CAPTURE_PII_FIELDS.includes(field)) return [field, '<pii>']
+    }
+    return [field, redactCapture(inner)]
+  }))
+}
+
+function captureBody(text) {
+  if (!text) return undefined
+  if (text.length > CAPTURE_BODY_MAX) return { bodyOmitted: text.length }
+  try {
+    return { body: redactCapture(JSON.parse(text)) }
+  } catch (error) {
+    return { bodyOmitted: text.length }
+  }
+}
+
+// Called before the route runs: reads a clone of the body and resolves who is calling. Bodies
+// without a Content-Length (or over the cap) are not cloned.
+function startCapture(request) {
+  const url = new URL(request.url)
+  const path = url.pathname.replace(/^\/api/, '') || '/'
+  if (request.method === 'OPTIONS' || path === '/metrics' || path.startsWith('/upload/')) return null
+  const length = ['POST', 'PUT', 'PATCH', 'DELETE'].includes(request.method)
+    ? parseInt(request.headers.get('content-length')) || 0
+    : 0
+  const session = verifySession(request)
+  const authHeader = request.headers.get('Authorization')
+  const client = `${request.headers.get('x-forwarded-for')?.split(',')[0].trim() || 'unknown'}|${request.headers.get('user-agent') || ''}`
+  return {
+    ts: Date.now(),
+    session: createHash('sha256').update(authHeader && session ? authHeader : client).digest('base64url').slice(0, 16),
+    method: request.method,
+    path: path + url.search,
+    auth: session ? session.claims.role : authHeader ? 'invalid' : null,
+    account: session?.claims.id,
+    ...(length > CAPTURE_BODY_MAX && { bodyOmitted: length }),
+    body: length > 0 && length <= CAPTURE_BODY_MAX ? request.clone().text().catch(() => '') : null
+  }
+}
+
+async function captureRequest(capture, status, ms) {
+  try {
+    const { body, ...record } = capture
+    Object.assign(record, captureBody(await body), { status, ms: Math.round(ms * 1000) / 1000 })
+    requestCapture.write(JSON.stringify(record) + '\n')
+  } catch (error) {
+    console.error('Request capture error:', error)
+  }
+}
+
+// ==================== PASSWORD HASHING ====================
+
+// bcryptjs is pure JS, so hashing on the request loop stalls every other route. Hashes and
+// compares run on a small worker_threads pool instead; BCRYPT_WORKERS=0 falls back to the
+// library's async (event-loop yielding) API. Stored hashes whose cost differs from BCRYPT_COST
+// are rehashed after the next successful login.
+const BCRYPT_COST = parseInt(process.env.BCRYPT_COST) || 10
+const BCRYPT_WORKERS = process.env.BCRYPT_WORKERS !== undefined
+  ? parseInt(process.env.BCRYPT_WORKERS) || 0
+  : Math.max(1, Math.min(4, os.cpus().length - 1))
+const BCRYPT_WORKER_SOURCE = `
+const { parentPort } = require('worker_threads')
+const bcrypt = require('bcryptjs')
+parentPort.on('message', ({ op, password, hash, cost }) => {
+  try {
+    const result = op === 'hash' ? bcrypt.hashSync(password, cost) : bcrypt.compareSync(password, hash)
+    parentPort.postMessage({ result })
+  } catch (error) {
+    parentPort.postMessage({ error: error.message })
+  }
+})
+`
+const hashPool = { workers: new Set(), idle: [], queue: [], failed: false }
+
+function startHashWorker() {
+  const worker = new Worker(BCRYPT_WORKER_SOURCE, { eval: true })
+  worker.on('message', ({ result, error }) => {
+    const task = worker.task
+    worker.ready = true
+    worker.task = null
+    if (error) task.reject(new Error(error))
+    else task.resolve(result)
+    nextHashTask(worker)
+  })
+  worker.on('error', error => {
+    const task = worker.task
+    worker.task = null
+    if (!worker.ready) {
+      // The worker died before answering anything (bcryptjs could not load): hash on the main thread from now on
+      console.error('bcrypt worker pool unavailable, hashing on the main thread:', error.message)
+      hashPool.failed = true
+      if (task) hashInline(task.message).then(task.resolve, task.reject)
+    } else if (task) {
+      task.reject(error)
+    }
+  })
+  worker.on('exit', () => {
+    hashPool.workers.delete(worker)
+    hashPool.idle = hashPool.idle.filter(w => w !== worker)
+    if (!hashPool.failed) {
+      startHashWorker()
+    } else if (hashPool.workers.size === 0) {
+      for (const task of hashPool.queue.splice(0)) hashInline(task.message).then(task.resolve, task.reject)
+    }
+  })
+  // Unref after the listeners are attached (attaching them re-refs the port) so idle workers don't hold the process open
+  worker.unref()
+  hashPool.workers.add(worker)
+  nextHashTask(worker)
+}
+
+function nextHashTask(worker) {
+  const task = hashPool.queue.shift()
+  if (!task) {
+    hashPool.idle.push(worker)
+    return
+  }
+  worker.task = task
+  worker.postMessage(task.message)
+}
+
+function hashInline({ op, password, hash, cost }) {
+  return op === 'hash' ? bcrypt.hash(password, cost) : bcrypt.compare(password, hash)
+}
+
+function runHashTask(message) {
+  if (BCRYPT_WORKERS <= 0 || hashPool.failed) return hashInline(message)
+  if (hashPool.workers.size === 0) {
+    try {
+      for (let i = 0; i < BCRYPT_WORKERS; i++) startHashWorker()
+    } catch (error) {
+      console.error('bcrypt worker pool unavailable, hashing on the main thread:', error.message)
+      hashPool.failed = true
+      return hashInline(message)
+    }
+  }
+  return new Promise((resolve, reject) => {
+    const task = { message, resolve, reject }
+    const worker = hashPool.idle.pop()
+    if (worker) {
+      worker.task = task
+      worker.postMessage(message)
+    } else {
+      hashPool.queue.push(task)
+    }
+  })
+}
+
+function hashPassword(password) {
+  return timePhase('bcrypt', () => runHashTask({ op: 'hash', password, cost: BCRYPT_COST }))
+}
+
+function verifyPassword(password, hash) {
+  return timePhase('bcrypt', () => runHashTask({ op: 'compare', password, hash }))
+}
+
+function needsRehash(hash) {
+  try {
+    return bcrypt.getRounds(hash) !== BCRYPT_COST
+  } catch (error) {
+    return false
+  }
+}
+
+// Swap in a hash at the configured cost once the plaintext is known to be correct; the
+// filter on the old hash keeps a concurrent password change from being overwritten
+function upgradePasswordHash(db, collection, id, password, oldHash) {
+  return detached(async () => {
+    try {
+      const hash = await hashPassword(password)
+      await db.collection(collection).updateOne({ id, password: oldHash }, { $set: { password: hash } })
+    } catch (error) {
+      console.error('Password rehash error:', error)
+    }
+  })
+}
+
 // Helper function to handle CORS
 function handleCORS(response) {
   response.headers.set('Access-Control-Allow-Origin', process.env.CORS_ORIGINS || '*')
@@ -72,43 +1478,485 @@ function handleCORS(response) {
   return response
 }
 
-// Verify JWT token
-function verifyToken(request) {
+// ==================== SESSIONS ====================
+
+// Verified JWT claims, and the account record behind them, cached per token (keyed by its sha256)
+// in a bounded LRU so concurrent dashboard calls don't each repeat jwt.verify and the account
+// lookup. Claims live until the token expires. The account record is refreshed after
+// SESSION_USER_TTL_MS and dropped as soon as the account changes (profile update, moderation,
+// subscription, photo, delete); like the response cache, this is per process.
+const SESSION_CACHE_MAX = parseInt(process.env.SESSION_CACHE_MAX) || 10000
+const SESSION_USER_TTL = parseInt(process.env.SESSION_USER_TTL_MS) || 30 * 1000
+const sessions = new Map() // token hash -> { claims, expiresAt, user, userExpiresAt, version }
+const sessionsByAccount = new Map() // account id -> Set of token hashes
+
+function dropSession(key) {
+  const entry = sessions.get(key)
+  if (!entry) return
+  sessions.delete(key)
+  const keys = sessionsByAccount.get(entry.claims.id)
+  keys?.delete(key)
+  if (keys?.size === 0) sessionsByAccount.delete(entry.claims.id)
+}
+
+function rememberSession(key, claims) {
+  if (sessions.size >= SESSION_CACHE_MAX) dropSession(sessions.keys().next().value)
+  const expiresAt = claims.exp ? claims.exp * 1000 : Date.now() + SESSION_USER_TTL
+  const entry = { claims, expiresAt, user: null, userExpiresAt: 0, version: 0 }
+  sessions.set(key, entry)
+  if (!sessionsByAccount.has(claims.id)) sessionsByAccount.set(claims.id, new Set())
+  sessionsByAccount.get(claims.id).add(key)
+  return entry
+}
+
+// Forget cached account records so the next session lookup reads them again
+function invalidateSessionUsers(...accountIds) {
+  for (const id of accountIds) {
+    for (const key of sessionsByAccount.get(id) || []) {
+      const entry = sessions.get(key)
+      entry.user = null
+      entry.version += 1
+    }
+  }
+}
+
+// Session for the request's bearer token, or null when it is missing, invalid or expired
+function verifySession(request) {
   const authHeader = request.headers.get('Authorization')
   if (!authHeader || !authHeader.startsWith('Bearer ')) {
     return null
   }
   const token = authHeader.split(' ')[1]
+  const startedAt = performance.now()
   try {
-    return jwt.verify(token, JWT_SECRET)
+    const key = createHash('sha256').update(token).digest('base64url')
+    const cached = sessions.get(key)
+    if (cached && cached.expiresAt > Date.now()) {
+      sessions.delete(key)
+      sessions.set(key, cached)
+      return cached
+    }
+    if (cached) dropSession(key)
+    return rememberSession(key, jwt.verify(token, JWT_SECRET))
   } catch (error) {
     return null
+  } finally {
+    recordPhase('jwt', performance.now() - startedAt)
+  }
+}
+
+// Verify JWT token
+function verifyToken(request) {
+  return verifySession(request)?.claims || null
+}
+
+// The session's professional or admin record without credentials; a fetch that races an
+// invalidation is returned but not cached
+async function sessionUser(db, session) {
+  if (session.user && session.userExpiresAt > Date.now()) return session.user
+  const version = session.version
+  const collection = session.claims.role === 'professional' ? 'professionals' : 'admins'
+  const user = await db.collection(collection).findOne({ id: session.claims.id }, { projection: { password: 0, search: 0 } })
+  if (user && session.version === version) {
+    session.user = user
+    session.userExpiresAt = Date.now() + SESSION_USER_TTL
   }
+  return user
 }
 
-// Email sending helper function
+// ==================== OUTBOUND PROVIDERS ====================
+
+// SendGrid, Cloudinary and Paystack calls are made by job workers, never on the request path.
+// When a provider is not configured a local stand-in answers instead, with optional simulated
+// latency and failure rate so the retry path can be exercised without real accounts.
+const LOCAL_PROVIDER_LATENCY = parseInt(process.env.LOCAL_PROVIDER_LATENCY_MS) || 0
+const LOCAL_PROVIDER_FAILURE_RATE = parseFloat(process.env.LOCAL_PROVIDER_FAILURE_RATE) || 0
+
+const isSendGridConfigured = () => process.env.SENDGRID_API_KEY && process.env.SENDGRID_API_KEY !== 'your_sendgrid_api_key'
+const isCloudinaryConfigured = () => process.env.CLOUDINARY_CLOUD_NAME && process.env.CLOUDINARY_CLOUD_NAME !== 'your_cloud_name'
+const isPaystackConfigured = () => process.env.PAYSTACK_SECRET_KEY && process.env.PAYSTACK_SECRET_KEY !== 'your_paystack_secret_key'
+
+// A job failure that retrying cannot fix (bad input, declined payment)
+class PermanentJobError extends Error {}
+
+async function localProvider(name) {
+  if (LOCAL_PROVIDER_LATENCY > 0) await new Promise(resolve => setTimeout(resolve, LOCAL_PROVIDER_LATENCY))
+  if (Math.random() < LOCAL_PROVIDER_FAILURE_RATE) throw new Error(`${name} stand-in: simulated failure`)
+}
+
+// Throws on failure so the email job is retried
 async function sendEmail(to, subject, htmlContent) {
-  if (!process.env.SENDGRID_API_KEY || process.env.SENDGRID_API_KEY === 'your_sendgrid_api_key') {
+  if (!isSendGridConfigured()) {
+    await localProvider('SendGrid')
     console.log('SendGrid not configured. Email would be sent to:', to, 'Subject:', subject)
     return { success: true, mocked: true }
   }
 
-  try {
-    const msg = {
-      to,
-      from: {
-        email: process.env.SENDGRID_FROM_EMAIL || 'noreply@expertbridge.com',
-        name: process.env.SENDGRID_FROM_NAME || 'ExpertBridge'
+  const msg = {
+    to,
+    from: {
+      email: process.env.SENDGRID_FROM_EMAIL || 'noreply@expertbridge.com',
+      name: process.env.SENDGRID_FROM_NAME || 'ExpertBridge'
+    },
+    subject,
+    html: htmlContent
+  }
+  await sgMail.send(msg)
+  return { success: true }
+}
+
+// Send many { to, subject, html } messages in one SendGrid call
+async function sendEmails(messages) {
+  if (!isSendGridConfigured()) {
+    await localProvider('SendGrid')
+    console.log(`SendGrid not configured. ${messages.length} emails would be sent`)
+    return { success: true, sent: messages.length, mocked: true }
+  }
+
+  const from = {
+    email: process.env.SENDGRID_FROM_EMAIL || 'noreply@expertbridge.com',
+    name: process.env.SENDGRID_FROM_NAME || 'ExpertBridge'
+  }
+  await sgMail.send(messages.map(({ to, subject, html }) => ({ to, from, subject, html })))
+  return { success: true, sent: messages.length }
+}
+
+async function uploadProfilePhoto(professionalId, imageData) {
+  if (!isCloudinaryConfigured()) {
+    await localProvider('Cloudinary')
+    return {
+      url: `https://ui-avatars.com/api/?name=${encodeURIComponent(professionalId)}&background=3b82f6&color=fff&size=200`,
+      publicId: null,
+      mocked: true
+    }
+  }
+
+  const uploadResult = await cloudinary.uploader.upload(imageData, {
+    folder: 'expertbridge/profiles',
+    public_id: `profile_${professionalId}`,
+    overwrite: true,
+    transformation: [
+      { width: 400, height: 400, crop: 'fill', gravity: 'face' },
+      { quality: 'auto' }
+    ]
+  })
+  return { url: uploadResult.secure_url, publicId: uploadResult.public_id }
+}
+
+async function paystackRequest(path, body) {
+  if (!isPaystackConfigured()) {
+    await localProvider('Paystack')
+    if (body) {
+      return {
+        status: true,
+        data: { authorization_url: `${process.env.NEXT_PUBLIC_BASE_URL}?payment=mock&ref=${body.reference}`, reference: body.reference },
+        mocked: true
+      }
+    }
+    return { status: false, message: 'Paystack not configured' }
+  }
+
+  const response = await fetch(`https://api.paystack.co${path}`, {
+    method: body ? 'POST' : 'GET',
+    headers: {
+      'Authorization': `Bearer ${process.env.PAYSTACK_SECRET_KEY}`,
+      'Content-Type': 'application/json'
+    },
+    body: body ? JSON.stringify(body) : undefined
+  })
+  if (response.status >= 500 || response.status === 429) {
+    throw new Error(`Paystack responded ${response.status}`)
+  }
+  return response.json()
+}
+
+// ==================== JOB QUEUE ====================
+
+// Jobs are documents in the `jobs` collection, so they survive restarts and any instance can run
+// them. Workers claim a job by atomically flipping it to running with a lease (lockedUntil); a
+// worker that dies simply lets the lease expire. Failures are retried with exponential backoff.
+const JOB_CONCURRENCY = parseInt(process.env.JOB_CONCURRENCY) || 4
+const JOB_MAX_ATTEMPTS = 5
+const JOB_BACKOFF_BASE = 2000 // ms, doubled per attempt
+const JOB_BACKOFF_MAX = 10 * 60 * 1000
+const JOB_LEASE = 60 * 1000
+const PAYMENT_JOB_WAIT = 5000 // how long payment routes wait for their job before returning 202
+const JOB_RETENTION_DAYS = parseInt(process.env.JOB_RETENTION_DAYS) || 7 // finished jobs expire via TTL index
+const JOB_STATS_WINDOW = 24 * 60 * 60 * 1000 // finished jobs counted by /admin/jobs
+// Claimed highest first, then by runAt: a payment route is waiting on its job, so it must not
+// queue behind bulk email batches
+const JOB_PRIORITY = { paystack_initialize: 10, paystack_verify: 10, profile_photo: 5 }
+let activeJobWorkers = 0
+const jobWaiters = new Map()
+
+const JOB_HANDLERS = {
+  async email(db, { to, subject, html }) {
+    return sendEmail(to, subject, html)
+  },
+
+  async email_batch(db, { messages }) {
+    return sendEmails(messages)
+  },
+
+  async profile_photo(db, { professionalId, imageData }) {
+    const photo = await uploadProfilePhoto(professionalId, imageData)
+    await db.collection('professionals').updateOne(
+      { id: professionalId },
+      { $set: { profilePhoto: { url: photo.url, publicId: photo.publicId }, updatedAt: new Date() } }
+    )
+    invalidateResponses('professionals')
+    invalidateSessionUsers(professionalId)
+    return photo
+  },
+
+  // The reference is derived from the job id, so a retried job never opens a second transaction:
+  // an earlier attempt's authorization URL is reused, and Paystack rejects a duplicate reference
+  async paystack_initialize(db, { professionalId, email, planId }, job) {
+    const plan = SUBSCRIPTION_PLANS[planId]
+    const reference = `${isPaystackConfigured() ? 'sub' : 'mock'}_${job.id}`
+    const existing = await db.collection('subscriptions').findOne({ reference })
+    if (existing?.authorizationUrl) {
+      return { authorization_url: existing.authorizationUrl, reference, mocked: reference.startsWith('mock_') }
+    }
+    const data = await paystackRequest('/transaction/initialize', {
+      email,
+      amount: plan.amount,
+      reference,
+      callback_url: `${process.env.NEXT_PUBLIC_BASE_URL}/api/subscriptions/verify?reference=${reference}`,
+      metadata: {
+        professional_id: professionalId,
+        plan_id: planId,
+        plan_name: plan.name
+      }
+    })
+    if (!data.status) {
+      throw new PermanentJobError(data.message || 'Payment initialization failed')
+    }
+
+    // Store pending subscription
+    await db.collection('subscriptions').updateOne(
+      { reference },
+      {
+        $setOnInsert: {
+          id: uuidv4(),
+          professionalId,
+          planId,
+          reference,
+          amount: plan.amount,
+          status: 'pending',
+          createdAt: new Date()
+        },
+        $set: { authorizationUrl: data.data.authorization_url }
       },
-      subject,
-      html: htmlContent
+      { upsert: true }
+    )
+
+    return { authorization_url: data.data.authorization_url, reference: data.data.reference, mocked: !!data.mocked }
+  },
+
+  async paystack_verify(db, { reference }) {
+    const data = await paystackRequest(`/transaction/verify/${reference}`)
+    if (!data.status) {
+      throw new PermanentJobError(data.message || 'Payment verification failed')
+    }
+    if (data.data.status !== 'success') {
+      throw new PermanentJobError('Payment verification failed')
+    }
+
+    const { professional_id, plan_id } = data.data.metadata
+    const plan = SUBSCRIPTION_PLANS[plan_id]
+    if (!plan) {
+      throw new PermanentJobError('Invalid plan')
+    }
+
+    const startDate = new Date()
+    const endDate = new Date(startDate.getTime() + plan.duration * 24 * 60 * 60 * 1000)
+
+    // Update professional's subscription and featured status
+    await db.collection('professionals').updateOne(
+      { id: professional_id },
+      {
+        $set: {
+          'subscription.plan': plan_id,
+          'subscription.status': 'active',
+          'subscription.startDate': startDate,
+          'subscription.endDate': endDate,
+          'subscription.paystackRef': reference,
+          'featured.isFeatured': true,
+          'featured.featuredUntil': endDate,
+          'featured.featuredTier': plan_id,
+          updatedAt: new Date()
+        }
+      }
+    )
+
+    // Update subscription record
+    const completed = await db.collection('subscriptions').updateOne(
+      { reference, status: { $ne: 'completed' } },
+      {
+        $set: {
+          status: 'completed',
+          completedAt: new Date()
+        }
+      }
+    )
+    if (completed.modifiedCount === 1) {
+      await incrementStats(db, { 'subscriptions.completed': 1 })
+    }
+    invalidateResponses('professionals')
+    invalidateSessionUsers(professional_id)
+
+    const professional = await db.collection('professionals').findOne({ id: professional_id })
+    if (professional) {
+      await queueEmail(db, professional.email, 'Subscription Activated - ExpertBridge', getSubscriptionEmailTemplate(professional.fullName, plan, endDate))
     }
-    await sgMail.send(msg)
-    return { success: true }
+
+    return { plan: plan_id, startDate, endDate }
+  }
+}
+
+async function enqueueJob(db, type, payload, { ownerId = null, maxAttempts = JOB_MAX_ATTEMPTS } = {}) {
+  const now = new Date()
+  const job = {
+    id: uuidv4(),
+    type,
+    payload,
+    ownerId,
+    priority: JOB_PRIORITY[type] || 0,
+    status: 'queued',
+    attempts: 0,
+    maxAttempts,
+    runAt: now,
+    lockedUntil: null,
+    lastError: null,
+    result: null,
+    createdAt: now,
+    updatedAt: now
+  }
+  await db.collection('jobs').insertOne(job)
+  runJobs(db)
+  return job
+}
+
+function queueEmail(db, to, subject, html) {
+  return enqueueJob(db, 'email', { to, subject, html })
+}
+
+const EMAIL_BATCH_SIZE = 100
+
+async function queueEmailBatch(db, messages) {
+  for (let i = 0; i < messages.length; i += EMAIL_BATCH_SIZE) {
+    await enqueueJob(db, 'email_batch', { messages: messages.slice(i, i + EMAIL_BATCH_SIZE) })
+  }
+}
+
+// Start workers up to JOB_CONCURRENCY; each drains claimable jobs and exits
+function runJobs(db) {
+  while (activeJobWorkers < JOB_CONCURRENCY) {
+    activeJobWorkers++
+    detached(() => jobWorker(db))
+      .catch(error => console.error('Job worker error:', error))
+      .finally(() => { activeJobWorkers-- })
+  }
+}
+
+async function jobWorker(db) {
+  for (;;) {
+    const now = new Date()
+    const job = await db.collection('jobs').findOneAndUpdate(
+      {
+        $or: [
+          { status: 'queued', runAt: { $lte: now } },
+          { status: 'running', lockedUntil: { $lt: now } }
+        ]
+      },
+      {
+        $set: { status: 'running', lockedUntil: new Date(now.getTime() + JOB_LEASE), updatedAt: now },
+        $inc: { attempts: 1 }
+      },
+      { sort: { priority: -1, runAt: 1 }, returnDocument: 'after' }
+    )
+    if (!job) return
+    await runJob(db, job)
+  }
+}
+
+async function runJob(db, job) {
+  const handler = JOB_HANDLERS[job.type]
+  // Renew the lease while the handler runs, so a slow upload or batch send is not claimed and
+  // run a second time by another worker
+  const heartbeat = setInterval(() => {
+    db.collection('jobs').updateOne(
+      { id: job.id, status: 'running', attempts: job.attempts },
+      { $set: { lockedUntil: new Date(Date.now() + JOB_LEASE) } }
+    ).catch(error => console.error(`Job ${job.id} lease renewal error:`, error))
+  }, JOB_LEASE / 3)
+  let update
+  try {
+    if (!handler) throw new PermanentJobError(`Unknown job type ${job.type}`)
+    const result = await timePhase(`job-${job.type}`, () => handler(db, job.payload, job))
+    update = { status: 'done', result, lastError: null }
   } catch (error) {
-    console.error('SendGrid Error:', error)
-    return { success: false, error: error.message }
+    const permanent = error instanceof PermanentJobError || job.attempts >= job.maxAttempts
+    if (!permanent) console.error(`Job ${job.type} ${job.id} failed (attempt ${job.attempts}):`, error.message)
+    const backoff = Math.min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (job.attempts - 1))
+    update = {
+      status: permanent ? 'failed' : 'queued',
+      runAt: new Date(Date.now() + backoff * (0.5 + Math.random() / 2)),
+      lastError: error.message
+    }
+  } finally {
+    clearInterval(heartbeat)
   }
+
+  // Matching on attempts leaves the job alone if our lease lapsed and another worker claimed it
+  const finished = update.status !== 'queued'
+  const now = new Date()
+  await db.collection('jobs').updateOne(
+    { id: job.id, attempts: job.attempts },
+    {
+      $set: { ...update, lockedUntil: null, updatedAt: now, ...(finished && { finishedAt: now }) },
+      // Payloads (upload bodies, recipient lists) are dropped once the job no longer needs them
+      ...(finished && { $unset: { payload: '' } })
+    }
+  )
+
+  if (finished && jobWaiters.has(job.id)) {
+    for (const resolve of jobWaiters.get(job.id)) resolve({ ...job, ...update })
+    jobWaiters.delete(job.id)
+  }
+}
+
+// Resolve with the finished job if it completes within `timeout` ms, else null. Completion in
+// this process wakes the waiter directly; a job that already finished is read back once.
+function waitForJob(db, jobId, timeout) {
+  return new Promise(resolve => {
+    const waiters = jobWaiters.get(jobId) || []
+    jobWaiters.set(jobId, waiters)
+    const timer = setTimeout(() => {
+      const remaining = (jobWaiters.get(jobId) || []).filter(w => w !== done)
+      if (remaining.length) jobWaiters.set(jobId, remaining)
+      else jobWaiters.delete(jobId)
+      resolve(null)
+    }, timeout)
+    function done(job) {
+      clearTimeout(timer)
+      resolve(job)
+    }
+    waiters.push(done)
+
+    db.collection('jobs').findOne({ id: jobId }).then(job => {
+      if (job && (job.status === 'done' || job.status === 'failed') && jobWaiters.has(jobId)) {
+        jobWaiters.delete(jobId)
+        for (const resolveWaiter of waiters) resolveWaiter(job)
+      }
+    }).catch(() => {})
+  })
+}
+
+function jobView(job) {
+  const { _id, payload, ...view } = job
+  return view
 }
 
 // Email Templates
@@ -290,6 +2138,16 @@ async function handleRoute(request, { params }) {
       return handleCORS(NextResponse.json({ message: 'ExpertBridge API v1.0', categories: CATEGORIES }))
     }
 
+    // Prometheus scrape endpoint; requires "Bearer <METRICS_TOKEN>" when that env var is set
+    if (route === '/metrics' && method === 'GET') {
+      if (METRICS_TOKEN && request.headers.get('Authorization') !== `Bearer ${METRICS_TOKEN}`) {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+      return handleCORS(new NextResponse(renderMetrics(), {
+        headers: { 'Content-Type': 'text/plain; version=0.0.4; charset=utf-8' }
+      }))
+    }
+
     // ==================== AUTH ROUTES ====================
     
     // Professional Registration
@@ -307,7 +2165,7 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Email already registered' }, { status: 400 }))
       }
 
-      const hashedPassword = await bcrypt.hash(password, 10)
+      const hashedPassword = await hashPassword(password)
       const professionalId = uuidv4()
 
       const professional = {
@@ -319,7 +2177,7 @@ async function handleRoute(request, { params }) {
         category,
         subcategory: subcategory || '',
         bio,
-        experience: parseInt(experience),
+        experience: parseInt(experience) || 0,
         location: {
           country: location.country || '',
           state: location.state || '',
@@ -363,20 +2221,20 @@ async function handleRoute(request, { params }) {
           contactClicks: 0,
           lastViewedAt: null
         },
-        ratings: {
-          average: 0,
-          count: 0
-        },
+        ratings: { ...EMPTY_RATINGS, histogram: { ...EMPTY_RATINGS.histogram } },
         isActive: true,
         isEmailVerified: false,
         createdAt: new Date(),
         updatedAt: new Date()
       }
+      professional.search = buildSearchFields(professional)
 
       await db.collection('professionals').insertOne(professional)
+      await updateProfessionalStats(db, null, professional)
 
       // Send welcome email
-      await sendEmail(
+      await queueEmail(
+        db,
         professional.email,
         'Welcome to ExpertBridge!',
         getWelcomeEmailTemplate(professional.fullName)
@@ -384,7 +2242,7 @@ async function handleRoute(request, { params }) {
 
       const token = jwt.sign({ id: professionalId, email: professional.email, role: 'professional' }, JWT_SECRET, { expiresIn: '7d' })
 
-      const { password: _, ...safeData } = professional
+      const { password: _, search: __, ...safeData } = professional
       return handleCORS(NextResponse.json({ message: 'Registration successful', token, professional: safeData }))
     }
 
@@ -402,14 +2260,17 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Invalid credentials' }, { status: 401 }))
       }
 
-      const isMatch = await bcrypt.compare(password, professional.password)
+      const isMatch = await verifyPassword(password, professional.password)
       if (!isMatch) {
         return handleCORS(NextResponse.json({ error: 'Invalid credentials' }, { status: 401 }))
       }
+      if (needsRehash(professional.password)) {
+        upgradePasswordHash(db, 'professionals', professional.id, password, professional.password)
+      }
 
       const token = jwt.sign({ id: professional.id, email: professional.email, role: 'professional' }, JWT_SECRET, { expiresIn: '7d' })
 
-      const { password: _, ...safeData } = professional
+      const { password: _, search: __, ...safeData } = professional
       return handleCORS(NextResponse.json({ message: 'Login successful', token, professional: safeData }))
     }
 
@@ -427,7 +2288,7 @@ async function handleRoute(request, { params }) {
         // Create default admin if not exists
         if (email === 'admin@expertbridge.com' && password === 'admin123') {
           const adminId = uuidv4()
-          const hashedPassword = await bcrypt.hash('admin123', 10)
+          const hashedPassword = await hashPassword('admin123')
           const newAdmin = {
             id: adminId,
             email: 'admin@expertbridge.com',
@@ -444,10 +2305,13 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Invalid credentials' }, { status: 401 }))
       }
 
-      const isMatch = await bcrypt.compare(password, admin.password)
+      const isMatch = await verifyPassword(password, admin.password)
       if (!isMatch) {
         return handleCORS(NextResponse.json({ error: 'Invalid credentials' }, { status: 401 }))
       }
+      if (needsRehash(admin.password)) {
+        upgradePasswordHash(db, 'admins', admin.id, password, admin.password)
+      }
 
       const token = jwt.sign({ id: admin.id, email: admin.email, role: 'admin' }, JWT_SECRET, { expiresIn: '7d' })
       return handleCORS(NextResponse.json({ message: 'Login successful', token, admin: { id: admin.id, email: admin.email, fullName: admin.fullName, role: admin.role } }))
@@ -455,28 +2319,20 @@ async function handleRoute(request, { params }) {
 
     // Get current user
     if (route === '/auth/me' && method === 'GET') {
-      const user = verifyToken(request)
-      if (!user) {
+      const session = verifySession(request)
+      if (!session) {
         return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
       }
 
-      if (user.role === 'professional') {
-        const professional = await db.collection('professionals').findOne({ id: user.id })
-        if (!professional) {
-          return handleCORS(NextResponse.json({ error: 'User not found' }, { status: 404 }))
-        }
-        const { password: _, ...safeData } = professional
-        return handleCORS(NextResponse.json({ user: safeData, role: 'professional' }))
-      } else if (user.role === 'admin') {
-        const admin = await db.collection('admins').findOne({ id: user.id })
-        if (!admin) {
-          return handleCORS(NextResponse.json({ error: 'User not found' }, { status: 404 }))
-        }
-        const { password: _, ...safeData } = admin
-        return handleCORS(NextResponse.json({ user: safeData, role: 'admin' }))
+      const { role } = session.claims
+      if (role !== 'professional' && role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Invalid user role' }, { status: 400 }))
       }
-
-      return handleCORS(NextResponse.json({ error: 'Invalid user role' }, { status: 400 }))
+      const account = await sessionUser(db, session)
+      if (!account) {
+        return handleCORS(NextResponse.json({ error: 'User not found' }, { status: 404 }))
+      }
+      return handleCORS(NextResponse.json({ user: account, role }))
     }
 
     // ==================== PROFESSIONAL ROUTES ====================
@@ -487,6 +2343,8 @@ async function handleRoute(request, { params }) {
       const page = parseInt(url.searchParams.get('page')) || 1
       const limit = parseInt(url.searchParams.get('limit')) || 12
       const featured = url.searchParams.get('featured') === 'true'
+      const cursor = parseCursor(url, LISTING_SORT)
+      const { projection, error } = listProjection(url, LISTING_SORT)
 
       const query = { 'verification.status': 'approved', isActive: true }
       if (featured) {
@@ -494,44 +2352,73 @@ async function handleRoute(request, { params }) {
         query['featured.featuredUntil'] = { $gt: new Date() }
       }
 
-      const total = await db.collection('professionals').countDocuments(query)
-      const professionals = await db.collection('professionals')
-        .find(query)
-        .project({ password: 0 })
-        .sort({ 'featured.isFeatured': -1, 'ratings.average': -1, createdAt: -1 })
-        .skip((page - 1) * limit)
-        .limit(limit)
-        .toArray()
+      if (cursor?.invalid) {
+        return handleCORS(NextResponse.json({ error: 'Invalid cursor' }, { status: 400 }))
+      }
+      if (error) {
+        return handleCORS(NextResponse.json({ error, allowed: LIST_FIELDS }, { status: 400 }))
+      }
 
-      return handleCORS(NextResponse.json({
-        professionals,
-        pagination: {
-          page,
-          limit,
-          total,
-          pages: Math.ceil(total / limit)
+      const cacheable = cursor ? !cursor.values : page <= RESPONSE_CACHE_PAGES
+      return cachedJSON(request, cacheable ? responseCacheKey(route, url) : null, { tags: ['professionals'] }, async () => {
+        if (cursor) {
+          const docs = await db.collection('professionals')
+            .find(cursor.values ? { $and: [query, keysetFilter(LISTING_SORT, cursor.values)] } : query)
+            .project(projection)
+            .sort(sortSpec(LISTING_SORT))
+            .limit(limit + 1)
+            .toArray()
+          const { items, pagination } = cursorPage(docs, limit, LISTING_SORT)
+          if (url.searchParams.get('withTotal') === 'true') {
+            pagination.total = await cachedCount(db.collection('professionals'), query, `professionals:${featured}`)
+          }
+          return { professionals: items, pagination }
         }
-      }))
+
+        const total = await db.collection('professionals').countDocuments(query)
+        const professionals = await db.collection('professionals')
+          .find(query)
+          .project(projection)
+          .sort(sortSpec(LISTING_SORT))
+          .skip((page - 1) * limit)
+          .limit(limit)
+          .toArray()
+
+        return {
+          professionals,
+          pagination: {
+            page,
+            limit,
+            total,
+            pages: Math.ceil(total / limit)
+          }
+        }
+      })
     }
 
     // Get featured professionals only
     if (route === '/professionals/featured' && method === 'GET') {
       const url = new URL(request.url)
       const limit = parseInt(url.searchParams.get('limit')) || 6
+      const { projection, error } = listProjection(url, FEATURED_SORT)
+      if (error) {
+        return handleCORS(NextResponse.json({ error, allowed: LIST_FIELDS }, { status: 400 }))
+      }
 
-      const professionals = await db.collection('professionals')
-        .find({
-          'verification.status': 'approved',
-          isActive: true,
-          'featured.isFeatured': true,
-          'featured.featuredUntil': { $gt: new Date() }
-        })
-        .project({ password: 0 })
-        .sort({ 'ratings.average': -1, createdAt: -1 })
-        .limit(limit)
-        .toArray()
-
-      return handleCORS(NextResponse.json({ professionals }))
+      return cachedJSON(request, responseCacheKey(route, url), { tags: ['professionals'] }, async () => {
+        const professionals = await db.collection('professionals')
+          .find({
+            'verification.status': 'approved',
+            isActive: true,
+            'featured.isFeatured': true,
+            'featured.featuredUntil': { $gt: new Date() }
+          })
+          .project(projection)
+          .sort(sortSpec(FEATURED_SORT))
+          .limit(limit)
+          .toArray()
+        return { professionals }
+      })
     }
 
     // Get single professional (public)
@@ -543,11 +2430,8 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Professional not found' }, { status: 404 }))
       }
 
-      // Increment view count
-      await db.collection('professionals').updateOne(
-        { id: professionalId },
-        { $inc: { 'analytics.profileViews': 1 }, $set: { 'analytics.lastViewedAt': new Date() } }
-      )
+      // Count the view (buffered, flushed in batches)
+      recordAnalytics(db, professionalId, 'views')
 
       // Get reviews
       const reviews = await db.collection('reviews')
@@ -556,7 +2440,7 @@ async function handleRoute(request, { params }) {
         .limit(10)
         .toArray()
 
-      const { password: _, ...safeData } = professional
+      const { password: _, search: __, ...safeData } = professional
       return handleCORS(NextResponse.json({ professional: safeData, reviews }))
     }
 
@@ -584,16 +2468,30 @@ async function handleRoute(request, { params }) {
       if (category) updateData.category = category
       if (subcategory !== undefined) updateData.subcategory = subcategory
       if (bio) updateData.bio = bio
-      if (experience) updateData.experience = parseInt(experience)
+      if (experience) updateData.experience = parseInt(experience) || 0
       if (location) updateData.location = location
       if (serviceOptions) updateData.serviceOptions = serviceOptions
       if (languages) updateData.languages = languages
       if (socialLinks) updateData.socialLinks = socialLinks
       if (profilePhoto) updateData.profilePhoto = profilePhoto
 
-      await db.collection('professionals').updateOne({ id: professionalId }, { $set: updateData })
+      if (fullName || category || subcategory !== undefined || bio || location || serviceOptions) {
+        const existing = await db.collection('professionals').findOne({ id: professionalId }, { projection: { fullName: 1, category: 1, subcategory: 1, bio: 1, location: 1, serviceOptions: 1 } })
+        updateData.search = buildSearchFields({ ...existing, ...updateData })
+      }
+
+      const previous = await db.collection('professionals').findOneAndUpdate(
+        { id: professionalId },
+        { $set: updateData },
+        { projection: { category: 1, verification: 1, isActive: 1 } }
+      )
+      if (previous && category && category !== previous.category) {
+        await updateProfessionalStats(db, previous, { ...previous, category })
+      }
+      invalidateResponses('professionals', 'categories')
+      invalidateSessionUsers(professionalId)
 
-      const updated = await db.collection('professionals').findOne({ id: professionalId })
+      const updated = await db.collection('professionals').findOne({ id: professionalId }, { projection: { search: 0 } })
       const { password: _, ...safeData } = updated
       return handleCORS(NextResponse.json({ message: 'Profile updated', professional: safeData }))
     }
@@ -601,13 +2499,32 @@ async function handleRoute(request, { params }) {
     // Track contact click
     if (route.match(/^\/professionals\/[^/]+\/contact$/) && method === 'POST') {
       const professionalId = path[1]
-      await db.collection('professionals').updateOne(
-        { id: professionalId },
-        { $inc: { 'analytics.contactClicks': 1 } }
-      )
+      recordAnalytics(db, professionalId, 'contacts')
       return handleCORS(NextResponse.json({ message: 'Contact click tracked' }))
     }
 
+    // Daily view/contact series for a professional (owner or admin)
+    if (route.match(/^\/professionals\/[^/]+\/analytics$/) && method === 'GET') {
+      const user = verifyToken(request)
+      const professionalId = path[1]
+      if (!user || (user.role !== 'admin' && user.id !== professionalId)) {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const url = new URL(request.url)
+      const days = Math.max(1, Math.min(365, parseInt(url.searchParams.get('days')) || 30))
+      const since = new Date(Date.now() - (days - 1) * 24 * 60 * 60 * 1000).toISOString().slice(0, 10)
+
+      const buckets = await db.collection('analytics_daily')
+        .find({ professionalId, day: { $gte: since } })
+        .project({ _id: 0, day: 1, views: 1, contacts: 1 })
+        .sort({ day: 1 })
+        .toArray()
+
+      const totals = buckets.reduce((acc, b) => ({ views: acc.views + b.views, contacts: acc.contacts + b.contacts }), { views: 0, contacts: 0 })
+      return handleCORS(NextResponse.json({ professionalId, days, since, totals, series: buckets }))
+    }
+
     // ==================== UPLOAD ROUTES ====================
 
     // Upload profile photo
@@ -624,52 +2541,13 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'No image data provided' }, { status: 400 }))
       }
 
-      // Check if Cloudinary is configured
-      if (!process.env.CLOUDINARY_CLOUD_NAME || process.env.CLOUDINARY_CLOUD_NAME === 'your_cloud_name') {
-        // Return a mock response if Cloudinary is not configured
-        return handleCORS(NextResponse.json({ 
-          message: 'Cloudinary not configured. Image upload simulated.',
-          url: `https://ui-avatars.com/api/?name=${encodeURIComponent(user.email)}&background=3b82f6&color=fff&size=200`,
-          publicId: null,
-          mocked: true
-        }))
-      }
-
-      try {
-        // Upload to Cloudinary
-        const uploadResult = await cloudinary.uploader.upload(imageData, {
-          folder: 'expertbridge/profiles',
-          public_id: `profile_${user.id}`,
-          overwrite: true,
-          transformation: [
-            { width: 400, height: 400, crop: 'fill', gravity: 'face' },
-            { quality: 'auto' }
-          ]
-        })
-
-        // Update professional's profile photo
-        await db.collection('professionals').updateOne(
-          { id: user.id },
-          {
-            $set: {
-              profilePhoto: {
-                url: uploadResult.secure_url,
-                publicId: uploadResult.public_id
-              },
-              updatedAt: new Date()
-            }
-          }
-        )
-
-        return handleCORS(NextResponse.json({
-          message: 'Profile photo updated',
-          url: uploadResult.secure_url,
-          publicId: uploadResult.public_id
-        }))
-      } catch (error) {
-        console.error('Cloudinary upload error:', error)
-        return handleCORS(NextResponse.json({ error: 'Failed to upload image' }, { status: 500 }))
-      }
+      // The Cloudinary upload and profile update run as a job; poll /jobs/:id for the result
+      const job = await enqueueJob(db, 'profile_photo', { professionalId: user.id, imageData }, { ownerId: user.id })
+      return handleCORS(NextResponse.json({
+        message: 'Profile photo upload queued',
+        jobId: job.id,
+        status: job.status
+      }, { status: 202 }))
     }
 
     // ==================== SEARCH ROUTES ====================
@@ -686,41 +2564,110 @@ async function handleRoute(request, { params }) {
       const page = parseInt(url.searchParams.get('page')) || 1
       const limit = parseInt(url.searchParams.get('limit')) || 12
       const sortBy = url.searchParams.get('sortBy') || 'relevance' // relevance, rating, experience
+      // "Near me": ?near=<place> or ?lat=&lng=, within ?withinKm= (results ordered by distance)
+      const origin = geoOrigin(url)
+      if (origin?.error) {
+        return handleCORS(NextResponse.json({ error: origin.error }, { status: 400 }))
+      }
+      const withinKm = origin?.withinKm
 
       const query = { 'verification.status': 'approved', isActive: true }
+      const terms = keyword ? searchTerms(keyword) : []
 
+      // Normalized, anchored matches are served by the search_location / search_tokens indexes
       if (category) query.category = category
-      if (country) query['location.country'] = { $regex: country, $options: 'i' }
-      if (city) query['location.city'] = { $regex: city, $options: 'i' }
-      if (keyword) {
-        query.$or = [
-          { fullName: { $regex: keyword, $options: 'i' } },
-          { bio: { $regex: keyword, $options: 'i' } },
-          { subcategory: { $regex: keyword, $options: 'i' } }
-        ]
-      }
+      if (country) query['search.country'] = { $regex: `^${escapeRegex(normalizeText(country))}` }
+      if (city) query['search.city'] = { $regex: `^${escapeRegex(normalizeText(city))}` }
+      if (terms.length) query['search.tokens'] = { $all: terms }
       if (serviceType === 'virtual') query['serviceOptions.virtual'] = true
       if (serviceType === 'inPerson') query['serviceOptions.inPerson'] = true
       if (minExperience > 0) query.experience = { $gte: minExperience }
       if (minRating > 0) query['ratings.average'] = { $gte: minRating }
 
-      let sortOptions = { 'featured.isFeatured': -1 }
-      if (sortBy === 'rating') sortOptions['ratings.average'] = -1
-      else if (sortBy === 'experience') sortOptions.experience = -1
-      else sortOptions['ratings.average'] = -1
+      let sortFields = [['featured.isFeatured', -1]]
+      if (origin) sortFields = GEO_SORT
+      else if (sortBy === 'rating') sortFields.push(['ratings.average', -1])
+      else if (sortBy === 'experience') sortFields.push(['experience', -1])
+      else if (terms.length) sortFields.push(['relevance', -1], ['ratings.average', -1])
+      else sortFields.push(['ratings.average', -1])
+      if (!origin) sortFields.push(['createdAt', -1], ['id', -1])
+      const byRelevance = sortFields.some(([field]) => field === 'relevance')
+
+      const cursor = parseCursor(url, sortFields)
+      if (cursor?.invalid) {
+        return handleCORS(NextResponse.json({ error: 'Invalid cursor' }, { status: 400 }))
+      }
+      const { projection, error } = listProjection(url, sortFields)
+      if (error) {
+        return handleCORS(NextResponse.json({ error, allowed: LIST_FIELDS }, { status: 400 }))
+      }
 
-      const total = await db.collection('professionals').countDocuments(query)
-      const professionals = await db.collection('professionals')
-        .find(query)
-        .project({ password: 0 })
-        .sort(sortOptions)
-        .skip((page - 1) * limit)
-        .limit(limit)
-        .toArray()
+      const matchStages = origin ? geoStages(origin.point, withinKm, query) : [{ $match: query }]
+      const pipeline = []
+      if (byRelevance) {
+        // Name/subcategory/category hits weigh three times a bio-only hit
+        pipeline.push({
+          $addFields: {
+            relevance: {
+              $add: [
+                { $size: { $setIntersection: ['$search.tokens', terms] } },
+                { $multiply: [2, { $size: { $setIntersection: ['$search.nameTokens', terms] } }] }
+              ]
+            }
+          }
+        })
+      }
+      if (cursor?.values) pipeline.push({ $match: keysetFilter(sortFields, cursor.values) })
+      pipeline.push({ $sort: sortSpec(sortFields) })
+      if (cursor) pipeline.push({ $limit: limit + 1 })
+      else pipeline.push({ $skip: (page - 1) * limit }, { $limit: limit })
+      pipeline.push({ $project: projection })
+
+      const filters = { category, country, city, keyword, serviceType, minExperience, minRating }
+      if (origin) Object.assign(filters, { near: url.searchParams.get('near'), origin: origin.point, withinKm })
+
+      // ?facets=true: page, total and facet counts all come from one match in a single $facet
+      if (url.searchParams.get('facets') === 'true') {
+        const [result] = await db.collection('professionals').aggregate([
+          ...matchStages,
+          { $facet: { professionals: pipeline, total: [{ $count: 'total' }], ...SEARCH_FACETS } }
+        ], { allowDiskUse: true }).toArray()
+        const total = result.total[0]?.total || 0
+        const facets = formatFacets(result)
+        if (cursor) {
+          const { items, pagination } = cursorPage(result.professionals, limit, sortFields)
+          return handleCORS(NextResponse.json({ professionals: items, filters, facets, pagination: { ...pagination, total } }))
+        }
+        return handleCORS(NextResponse.json({
+          professionals: result.professionals,
+          filters,
+          facets,
+          pagination: { page, limit, total, pages: Math.ceil(total / limit) }
+        }))
+      }
+
+      const professionals = await db.collection('professionals').aggregate([...matchStages, ...pipeline]).toArray()
+      const geoCount = async () => {
+        const [row] = await db.collection('professionals')
+          .aggregate([...geoStages(origin.point, withinKm, query), { $count: 'total' }]).toArray()
+        return row?.total || 0
+      }
+
+      if (cursor) {
+        const { items, pagination } = cursorPage(professionals, limit, sortFields)
+        if (url.searchParams.get('withTotal') === 'true') {
+          pagination.total = origin
+            ? await geoCount()
+            : await cachedCount(db.collection('professionals'), query, `search:${JSON.stringify(filters)}`)
+        }
+        return handleCORS(NextResponse.json({ professionals: items, filters, pagination }))
+      }
+
+      const total = origin ? await geoCount() : await db.collection('professionals').countDocuments(query)
 
       return handleCORS(NextResponse.json({
         professionals,
-        filters: { category, country, city, keyword, serviceType, minExperience, minRating },
+        filters,
         pagination: { page, limit, total, pages: Math.ceil(total / limit) }
       }))
     }
@@ -736,13 +2683,17 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Missing required fields' }, { status: 400 }))
       }
 
+      // Whole stars only: anything else would poison the rating sum and histogram in applyRating
+      const reviewRating = typeof rating === 'number' || typeof rating === 'string' ? Number(rating) : NaN
+      if (!Number.isInteger(reviewRating) || reviewRating < 1 || reviewRating > 5) {
+        return handleCORS(NextResponse.json({ error: 'Rating must be an integer from 1 to 5' }, { status: 400 }))
+      }
+
       const professional = await db.collection('professionals').findOne({ id: professionalId })
       if (!professional) {
         return handleCORS(NextResponse.json({ error: 'Professional not found' }, { status: 404 }))
       }
 
-      const reviewRating = Math.min(5, Math.max(1, parseInt(rating)))
-      
       const review = {
         id: uuidv4(),
         professionalId,
@@ -756,19 +2707,11 @@ async function handleRoute(request, { params }) {
       }
 
       await db.collection('reviews').insertOne(review)
+      await incrementStats(db, { 'reviews.total': 1 })
 
-      // Update professional's average rating immediately
-      const allApprovedReviews = await db.collection('reviews')
-        .find({ professionalId, status: 'approved' })
-        .toArray()
-
-      if (allApprovedReviews.length > 0) {
-        const avgRating = allApprovedReviews.reduce((sum, r) => sum + r.rating, 0) / allApprovedReviews.length
-        await db.collection('professionals').updateOne(
-          { id: professionalId },
-          { $set: { 'ratings.average': Math.round(avgRating * 10) / 10, 'ratings.count': allApprovedReviews.length } }
-        )
-      }
+      // Update professional's rating aggregate immediately
+      await applyRating(db, professionalId, reviewRating)
+      invalidateResponses('professionals')
 
       return handleCORS(NextResponse.json({ message: 'Review submitted successfully', review }))
     }
@@ -787,7 +2730,7 @@ async function handleRoute(request, { params }) {
 
     // Get subscription plans
     if (route === '/subscriptions/plans' && method === 'GET') {
-      return handleCORS(NextResponse.json({ plans: SUBSCRIPTION_PLANS }))
+      return cachedJSON(request, route, { tags: ['plans'], maxAge: 3600 }, () => ({ plans: SUBSCRIPTION_PLANS }))
     }
 
     // Initialize Paystack payment
@@ -810,65 +2753,21 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Professional not found' }, { status: 404 }))
       }
 
-      // Check if Paystack is configured
-      if (!process.env.PAYSTACK_SECRET_KEY || process.env.PAYSTACK_SECRET_KEY === 'your_paystack_secret_key') {
-        // Return mock response for testing
-        const mockRef = `mock_${uuidv4()}`
-        return handleCORS(NextResponse.json({
-          message: 'Paystack not configured. Payment simulated.',
-          authorization_url: `${process.env.NEXT_PUBLIC_BASE_URL}?payment=mock&ref=${mockRef}`,
-          reference: mockRef,
-          mocked: true
-        }))
+      // The client needs the authorization URL, so wait briefly for the job before handing back its id
+      const job = await enqueueJob(db, 'paystack_initialize', { professionalId: user.id, email: professional.email, planId }, { ownerId: user.id })
+      const finished = await timePhase('job-wait', () => waitForJob(db, job.id, PAYMENT_JOB_WAIT))
+      if (!finished) {
+        return handleCORS(NextResponse.json({ message: 'Payment initialization queued', jobId: job.id, status: 'queued' }, { status: 202 }))
       }
-
-      // Initialize Paystack transaction
-      try {
-        const reference = `sub_${uuidv4()}`
-        const response = await fetch('https://api.paystack.co/transaction/initialize', {
-          method: 'POST',
-          headers: {
-            'Authorization': `Bearer ${process.env.PAYSTACK_SECRET_KEY}`,
-            'Content-Type': 'application/json'
-          },
-          body: JSON.stringify({
-            email: professional.email,
-            amount: plan.amount,
-            reference,
-            callback_url: `${process.env.NEXT_PUBLIC_BASE_URL}/api/subscriptions/verify?reference=${reference}`,
-            metadata: {
-              professional_id: user.id,
-              plan_id: planId,
-              plan_name: plan.name
-            }
-          })
-        })
-
-        const data = await response.json()
-
-        if (!data.status) {
-          return handleCORS(NextResponse.json({ error: data.message || 'Payment initialization failed' }, { status: 400 }))
-        }
-
-        // Store pending subscription
-        await db.collection('subscriptions').insertOne({
-          id: uuidv4(),
-          professionalId: user.id,
-          planId,
-          reference,
-          amount: plan.amount,
-          status: 'pending',
-          createdAt: new Date()
-        })
-
-        return handleCORS(NextResponse.json({
-          authorization_url: data.data.authorization_url,
-          reference: data.data.reference
-        }))
-      } catch (error) {
-        console.error('Paystack error:', error)
-        return handleCORS(NextResponse.json({ error: 'Payment initialization failed' }, { status: 500 }))
+      if (finished.status === 'failed') {
+        return handleCORS(NextResponse.json({ error: finished.lastError || 'Payment initialization failed' }, { status: 400 }))
       }
+      return handleCORS(NextResponse.json({
+        ...(finished.result.mocked && { message: 'Paystack not configured. Payment simulated.', mocked: true }),
+        authorization_url: finished.result.authorization_url,
+        reference: finished.result.reference,
+        jobId: job.id
+      }))
     }
 
     // Verify Paystack payment
@@ -888,85 +2787,31 @@ async function handleRoute(request, { params }) {
         }))
       }
 
-      // Check if Paystack is configured
-      if (!process.env.PAYSTACK_SECRET_KEY || process.env.PAYSTACK_SECRET_KEY === 'your_paystack_secret_key') {
-        return handleCORS(NextResponse.json({ error: 'Paystack not configured' }, { status: 400 }))
+      // Owned by the subscribing professional, so they can poll /jobs/:id after a 202
+      const subscription = await db.collection('subscriptions').findOne({ reference }, { projection: { professionalId: 1 } })
+      const job = await enqueueJob(db, 'paystack_verify', { reference }, { ownerId: subscription?.professionalId || null })
+      const finished = await timePhase('job-wait', () => waitForJob(db, job.id, PAYMENT_JOB_WAIT))
+      if (!finished) {
+        return handleCORS(NextResponse.json({ message: 'Payment verification queued', jobId: job.id, status: 'queued' }, { status: 202 }))
       }
+      if (finished.status === 'failed') {
+        return handleCORS(NextResponse.json({ error: finished.lastError || 'Payment verification failed' }, { status: 400 }))
+      }
+      return handleCORS(NextResponse.json({ message: 'Subscription activated', subscription: finished.result }))
+    }
 
-      try {
-        const response = await fetch(`https://api.paystack.co/transaction/verify/${reference}`, {
-          headers: {
-            'Authorization': `Bearer ${process.env.PAYSTACK_SECRET_KEY}`
-          }
-        })
-
-        const data = await response.json()
-
-        if (!data.status || data.data.status !== 'success') {
-          return handleCORS(NextResponse.json({ error: 'Payment verification failed' }, { status: 400 }))
-        }
-
-        const { professional_id, plan_id } = data.data.metadata
-        const plan = SUBSCRIPTION_PLANS[plan_id]
-
-        if (!plan) {
-          return handleCORS(NextResponse.json({ error: 'Invalid plan' }, { status: 400 }))
-        }
-
-        const startDate = new Date()
-        const endDate = new Date(startDate.getTime() + plan.duration * 24 * 60 * 60 * 1000)
-
-        // Update professional's subscription and featured status
-        await db.collection('professionals').updateOne(
-          { id: professional_id },
-          {
-            $set: {
-              'subscription.plan': plan_id,
-              'subscription.status': 'active',
-              'subscription.startDate': startDate,
-              'subscription.endDate': endDate,
-              'subscription.paystackRef': reference,
-              'featured.isFeatured': true,
-              'featured.featuredUntil': endDate,
-              'featured.featuredTier': plan_id,
-              updatedAt: new Date()
-            }
-          }
-        )
-
-        // Update subscription record
-        await db.collection('subscriptions').updateOne(
-          { reference },
-          {
-            $set: {
-              status: 'completed',
-              completedAt: new Date()
-            }
-          }
-        )
-
-        // Get professional for email
-        const professional = await db.collection('professionals').findOne({ id: professional_id })
-        if (professional) {
-          await sendEmail(
-            professional.email,
-            'Subscription Activated - ExpertBridge',
-            getSubscriptionEmailTemplate(professional.fullName, plan, endDate)
-          )
-        }
+    // Job status (owner or admin)
+    if (route.match(/^\/jobs\/[^/]+$/) && method === 'GET') {
+      const user = verifyToken(request)
+      if (!user) {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
 
-        return handleCORS(NextResponse.json({
-          message: 'Subscription activated',
-          subscription: {
-            plan: plan_id,
-            startDate,
-            endDate
-          }
-        }))
-      } catch (error) {
-        console.error('Payment verification error:', error)
-        return handleCORS(NextResponse.json({ error: 'Payment verification failed' }, { status: 500 }))
+      const job = await db.collection('jobs').findOne({ id: path[1] }, { projection: { payload: 0 } })
+      if (!job || (user.role !== 'admin' && job.ownerId !== user.id)) {
+        return handleCORS(NextResponse.json({ error: 'Job not found' }, { status: 404 }))
       }
+      return handleCORS(NextResponse.json({ job: jobView(job) }))
     }
 
     // Activate subscription (for mock/testing)
@@ -1004,18 +2849,21 @@ async function handleRoute(request, { params }) {
           }
         }
       )
+      invalidateResponses('professionals')
+      invalidateSessionUsers(user.id)
 
       // Get updated professional
       const professional = await db.collection('professionals').findOne({ id: user.id })
       
       // Send confirmation email
-      await sendEmail(
+      await queueEmail(
+        db,
         professional.email,
         'Subscription Activated - ExpertBridge',
         getSubscriptionEmailTemplate(professional.fullName, plan, endDate)
       )
 
-      const { password: _, ...safeData } = professional
+      const { password: _, search: __, ...safeData } = professional
       return handleCORS(NextResponse.json({
         message: 'Subscription activated',
         professional: safeData
@@ -1031,15 +2879,55 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
       }
 
+      // Optional limit; use /admin/export/pending to pull the whole queue
+      const limit = parseInt(new URL(request.url).searchParams.get('limit')) || 0
+
       const pending = await db.collection('professionals')
         .find({ 'verification.status': 'pending' })
-        .project({ password: 0 })
+        .project({ password: 0, search: 0 })
         .sort({ createdAt: -1 })
+        .limit(limit)
         .toArray()
 
       return handleCORS(NextResponse.json({ pending }))
     }
 
+    // Streaming export (admin): /admin/export/pending or /admin/export/professionals?status=
+    // format=ndjson|csv, fields=comma separated subset of EXPORT_FIELDS
+    if (route.match(/^\/admin\/export\/(pending|professionals)$/) && method === 'GET') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const url = new URL(request.url)
+      const format = url.searchParams.get('format') || 'ndjson'
+      if (format !== 'ndjson' && format !== 'csv') {
+        return handleCORS(NextResponse.json({ error: 'format must be ndjson or csv' }, { status: 400 }))
+      }
+      const requested = url.searchParams.get('fields')
+      const fields = requested ? requested.split(',').map(f => f.trim()).filter(Boolean) : EXPORT_DEFAULT_FIELDS
+      const unknown = fields.filter(field => !EXPORT_FIELDS.includes(field))
+      if (unknown.length > 0 || fields.length === 0) {
+        return handleCORS(NextResponse.json({ error: `Unknown export fields: ${unknown.join(', ')}`, allowed: EXPORT_FIELDS }, { status: 400 }))
+      }
+
+      const query = {}
+      const status = path[2] === 'pending' ? 'pending' : url.searchParams.get('status')
+      if (status) query['verification.status'] = status
+      const category = url.searchParams.get('category')
+      if (category) query.category = category
+
+      const stamp = new Date().toISOString().slice(0, 10)
+      return handleCORS(new NextResponse(exportStream(db.collection('professionals'), query, fields, format), {
+        headers: {
+          'Content-Type': format === 'csv' ? 'text/csv; charset=utf-8' : 'application/x-ndjson',
+          'Content-Disposition': `attachment; filename="expertbridge-${path[2]}-${stamp}.${format === 'csv' ? 'csv' : 'ndjson'}"`,
+          'Cache-Control': 'no-store'
+        }
+      }))
+    }
+
     // Approve professional
     if (route.match(/^\/admin\/approve\/[^/]+$/) && method === 'PUT') {
       const user = verifyToken(request)
@@ -1054,7 +2942,7 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Professional not found' }, { status: 404 }))
       }
 
-      await db.collection('professionals').updateOne(
+      const previous = await db.collection('professionals').findOneAndUpdate(
         { id: professionalId },
         {
           $set: {
@@ -1063,11 +2951,18 @@ async function handleRoute(request, { params }) {
             'verification.verifiedBy': user.id,
             updatedAt: new Date()
           }
-        }
+        },
+        { projection: { category: 1, verification: 1, isActive: 1 } }
       )
+      if (previous) {
+        await updateProfessionalStats(db, previous, { ...previous, verification: { status: 'approved' } })
+      }
+      invalidateResponses('professionals', 'categories')
+      invalidateSessionUsers(professionalId)
 
       // Send approval email
-      await sendEmail(
+      await queueEmail(
+        db,
         professional.email,
         'Your ExpertBridge Profile is Approved!',
         getApprovalEmailTemplate(professional.fullName)
@@ -1093,7 +2988,7 @@ async function handleRoute(request, { params }) {
       const body = await request.json()
       const { reason } = body
 
-      await db.collection('professionals').updateOne(
+      const previous = await db.collection('professionals').findOneAndUpdate(
         { id: professionalId },
         {
           $set: {
@@ -1101,11 +2996,18 @@ async function handleRoute(request, { params }) {
             'verification.rejectionReason': reason || 'Does not meet requirements',
             updatedAt: new Date()
           }
-        }
+        },
+        { projection: { category: 1, verification: 1, isActive: 1 } }
       )
+      if (previous) {
+        await updateProfessionalStats(db, previous, { ...previous, verification: { status: 'rejected' } })
+      }
+      invalidateResponses('professionals', 'categories')
+      invalidateSessionUsers(professionalId)
 
       // Send rejection email
-      await sendEmail(
+      await queueEmail(
+        db,
         professional.email,
         'ExpertBridge Profile Review Update',
         getRejectionEmailTemplate(professional.fullName, reason)
@@ -1114,6 +3016,31 @@ async function handleRoute(request, { params }) {
       return handleCORS(NextResponse.json({ message: 'Professional rejected' }))
     }
 
+    // Batch approve/reject (admin): body { ids: [...] } or { filter: { status, category, createdBefore } }
+    if (route.match(/^\/admin\/batch\/(approve|reject)$/) && method === 'POST') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const body = await request.json().catch(() => ({}))
+      if (!Array.isArray(body.ids) && !body.filter) {
+        return handleCORS(NextResponse.json({ error: 'Provide ids or filter' }, { status: 400 }))
+      }
+      if (!Array.isArray(body.ids)) {
+        // A filter on the target status would match the same page forever with hasMore set
+        if ((body.filter.status || 'pending') === MODERATION_STATUS[path[2]]) {
+          return handleCORS(NextResponse.json({ error: `filter.status cannot be ${MODERATION_STATUS[path[2]]}` }, { status: 400 }))
+        }
+        if (body.filter.createdBefore && isNaN(new Date(body.filter.createdBefore))) {
+          return handleCORS(NextResponse.json({ error: 'Invalid createdBefore' }, { status: 400 }))
+        }
+      }
+
+      const result = await moderateProfessionals(db, user, path[2], body)
+      return handleCORS(NextResponse.json(result))
+    }
+
     // Delete professional (admin)
     if (route.match(/^\/admin\/professionals\/[^/]+$/) && method === 'DELETE') {
       const user = verifyToken(request)
@@ -1130,14 +3057,27 @@ async function handleRoute(request, { params }) {
       }
 
       // Delete professional
-      await db.collection('professionals').deleteOne({ id: professionalId })
+      const deleted = await db.collection('professionals').deleteOne({ id: professionalId })
       
       // Also delete their reviews
-      await db.collection('reviews').deleteMany({ professionalId })
+      const pendingReviews = await db.collection('reviews').countDocuments({ professionalId, status: 'pending' })
+      const reviews = await db.collection('reviews').deleteMany({ professionalId })
       
       // Delete their subscriptions
+      const completedSubscriptions = await db.collection('subscriptions').countDocuments({ professionalId, status: 'completed' })
       await db.collection('subscriptions').deleteMany({ professionalId })
 
+      if (deleted.deletedCount === 1) {
+        await updateProfessionalStats(db, professional, null)
+      }
+      await incrementStats(db, {
+        'reviews.total': -reviews.deletedCount,
+        'reviews.pending': -pendingReviews,
+        'subscriptions.completed': -completedSubscriptions
+      })
+      invalidateResponses('professionals', 'categories')
+      invalidateSessionUsers(professionalId)
+
       return handleCORS(NextResponse.json({ message: 'Professional deleted successfully' }))
     }
 
@@ -1156,11 +3096,29 @@ async function handleRoute(request, { params }) {
       const query = {}
       if (status) query['verification.status'] = status
 
+      const cursor = parseCursor(url, ADMIN_LISTING_SORT)
+      if (cursor) {
+        if (cursor.invalid) {
+          return handleCORS(NextResponse.json({ error: 'Invalid cursor' }, { status: 400 }))
+        }
+        const docs = await db.collection('professionals')
+          .find(cursor.values ? { $and: [query, keysetFilter(ADMIN_LISTING_SORT, cursor.values)] } : query)
+          .project({ password: 0, search: 0 })
+          .sort(sortSpec(ADMIN_LISTING_SORT))
+          .limit(limit + 1)
+          .toArray()
+        const { items, pagination } = cursorPage(docs, limit, ADMIN_LISTING_SORT)
+        if (url.searchParams.get('withTotal') === 'true') {
+          pagination.total = await cachedCount(db.collection('professionals'), query, `admin:${status || 'all'}`)
+        }
+        return handleCORS(NextResponse.json({ professionals: items, pagination }))
+      }
+
       const total = await db.collection('professionals').countDocuments(query)
       const professionals = await db.collection('professionals')
         .find(query)
-        .project({ password: 0 })
-        .sort({ createdAt: -1 })
+        .project({ password: 0, search: 0 })
+        .sort(sortSpec(ADMIN_LISTING_SORT))
         .skip((page - 1) * limit)
         .limit(limit)
         .toArray()
@@ -1178,39 +3136,109 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
       }
 
-      const totalProfessionals = await db.collection('professionals').countDocuments()
-      const pendingApprovals = await db.collection('professionals').countDocuments({ 'verification.status': 'pending' })
-      const approvedProfessionals = await db.collection('professionals').countDocuments({ 'verification.status': 'approved' })
-      const rejectedProfessionals = await db.collection('professionals').countDocuments({ 'verification.status': 'rejected' })
+      const snapshot = await getStats(db)
+      // Featured status expires by date, so it is counted from its own narrow index
       const featuredProfessionals = await db.collection('professionals').countDocuments({ 
         'featured.isFeatured': true, 
         'featured.featuredUntil': { $gt: new Date() } 
       })
-      const totalReviews = await db.collection('reviews').countDocuments()
-      const pendingReviews = await db.collection('reviews').countDocuments({ status: 'pending' })
-      const totalSubscriptions = await db.collection('subscriptions').countDocuments({ status: 'completed' })
 
-      // Category breakdown
-      const categoryBreakdown = await db.collection('professionals').aggregate([
-        { $group: { _id: '$category', count: { $sum: 1 } } },
-        { $sort: { count: -1 } }
-      ]).toArray()
+      const categoryBreakdown = Object.entries(snapshot.categories || {})
+        .map(([key, counts]) => ({ _id: counts.name || STATS_CATEGORY_NAMES.get(key) || key, count: counts.total }))
+        .filter(c => c.count > 0)
+        .sort((a, b) => b.count - a.count)
 
       return handleCORS(NextResponse.json({
         stats: {
-          totalProfessionals,
-          pendingApprovals,
-          approvedProfessionals,
-          rejectedProfessionals,
+          totalProfessionals: snapshot.professionals.total,
+          pendingApprovals: snapshot.professionals.pending || 0,
+          approvedProfessionals: snapshot.professionals.approved || 0,
+          rejectedProfessionals: snapshot.professionals.rejected || 0,
           featuredProfessionals,
-          totalReviews,
-          pendingReviews,
-          totalSubscriptions
+          totalReviews: snapshot.reviews?.total || 0,
+          pendingReviews: snapshot.reviews?.pending || 0,
+          totalSubscriptions: snapshot.subscriptions?.completed || 0
         },
+        statsAsOf: snapshot.recountedAt,
         categoryBreakdown
       }))
     }
 
+    // Job queue overview (admin)
+    if (route === '/admin/jobs' && method === 'GET') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      // Counts cover pending work plus jobs that changed in the last day, not the whole history
+      const since = new Date(Date.now() - JOB_STATS_WINDOW)
+      const [counts, failed] = await Promise.all([
+        db.collection('jobs').aggregate([
+          { $match: { $or: [{ status: { $in: ['queued', 'running'] } }, { updatedAt: { $gte: since } }] } },
+          { $group: { _id: { type: '$type', status: '$status' }, count: { $sum: 1 } } }
+        ]).toArray(),
+        db.collection('jobs').find({ status: 'failed' }).project({ payload: 0 }).sort({ updatedAt: -1 }).limit(20).toArray()
+      ])
+      return handleCORS(NextResponse.json({
+        counts: counts.map(c => ({ type: c._id.type, status: c._id.status, count: c.count })),
+        failed: failed.map(jobView)
+      }))
+    }
+
+    // Recount the stats snapshot from the collections (admin)
+    if (route === '/admin/stats/recount' && method === 'POST') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const snapshot = await recountStats(db)
+      invalidateResponses('categories')
+      return handleCORS(NextResponse.json({ message: 'Stats recounted', recountedAt: snapshot.recountedAt }))
+    }
+
+    // Rebuild rating aggregates from reviews (admin)
+    if (route === '/admin/ratings/reconcile' && method === 'POST') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const body = await request.json().catch(() => ({}))
+      const result = await reconcileRatings(db, Array.isArray(body.professionalIds) ? body.professionalIds : null)
+      invalidateResponses('professionals')
+      return handleCORS(NextResponse.json({ message: 'Ratings reconciled', ...result }))
+    }
+
+    // Rebuild search fields (admin) - backfills professionals created before search indexing or geocoding
+    if (route === '/admin/search/reindex' && method === 'POST') {
+      const user = verifyToken(request)
+      if (!user || user.role !== 'admin') {
+        return handleCORS(NextResponse.json({ error: 'Unauthorized' }, { status: 401 }))
+      }
+
+      const cursor = db.collection('professionals')
+        .find({}, { projection: { id: 1, fullName: 1, category: 1, subcategory: 1, bio: 1, location: 1, serviceOptions: 1 } })
+
+      let batch = []
+      let reindexed = 0
+      for await (const professional of cursor) {
+        batch.push({ updateOne: { filter: { id: professional.id }, update: { $set: { search: buildSearchFields(professional) } } } })
+        if (batch.length === 500) {
+          await db.collection('professionals').bulkWrite(batch, { ordered: false })
+          reindexed += batch.length
+          batch = []
+        }
+      }
+      if (batch.length > 0) {
+        await db.collection('professionals').bulkWrite(batch, { ordered: false })
+        reindexed += batch.length
+      }
+
+      return handleCORS(NextResponse.json({ message: 'Search index rebuilt', reindexed }))
+    }
+
     // Approve review (admin)
     if (route.match(/^\/admin\/reviews\/[^/]+\/approve$/) && method === 'PUT') {
       const user = verifyToken(request)
@@ -1224,19 +3252,15 @@ async function handleRoute(request, { params }) {
         return handleCORS(NextResponse.json({ error: 'Review not found' }, { status: 404 }))
       }
 
-      await db.collection('reviews').updateOne({ id: reviewId }, { $set: { status: 'approved' } })
-
-      // Update professional's average rating
-      const approvedReviews = await db.collection('reviews')
-        .find({ professionalId: review.professionalId, status: 'approved' })
-        .toArray()
-
-      if (approvedReviews.length > 0) {
-        const avgRating = approvedReviews.reduce((sum, r) => sum + r.rating, 0) / approvedReviews.length
-        await db.collection('professionals').updateOne(
-          { id: review.professionalId },
-          { $set: { 'ratings.average': Math.round(avgRating * 10) / 10, 'ratings.count': approvedReviews.length } }
-        )
+      // Only the request that actually flips the status counts the rating
+      const result = await db.collection('reviews').updateOne(
+        { id: reviewId, status: { $ne: 'approved' } },
+        { $set: { status: 'approved' } }
+      )
+      if (result.modifiedCount === 1) {
+        await applyRating(db, review.professionalId, review.rating)
+        if (review.status === 'pending') await incrementStats(db, { 'reviews.pending': -1 })
+        invalidateResponses('professionals')
       }
 
       return handleCORS(NextResponse.json({ message: 'Review approved' }))
@@ -1260,20 +3284,17 @@ async function handleRoute(request, { params }) {
     // ==================== CATEGORIES ROUTE ====================
 
     if (route === '/categories' && method === 'GET') {
-      const categoryCounts = await db.collection('professionals').aggregate([
-        { $match: { 'verification.status': 'approved', isActive: true } },
-        { $group: { _id: '$category', count: { $sum: 1 } } }
-      ]).toArray()
+      return cachedJSON(request, route, { tags: ['categories'] }, async () => {
+        const snapshot = await getStats(db)
+        const counts = snapshot.categories || {}
 
-      const categoryMap = {}
-      categoryCounts.forEach(c => { categoryMap[c._id] = c.count })
-
-      const categories = CATEGORIES.map(cat => ({
-        name: cat,
-        count: categoryMap[cat] || 0
-      }))
+        const categories = CATEGORIES.map(cat => ({
+          name: cat,
+          count: counts[statsKey(cat)]?.listed || 0
+        }))
 
-      return handleCORS(NextResponse.json({ categories }))
+        return { categories }
+      })
     }
 
     // Route not found
@@ -1285,9 +3306,18 @@ async function handleRoute(request, { params }) {
   }
 }
 
+// Runs handleRoute inside a request span and reports it (Server-Timing header, /metrics)
+async function handleInstrumentedRoute(request, context) {
+  const span = startSpan(request, `/${(context.params?.path || []).join('/')}`)
+  const capture = requestCapture && startCapture(request)
+  const response = await requestSpans.run(span, async () => compressResponse(request, await handleRoute(request, context)))
+  if (capture) captureRequest(capture, response.status, performance.now() - span.startedAt)
+  return finishSpan(span, response)
+}
+
 // Export all HTTP methods
-export const GET = handleRoute
-export const POST = handleRoute
-export const PUT = handleRoute
-export const DELETE = handleRoute
-export const PATCH = handleRoute
+export const GET = handleInstrumentedRoute
+export const POST = handleInstrumentedRoute
+export const PUT = handleInstrumentedRoute
+export const DELETE = handleInstrumentedRoute
+export const PATCH = handleInstrumentedRoute
@@ -88,6 +88,22 @@ function getProfessionalBadge(professional) {
   return null
 }
 
+// Poll a queued background job (photo upload, payment) until it finishes or we give up
+async function waitForJob(jobId, token, timeout = 60000) {
+  const deadline = Date.now() + timeout
+  let delay = 500
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, delay))
+    const res = await fetch(`/api/jobs/${jobId}`, { headers: { 'Authorization': `Bearer ${token}` } })
+    if (res.ok) {
+      const { job } = await res.json()
+      if (job.status === 'done' || job.status === 'failed') return job
+    }
+    delay = Math.min(delay * 2, 5000)
+  }
+  return null
+}
+
 // Professional Card Component
 const ProfessionalCard = memo(function ProfessionalCard({ professional, onClick }) {
   const badge = getProfessionalBadge(professional)
@@ -831,7 +847,7 @@ function SearchFilters({ onSearch, initialCategory, initialLocation, initialKeyw
 }
 
 // Admin Pending Card Component
-function AdminPendingCard({ professional, onApprove, onReject }) {
+function AdminPendingCard({ professional, onApprove, onReject, selected, onSelectedChange }) {
   const [isApproving, setIsApproving] = useState(false)
   const [isRejecting, setIsRejecting] = useState(false)
 
@@ -852,6 +868,7 @@ function AdminPendingCard({ professional, onApprove, onReject }) {
       <CardContent className="pt-6">
         <div className="flex flex-col md:flex-row md:items-center justify-between gap-4">
           <div className="flex items-center gap-4">
+            <Checkbox checked={selected} onCheckedChange={(checked) => onSelectedChange(professional.id, !!checked)} />
             <Avatar className="h-16 w-16">
               <AvatarImage src={professional.profilePhoto?.url} />
               <AvatarFallback>{professional.fullName?.slice(0, 2).toUpperCase()}</AvatarFallback>
@@ -1039,7 +1056,9 @@ export default function App() {
   const [categories, setCategories] = useState([])
   const [featuredProfessionals, setFeaturedProfessionals] = useState([])
   const [isLoading, setIsLoading] = useState(false)
-  const [pagination, setPagination] = useState({ page: 1, total: 0, pages: 0 })
+  const [pagination, setPagination] = useState({ total: 0, hasMore: false, nextCursor: null })
+  const [searchFacets, setSearchFacets] = useState(null)
+  const [isLoadingMore, setIsLoadingMore] = useState(false)
   const [isInitialized, setIsInitialized] = useState(false)
   const [currentSearchParams, setCurrentSearchParams] = useState({ category: '', location: '', keyword: '' })
 
@@ -1055,7 +1074,10 @@ export default function App() {
   // Admin state
   const [adminStats, setAdminStats] = useState(null)
   const [pendingProfessionals, setPendingProfessionals] = useState([])
+  const [selectedPending, setSelectedPending] = useState(new Set())
+  const [isModerating, setIsModerating] = useState(false)
   const [allProfessionals, setAllProfessionals] = useState([])
+  const [allProfessionalsCursor, setAllProfessionalsCursor] = useState(null)
 
   useEffect(() => {
     if (isInitialized) return
@@ -1087,14 +1109,14 @@ export default function App() {
   const fetchFeaturedProfessionals = async () => {
     try {
       // First try to get featured (subscribed) professionals
-      const featuredRes = await fetch('/api/professionals/featured?limit=6')
+      const featuredRes = await fetch('/api/professionals/featured?limit=6&view=card')
       const featuredData = await featuredRes.json()
       
       if (featuredData.professionals && featuredData.professionals.length > 0) {
         setFeaturedProfessionals(featuredData.professionals)
       } else {
         // Fallback to approved professionals if no featured ones
-        const res = await fetch('/api/professionals?limit=6')
+        const res = await fetch('/api/professionals?limit=6&view=card')
         const data = await res.json()
         if (data.professionals) setFeaturedProfessionals(data.professionals)
       }
@@ -1109,26 +1131,39 @@ export default function App() {
     fetchFeaturedProfessionals()
   }, [])
 
-  const handleSearch = useCallback(async (category = '', location = '', keyword = '', page = 1) => {
-    setIsLoading(true)
+  // Keyset-paginated search: an empty cursor loads the first page, nextCursor appends the following one
+  const handleSearch = useCallback(async (category = '', location = '', keyword = '', cursor = '') => {
+    const isNextPage = Boolean(cursor)
+    if (isNextPage) setIsLoadingMore(true)
+    else setIsLoading(true)
     setCurrentSearchParams({ category, location, keyword })
     try {
       const queryParams = new URLSearchParams()
       if (category && category !== 'all') queryParams.append('category', category)
       if (keyword) queryParams.append('keyword', keyword)
       if (location) queryParams.append('country', location)
-      queryParams.append('page', page.toString())
+      queryParams.append('cursor', cursor)
       queryParams.append('limit', '12')
+      queryParams.append('view', 'card')
+      // The first page also brings the total and facet counts for the same filters
+      if (!isNextPage) queryParams.append('facets', 'true')
 
       const res = await fetch(`/api/search?${queryParams.toString()}`)
       const data = await res.json()
-      setSearchResults(data.professionals || [])
-      setPagination(data.pagination || { page: 1, total: 0, pages: 0 })
+      const professionals = data.professionals || []
+      setSearchResults(prev => (isNextPage ? [...prev, ...professionals] : professionals))
+      if (!isNextPage) setSearchFacets(data.facets || null)
+      setPagination(prev => ({
+        total: data.pagination?.total ?? prev.total,
+        hasMore: Boolean(data.pagination?.hasMore),
+        nextCursor: data.pagination?.nextCursor || null
+      }))
       setCurrentView('search')
     } catch (error) {
       toast.error('Search failed')
     } finally {
       setIsLoading(false)
+      setIsLoadingMore(false)
     }
   }, [])
 
@@ -1333,11 +1368,22 @@ export default function App() {
       })
       const data = await res.json()
       if (res.ok) {
-        // Update local user state with new photo
-        const updatedUser = { ...user, profilePhoto: { url: data.url, publicId: data.publicId } }
-        setUser(updatedUser)
-        localStorage.setItem('expertbridge_user', JSON.stringify(updatedUser))
-        toast.success(data.mocked ? 'Photo upload simulated (Cloudinary not configured)' : 'Profile photo updated!')
+        // The upload runs in the background; show the chosen image right away
+        setUser(prev => ({ ...prev, profilePhoto: { url: imageData, publicId: null } }))
+        toast.success('Uploading profile photo...')
+
+        const job = await waitForJob(data.jobId, token)
+        if (job?.status === 'done') {
+          const updatedUser = { ...user, profilePhoto: { url: job.result.url, publicId: job.result.publicId } }
+          setUser(updatedUser)
+          localStorage.setItem('expertbridge_user', JSON.stringify(updatedUser))
+          toast.success(job.result.mocked ? 'Photo upload simulated (Cloudinary not configured)' : 'Profile photo updated!')
+        } else if (job?.status === 'failed') {
+          setUser(user)
+          toast.error('Failed to upload photo')
+        } else {
+          toast.success('Photo upload is still processing; it will appear shortly')
+        }
       } else {
         toast.error(data.error || 'Failed to upload photo')
       }
@@ -1359,7 +1405,16 @@ export default function App() {
         },
         body: JSON.stringify({ planId })
       })
-      const data = await res.json()
+      let data = await res.json()
+      if (res.status === 202) {
+        // Payment provider is slow; wait for the queued initialization to finish
+        const job = await waitForJob(data.jobId, token)
+        if (job?.status !== 'done') {
+          toast.error(job?.lastError || 'Payment initialization is taking longer than expected, please try again')
+          return
+        }
+        data = job.result
+      }
       if (res.ok) {
         if (data.mocked) {
           // For mock payments, activate directly
@@ -1408,8 +1463,8 @@ export default function App() {
     try {
       const [statsRes, pendingRes, allRes] = await Promise.all([
         fetch('/api/admin/stats', { headers }),
-        fetch('/api/admin/pending', { headers }),
-        fetch('/api/admin/professionals?limit=50', { headers })
+        fetch('/api/admin/pending?limit=100', { headers }),
+        fetch('/api/admin/professionals?limit=50&cursor=', { headers })
       ])
       const statsData = await statsRes.json()
       const pendingData = await pendingRes.json()
@@ -1417,11 +1472,26 @@ export default function App() {
       setAdminStats(statsData)
       setPendingProfessionals(pendingData.pending || [])
       setAllProfessionals(allData.professionals || [])
+      setAllProfessionalsCursor(allData.pagination?.nextCursor || null)
     } catch (error) {
       console.error('Error fetching admin data:', error)
     }
   }, [token])
 
+  const loadMoreAdminProfessionals = useCallback(async () => {
+    if (!allProfessionalsCursor) return
+    try {
+      const res = await fetch(`/api/admin/professionals?limit=50&cursor=${encodeURIComponent(allProfessionalsCursor)}`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      })
+      const data = await res.json()
+      setAllProfessionals(prev => [...prev, ...(data.professionals || [])])
+      setAllProfessionalsCursor(data.pagination?.nextCursor || null)
+    } catch (error) {
+      console.error('Error loading more professionals:', error)
+    }
+  }, [token, allProfessionalsCursor])
+
   const handleApprove = useCallback(async (professionalId) => {
     try {
       const res = await fetch(`/api/admin/approve/${professionalId}`, {
@@ -1462,6 +1532,66 @@ export default function App() {
     }
   }, [token, fetchAdminData])
 
+  const handleSelectPending = useCallback((professionalId, checked) => {
+    setSelectedPending(prev => {
+      const next = new Set(prev)
+      if (checked) next.add(professionalId)
+      else next.delete(professionalId)
+      return next
+    })
+  }, [])
+
+  // Approve/reject the selected professionals, or every pending one when ids is null
+  const handleBatchModeration = useCallback(async (action, ids) => {
+    setIsModerating(true)
+    try {
+      const body = ids ? { ids } : { filter: { status: 'pending' } }
+      if (action === 'reject') body.reason = 'Does not meet verification requirements'
+      const res = await fetch(`/api/admin/batch/${action}`, {
+        method: 'POST',
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(body)
+      })
+      const data = await res.json()
+      if (res.ok) {
+        toast.success(`${data.updated} professional(s) ${action === 'approve' ? 'approved' : 'rejected'}. Email notifications queued.${data.hasMore ? ' More remain pending.' : ''}`)
+        setSelectedPending(new Set())
+        fetchAdminData(token)
+        if (action === 'approve') refreshData()
+      } else {
+        toast.error(data.error || `Failed to ${action}`)
+      }
+    } catch (error) {
+      toast.error(`Failed to ${action}`)
+    } finally {
+      setIsModerating(false)
+    }
+  }, [token, fetchAdminData, refreshData])
+
+  // Download a streamed CSV export (the server streams it; the browser saves the result)
+  const handleExport = useCallback(async (kind) => {
+    try {
+      const res = await fetch(`/api/admin/export/${kind}?format=csv`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      })
+      if (!res.ok) {
+        toast.error('Export failed')
+        return
+      }
+      const blob = await res.blob()
+      const link = document.createElement('a')
+      link.href = URL.createObjectURL(blob)
+      link.download = `expertbridge-${kind}.csv`
+      link.click()
+      URL.revokeObjectURL(link.href)
+    } catch (error) {
+      toast.error('Export failed')
+    }
+  }, [token])
+
   const handleDeleteProfessional = useCallback(async (professionalId) => {
     try {
       const res = await fetch(`/api/admin/professionals/${professionalId}`, {
@@ -1755,6 +1885,21 @@ export default function App() {
             </div>
           </div>
 
+          {searchFacets?.category?.length > 1 && (
+            <div className="flex flex-wrap gap-2 mb-6">
+              {searchFacets.category.map(({ value, count }) => (
+                <Badge
+                  key={value}
+                  variant="outline"
+                  className="cursor-pointer hover:bg-muted"
+                  onClick={() => handleSearch(value, currentSearchParams.location, currentSearchParams.keyword)}
+                >
+                  {value} ({count})
+                </Badge>
+              ))}
+            </div>
+          )}
+
           {isLoading ? (
             <div className="flex justify-center py-12">
               <Loader2 className="h-8 w-8 animate-spin text-primary" />
@@ -1777,18 +1922,16 @@ export default function App() {
                 ))}
               </div>
 
-              {pagination.pages > 1 && (
-                <div className="flex justify-center gap-2 mt-8">
-                  {Array.from({ length: pagination.pages }, (_, i) => i + 1).map((page) => (
-                    <Button 
-                      key={page} 
-                      variant={page === pagination.page ? 'default' : 'outline'} 
-                      size="sm"
-                      onClick={() => handleSearch(currentSearchParams.category, currentSearchParams.location, currentSearchParams.keyword, page)}
-                    >
-                      {page}
-                    </Button>
-                  ))}
+              {pagination.hasMore && (
+                <div className="flex justify-center mt-8">
+                  <Button 
+                    variant="outline"
+                    disabled={isLoadingMore}
+                    onClick={() => handleSearch(currentSearchParams.category, currentSearchParams.location, currentSearchParams.keyword, pagination.nextCursor)}
+                  >
+                    {isLoadingMore && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                    Load More
+                  </Button>
                 </div>
               )}
             </>
@@ -2151,7 +2294,7 @@ export default function App() {
 
         <Tabs defaultValue="pending">
           <TabsList className="mb-4">
-            <TabsTrigger value="pending">Pending Approvals ({pendingProfessionals.length})</TabsTrigger>
+            <TabsTrigger value="pending">Pending Approvals ({adminStats?.stats?.pendingApprovals ?? pendingProfessionals.length})</TabsTrigger>
             <TabsTrigger value="all">All Professionals</TabsTrigger>
           </TabsList>
 
@@ -2164,12 +2307,32 @@ export default function App() {
               </Card>
             ) : (
               <div className="space-y-4">
+                <div className="flex flex-wrap items-center gap-2">
+                  <Button size="sm" onClick={() => handleBatchModeration('approve', [...selectedPending])} disabled={isModerating || selectedPending.size === 0}>
+                    <CheckCircle className="h-4 w-4 mr-1" />
+                    Approve selected ({selectedPending.size})
+                  </Button>
+                  <Button size="sm" variant="destructive" onClick={() => handleBatchModeration('reject', [...selectedPending])} disabled={isModerating || selectedPending.size === 0}>
+                    <XCircle className="h-4 w-4 mr-1" />
+                    Reject selected
+                  </Button>
+                  <Button size="sm" variant="outline" onClick={() => handleBatchModeration('approve', null)} disabled={isModerating}>
+                    {isModerating ? <Loader2 className="h-4 w-4 animate-spin mr-1" /> : <CheckCircle className="h-4 w-4 mr-1" />}
+                    Approve all pending
+                  </Button>
+                  <Button size="sm" variant="outline" onClick={() => handleExport('pending')}>
+                    <FileText className="h-4 w-4 mr-1" />
+                    Export CSV
+                  </Button>
+                </div>
                 {pendingProfessionals.map((professional) => (
                   <AdminPendingCard 
                     key={professional.id} 
                     professional={professional} 
                     onApprove={handleApprove}
                     onReject={handleReject}
+                    selected={selectedPending.has(professional.id)}
+                    onSelectedChange={handleSelectPending}
                   />
                 ))}
               </div>
@@ -2239,6 +2402,17 @@ export default function App() {
                     </tbody>
                   </table>
                 </div>
+                <div className="flex justify-center gap-2 p-4 border-t">
+                  {allProfessionalsCursor && (
+                    <Button variant="outline" size="sm" onClick={loadMoreAdminProfessionals}>
+                      Load More
+                    </Button>
+                  )}
+                  <Button variant="outline" size="sm" onClick={() => handleExport('professionals')}>
+                    <FileText className="h-4 w-4 mr-1" />
+                    Export CSV
+                  </Button>
+                </div>
               </CardContent>
             </Card>
           </TabsContent>
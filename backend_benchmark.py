@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+ExpertBridge Backend Benchmark Suite
+Measures per-endpoint latency and throughput, stores named baselines and
+fails the run when an endpoint regresses against a baseline. The
+login-contention mode measures login throughput and how much a burst of
+logins slows concurrent searches.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend_test import (BASE_URL, TIMEOUT, ExpertBridgeAPITester, LatencyHistogram, REPORT_PERCENTILES,
+                          start_local_server)
+
+# Configuration
+BASELINE_DIR = "benchmarks"
+MAX_STORED_SAMPLES = 2000  # latency samples kept per endpoint in a baseline
+DEFAULT_THRESHOLD = 0.10   # relative slowdown tolerated before failing
+DEFAULT_ALPHA = 0.01       # significance level for the regression test
+
+
+def mann_whitney_greater(baseline, current):
+    """One-sided Mann-Whitney U test that `current` tends to be larger than `baseline`.
+
+    Uses the normal approximation with tie and continuity correction, which is
+    accurate for the sample sizes a benchmark run produces. Returns the p-value.
+    """
+    n1, n2 = len(baseline), len(current)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+
+    combined = sorted([(v, 0) for v in baseline] + [(v, 1) for v in current])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2.0 + 1
+        for k in range(i, j + 1):
+            ranks[k] = rank
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    rank_sum = sum(r for r, (_, group) in zip(ranks, combined) if group == 1)
+    u = rank_sum - n2 * (n2 + 1) / 2.0
+    mean = n1 * n2 / 2.0
+    n = n1 + n2
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0
+    if variance <= 0:
+        return 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def median(values):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+class ExpertBridgeBenchmark:
+    """Runs fixed-size rounds against each endpoint the functional suite exercises"""
+
+    def __init__(self, base_url=BASE_URL, concurrency=4, rounds=5, iterations=50, warmup=10):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rounds = rounds
+        self.iterations = iterations
+        self.warmup = warmup
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.admin_token = None
+        self.professional_id = None
+        self.professional_email = None
+
+    def setup(self):
+        """Create and approve a professional and log in as admin, reusing the functional tests"""
+        tester = ExpertBridgeAPITester(self.base_url)
+        tester.test_professional_registration()
+        tester.test_admin_login()
+        tester.test_admin_approve_professional()
+        self.admin_token = tester.admin_token
+        self.professional_id = tester.test_professional_id
+        self.professional_email = tester.test_professional_email
+
+    def endpoints(self):
+        """Benchmark cases as (name, method, endpoint, body, token)"""
+        cases = [
+            ('GET /', 'GET', '/', None, None),
+            ('GET /categories', 'GET', '/categories', None, None),
+            ('GET /professionals', 'GET', '/professionals?limit=12', None, None),
+            ('GET /search', 'GET', '/search?category=Psychologist&country=Nigeria', None, None),
+            ('GET /search keyword', 'GET', '/search?keyword=therapy', None, None)
+        ]
+        if self.professional_id:
+            cases.append(('GET /professionals/:id', 'GET', f'/professionals/{self.professional_id}', None, None))
+        if self.professional_email:
+            cases.append(('POST /auth/login', 'POST', '/auth/login',
+                          {"email": self.professional_email, "password": "SecurePass123!"}, None))
+        if self.admin_token:
+            cases.extend([
+                ('GET /admin/pending', 'GET', '/admin/pending', None, self.admin_token),
+                ('GET /admin/stats', 'GET', '/admin/stats', None, self.admin_token)
+            ])
+        return cases
+
+    def _call(self, method, endpoint, body, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{endpoint}", json=body,
+                                            headers=headers, timeout=TIMEOUT)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def measure(self, method, endpoint, body, token):
+        """Latency samples (ms), per-round throughput (req/s) and error count for one endpoint"""
+        latencies = []
+        throughputs = []
+        errors = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(lambda _: self._call(method, endpoint, body, token), range(self.warmup)))
+            for _ in range(self.rounds):
+                started = time.perf_counter()
+                results = list(executor.map(lambda _: self._call(method, endpoint, body, token), range(self.iterations)))
+                elapsed = time.perf_counter() - started
+                throughputs.append(self.iterations / elapsed if elapsed else 0)
+                for seconds, ok in results:
+                    latencies.append(seconds * 1000)
+                    if not ok:
+                        errors += 1
+        return latencies, throughputs, errors
+
+    def run(self):
+        print("🚀 Starting ExpertBridge Benchmark")
+        print(f"Base URL: {self.base_url}")
+        print(f"Concurrency: {self.concurrency} | Rounds: {self.rounds} x {self.iterations} | Warmup: {self.warmup}")
+        print("=" * 60)
+
+        self.setup()
+
+        results = {}
+        for name, method, endpoint, body, token in self.endpoints():
+            latencies, throughputs, errors = self.measure(method, endpoint, body, token)
+            histogram = LatencyHistogram()
+            for ms in latencies:
+                histogram.record(ms * 1000)
+            results[name] = {
+                'latencies': latencies,
+                'throughputs': throughputs,
+                'errors': errors,
+                'percentiles': {f'p{p:g}': round(histogram.percentile(p) / 1000, 3) for p in REPORT_PERCENTILES},
+                'throughput': round(median(throughputs), 2)
+            }
+            pct = results[name]['percentiles']
+            print(f"  {name:<28} p50={pct['p50']:>8.1f}ms p99={pct['p99']:>8.1f}ms "
+                  f"{results[name]['throughput']:>8.1f} req/s errors={errors}")
+        return results
+
+
+class LoginContentionBenchmark:
+    """Search latency alone, then with login workers running alongside.
+
+    Password hashing is the most CPU-heavy thing the API does; if it runs on the
+    request loop every login stalls unrelated requests. Comparing search
+    percentiles across the two phases shows how well hashing is isolated.
+    """
+
+    def __init__(self, base_url=BASE_URL, search_workers=4, login_workers=4, duration=10.0,
+                 search_endpoint='/search?keyword=consultant&country=Nigeria'):
+        self.base_url = base_url
+        self.search_workers = search_workers
+        self.login_workers = login_workers
+        self.duration = duration
+        self.search_endpoint = search_endpoint
+        self.credentials = None
+
+    def setup(self):
+        tester = ExpertBridgeAPITester(self.base_url)
+        tester.test_professional_registration()
+        self.credentials = {"email": tester.test_professional_email, "password": "SecurePass123!"}
+
+    def _worker(self, deadline, method, endpoint, body, histogram, counts, lock):
+        session = requests.Session()
+        local = LatencyHistogram()
+        ok = errors = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, f"{self.base_url}{endpoint}", json=body, timeout=TIMEOUT)
+                success = response.status_code < 400
+            except requests.exceptions.RequestException:
+                success = False
+            local.record((time.perf_counter() - started) * 1_000_000)
+            if success:
+                ok += 1
+            else:
+                errors += 1
+        with lock:
+            histogram.merge(local)
+            counts['ok'] += ok
+            counts['errors'] += errors
+
+    def phase(self, login_workers):
+        """Run searches (plus `login_workers` login loops) for `duration` seconds"""
+        lock = threading.Lock()
+        search = (LatencyHistogram(), {'ok': 0, 'errors': 0})
+        login = (LatencyHistogram(), {'ok': 0, 'errors': 0})
+        deadline = time.perf_counter() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(deadline, 'GET', self.search_endpoint, None, *search, lock))
+                   for _ in range(self.search_workers)]
+        threads += [threading.Thread(target=self._worker, args=(deadline, 'POST', '/auth/login', self.credentials, *login, lock))
+                    for _ in range(login_workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        def report(histogram, counts):
+            return {
+                'requests': counts['ok'] + counts['errors'],
+                'errors': counts['errors'],
+                'throughput': round(counts['ok'] / elapsed, 2) if elapsed else 0,
+                'percentiles': {f'p{p:g}': round(histogram.percentile(p) / 1000, 3) for p in REPORT_PERCENTILES}
+            }
+        return {'search': report(*search), 'login': report(*login) if login_workers else None}
+
+    def run(self):
+        print("🚀 Starting ExpertBridge login contention benchmark")
+        print(f"Base URL: {self.base_url}")
+        print(f"Search workers: {self.search_workers} | Login workers: {self.login_workers} | "
+              f"{self.duration:g}s per phase")
+        print("=" * 60)
+        self.setup()
+
+        alone = self.phase(0)
+        contended = self.phase(self.login_workers)
+        login = contended['login']
+        print(f"  {'POST /auth/login':<28} {login['throughput']:>8.1f} logins/s "
+              f"p50={login['percentiles']['p50']:>8.1f}ms p99={login['percentiles']['p99']:>8.1f}ms "
+              f"errors={login['errors']}")
+        for label, result in (('search alone', alone['search']), ('search + logins', contended['search'])):
+            pct = result['percentiles']
+            print(f"  {label:<28} {result['throughput']:>8.1f} req/s   "
+                  f"p50={pct['p50']:>8.1f}ms p99={pct['p99']:>8.1f}ms errors={result['errors']}")
+        base_p99 = alone['search']['percentiles']['p99']
+        if base_p99:
+            print(f"  search p99 under login load: x{contended['search']['percentiles']['p99'] / base_p99:.2f}")
+        return {'alone': alone, 'contended': contended}
+
+
+def baseline_path(name, directory=BASELINE_DIR):
+    return os.path.join(directory, f"{name}.json")
+
+
+def save_baseline(name, results, base_url, directory=BASELINE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    endpoints = {}
+    for endpoint, result in results.items():
+        latencies = result['latencies']
+        if len(latencies) > MAX_STORED_SAMPLES:
+            latencies = random.sample(latencies, MAX_STORED_SAMPLES)
+        endpoints[endpoint] = dict(result, latencies=[round(v, 3) for v in latencies])
+    path = baseline_path(name, directory)
+    with open(path, 'w') as f:
+        json.dump({'name': name, 'baseUrl': base_url, 'createdAt': datetime.now().isoformat(),
+                   'endpoints': endpoints}, f, indent=2)
+    print(f"📝 Baseline '{name}' written to {path}")
+
+
+def load_baseline(name, directory=BASELINE_DIR):
+    with open(baseline_path(name, directory)) as f:
+        return json.load(f)
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+    """Compare a run against a baseline; returns the list of regressed endpoints.
+
+    An endpoint regresses when its latency (or throughput) got worse by more
+    than `threshold` relative to the baseline median AND the change is
+    statistically significant at `alpha`. Both are required so noise on a
+    fast endpoint and tiny-but-real shifts are not reported.
+    """
+    regressions = []
+    print("\n📋 COMPARISON AGAINST BASELINE:")
+    for name, result in results.items():
+        base = baseline['endpoints'].get(name)
+        if not base:
+            print(f"  ➕ {name}: no baseline, skipped")
+            continue
+
+        base_latency = median(base['latencies'])
+        latency = median(result['latencies'])
+        latency_change = (latency - base_latency) / base_latency if base_latency else 0
+        latency_p = mann_whitney_greater(base['latencies'], result['latencies'])
+
+        base_tput = median(base['throughputs'])
+        tput = median(result['throughputs'])
+        tput_change = (base_tput - tput) / base_tput if base_tput else 0
+        # Throughput regresses when the baseline tends to be larger than the current run
+        tput_p = mann_whitney_greater(result['throughputs'], base['throughputs'])
+
+        reasons = []
+        if latency_change > threshold and latency_p < alpha:
+            reasons.append(f"median latency +{latency_change * 100:.1f}% (p={latency_p:.2g})")
+        if tput_change > threshold and tput_p < alpha:
+            reasons.append(f"throughput -{tput_change * 100:.1f}% (p={tput_p:.2g})")
+        if result['errors'] > base.get('errors', 0):
+            reasons.append(f"errors {base.get('errors', 0)} → {result['errors']}")
+
+        if reasons:
+            regressions.append(name)
+            print(f"  ❌ {name}: {'; '.join(reasons)}")
+        else:
+            print(f"  ✅ {name}: latency {latency_change * 100:+.1f}% (p={latency_p:.2g}), "
+                  f"throughput {-tput_change * 100:+.1f}%")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ExpertBridge backend benchmark with baseline regression gating")
+    parser.add_argument('--base-url', default=BASE_URL, help="API base URL")
+    parser.add_argument('--local', action='store_true', help="Benchmark an in-process local API server")
+    parser.add_argument('--local-seed', type=int, default=10000, help="Professionals to seed the local server with")
+    parser.add_argument('--local-latency-ms', type=float, default=0, help="Simulated latency for the local server")
+    parser.add_argument('--local-password-iterations', type=int, help="pbkdf2 cost for the local server's password hashes")
+    parser.add_argument('--mode', choices=['endpoints', 'login-contention'], default='endpoints',
+                        help="endpoints: per-endpoint baselines; login-contention: login throughput vs search latency")
+    parser.add_argument('--save-baseline', metavar='NAME', help="Store this run as a named baseline")
+    parser.add_argument('--compare', metavar='NAME', help="Compare this run against a named baseline")
+    parser.add_argument('--baseline-dir', default=BASELINE_DIR)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown that counts as a regression (0.10 = 10%%)")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Significance level")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=50, help="Requests per endpoint per round")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per login-contention phase")
+    parser.add_argument('--search-workers', type=int, default=4, help="Concurrent search loops (login-contention)")
+    parser.add_argument('--login-workers', type=int, default=4, help="Concurrent login loops (login-contention)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.local:
+        start_local_server(args)
+
+    if args.mode == 'login-contention':
+        LoginContentionBenchmark(args.base_url, search_workers=args.search_workers, login_workers=args.login_workers,
+                                 duration=args.duration).run()
+        sys.exit(0)
+
+    benchmark = ExpertBridgeBenchmark(args.base_url, concurrency=args.concurrency, rounds=args.rounds,
+                                      iterations=args.iterations, warmup=args.warmup)
+    results = benchmark.run()
+
+    exit_code = 0
+    if args.compare:
+        baseline = load_baseline(args.compare, args.baseline_dir)
+        regressions = compare(baseline, results, threshold=args.threshold, alpha=args.alpha)
+        if regressions:
+            print(f"\n❌ {len(regressions)} endpoint(s) regressed against baseline '{args.compare}'")
+            exit_code = 1
+        else:
+            print(f"\n✅ No regressions against baseline '{args.compare}'")
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, args.base_url, args.baseline_dir)
+
+    sys.exit(exit_code)
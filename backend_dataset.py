@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+ExpertBridge Synthetic Dataset Generator
+Streams realistic professionals and reviews and bulk-seeds them into NDJSON
+files or a running API without holding the dataset in memory
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Configuration
+SEED_PASSWORD = "SeedPass123!"
+# bcryptjs hash of SEED_PASSWORD (cost 10) so NDJSON imported into Mongo can log in
+SEED_PASSWORD_BCRYPT = "$2a$10$h72hmtfudvbjcoNi6MJJ0ulg2lgyVN0ApHCk7KhKiMVH5d/3HIpae"
+DEFAULT_BATCH_SIZE = 1000
+CATEGORY_SKEW = 1.1  # Zipf exponent: a few categories hold most professionals
+
+CATEGORIES = [
+    'Psychologist', 'Lawyer', 'Financial Advisor', 'Career Coach',
+    'Business Consultant', 'Physiotherapist', 'Nutritionist',
+    'Accountant', 'Architect', 'Marriage Counselor', 'Tax Consultant',
+    'Real Estate Agent', 'IT Consultant', 'Marketing Consultant',
+    'HR Consultant', 'Life Coach', 'Immigration Consultant',
+    'Event Planner', 'Interior Designer', 'Education Consultant',
+    'Web Developer', 'Graphics Designer', 'Teacher', 'Housing Agent', 'Caterer'
+]
+
+# Popularity order used for the category skew (most common first)
+CATEGORY_POPULARITY = [
+    'Web Developer', 'Real Estate Agent', 'Teacher', 'Lawyer', 'Accountant',
+    'Business Consultant', 'Graphics Designer', 'Caterer', 'Event Planner', 'Housing Agent',
+    'Marketing Consultant', 'IT Consultant', 'Life Coach', 'Career Coach', 'Financial Advisor',
+    'Interior Designer', 'Education Consultant', 'Psychologist', 'Tax Consultant', 'Nutritionist',
+    'HR Consultant', 'Architect', 'Physiotherapist', 'Marriage Counselor', 'Immigration Consultant'
+]
+
+SUBCATEGORIES = {
+    'Psychologist': ['Clinical Psychology', 'Child Psychology', 'Counselling Psychology'],
+    'Lawyer': ['Corporate Law', 'Family Law', 'Property Law', 'Criminal Law'],
+    'Financial Advisor': ['Retirement Planning', 'Investment Advisory', 'Wealth Management'],
+    'Accountant': ['Bookkeeping', 'Audit', 'Payroll'],
+    'Web Developer': ['Frontend', 'Backend', 'E-commerce', 'WordPress'],
+    'Graphics Designer': ['Branding', 'UI Design', 'Print Design'],
+    'Teacher': ['Mathematics', 'English', 'Sciences', 'Exam Preparation'],
+    'Real Estate Agent': ['Residential Sales', 'Commercial Property', 'Lettings'],
+    'IT Consultant': ['Cloud', 'Networking', 'Cybersecurity'],
+    'Caterer': ['Events', 'Corporate Catering', 'Small Chops']
+}
+
+# (country, weight, [(state, city, weight), ...])
+LOCATIONS = [
+    ('Nigeria', 45, [('Lagos', 'Lagos', 40), ('FCT', 'Abuja', 20), ('Rivers', 'Port Harcourt', 12),
+                     ('Oyo', 'Ibadan', 10), ('Kano', 'Kano', 8), ('Enugu', 'Enugu', 6), ('Edo', 'Benin City', 4)]),
+    ('Ghana', 15, [('Greater Accra', 'Accra', 60), ('Ashanti', 'Kumasi', 30), ('Western', 'Takoradi', 10)]),
+    ('Kenya', 15, [('Nairobi', 'Nairobi', 65), ('Mombasa', 'Mombasa', 20), ('Kisumu', 'Kisumu', 15)]),
+    ('South Africa', 12, [('Gauteng', 'Johannesburg', 45), ('Western Cape', 'Cape Town', 35),
+                          ('KwaZulu-Natal', 'Durban', 20)]),
+    ('Egypt', 5, [('Cairo', 'Cairo', 70), ('Alexandria', 'Alexandria', 30)]),
+    ('Rwanda', 3, [('Kigali', 'Kigali', 100)]),
+    ('United Kingdom', 3, [('England', 'London', 70), ('England', 'Manchester', 30)]),
+    ('United States', 2, [('New York', 'New York', 50), ('Texas', 'Houston', 50)])
+]
+
+FIRST_NAMES = ['Sarah', 'Chinedu', 'Amina', 'Kwame', 'Fatima', 'Tunde', 'Grace', 'Wanjiru', 'Thabo', 'Ngozi',
+               'Emeka', 'Aisha', 'Kofi', 'Zanele', 'Ibrahim', 'Adaeze', 'Yaw', 'Njeri', 'Sipho', 'Halima',
+               'David', 'Mary', 'Samuel', 'Esther', 'Joseph', 'Blessing', 'Daniel', 'Joy', 'Michael', 'Ruth']
+LAST_NAMES = ['Johnson', 'Okafor', 'Bello', 'Mensah', 'Adeyemi', 'Kamau', 'Nkosi', 'Eze', 'Owusu', 'Abubakar',
+              'Odhiambo', 'Dlamini', 'Boateng', 'Ogunleye', 'Mwangi', 'Naidoo', 'Musa', 'Asante', 'Okeke', 'Hassan']
+LANGUAGES = {
+    'Nigeria': ['Yoruba', 'Igbo', 'Hausa', 'Pidgin'], 'Ghana': ['Twi', 'Ga'], 'Kenya': ['Swahili'],
+    'South Africa': ['Zulu', 'Afrikaans', 'Xhosa'], 'Egypt': ['Arabic'], 'Rwanda': ['Kinyarwanda', 'French']
+}
+BIO_OPENERS = ['Experienced', 'Certified', 'Dedicated', 'Award-winning', 'Detail-oriented', 'Friendly']
+BIO_FOCUS = ['small businesses', 'families', 'startups', 'individuals', 'NGOs', 'corporate clients', 'students']
+BIO_CLOSERS = [
+    'I provide practical, results-driven support tailored to each client.',
+    'Clients value my clear communication and reliable turnaround.',
+    'I combine local knowledge with international best practice.',
+    'Available for both one-off consultations and long-term engagements.'
+]
+REVIEW_COMMENTS = {
+    5: ['Outstanding service, highly recommended!', 'Exceeded my expectations.', 'Very professional and kind.'],
+    4: ['Great experience overall.', 'Knowledgeable and responsive.', 'Would hire again.'],
+    3: ['Decent service, a bit slow.', 'Okay, but communication could improve.'],
+    2: ['Not what I expected.', 'Missed a couple of deadlines.'],
+    1: ['Poor experience.', 'Would not recommend.']
+}
+RATING_WEIGHTS = [(5, 55), (4, 25), (3, 10), (2, 5), (1, 5)]
+
+
+def _weighted(rng, pairs):
+    """Pick from [(value, weight), ...]"""
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights)[0]
+
+
+def _iso(value):
+    return value.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class MarketplaceDatasetGenerator:
+    """Deterministic, streaming generator of professionals and their reviews.
+
+    Documents use the same shape /auth/register and POST /reviews store, with
+    verification, featured/subscription state and ratings filled in. Nothing is
+    retained between items, so any number of rows can be streamed.
+    """
+
+    def __init__(self, seed=42, approved_ratio=0.85, featured_ratio=0.05, now=None,
+                 password_hash=SEED_PASSWORD_BCRYPT):
+        self.seed = seed
+        self.approved_ratio = approved_ratio
+        self.featured_ratio = featured_ratio
+        now = now or datetime.now(timezone.utc)
+        self.now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        self.password_hash = password_hash
+        self.category_weights = [(c, 1.0 / (rank + 1) ** CATEGORY_SKEW) for rank, c in enumerate(CATEGORY_POPULARITY)]
+        self.country_weights = [(entry, entry[1]) for entry in LOCATIONS]
+
+    def _location(self, rng):
+        country, _, cities = _weighted(rng, self.country_weights)
+        state, city, _ = _weighted(rng, [(c, c[2]) for c in cities])
+        return {'country': country, 'state': state, 'city': city}
+
+    def _review_count(self, rng, status):
+        if status != 'approved':
+            return 0
+        # Heavy tail: most experts have a handful of reviews, a few have thousands
+        return min(5000, int(rng.paretovariate(1.3)) - 1) if rng.random() < 0.7 else 0
+
+    def professional(self, index):
+        """Return (professional, reviews) for row `index`; each row has its own RNG seeded from
+        (seed, index), so a row is the same whichever range it is generated in"""
+        rng = random.Random(f"{self.seed}:{index}")
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        category = _weighted(rng, self.category_weights)
+        subcategory = rng.choice(SUBCATEGORIES.get(category, [''])) if rng.random() < 0.7 else ''
+        location = self._location(rng)
+        experience = max(1, min(40, int(rng.gammavariate(2.0, 4.0))))
+        created_at = self.now - timedelta(seconds=rng.randint(0, 3 * 365 * 24 * 3600))
+        status = 'approved' if rng.random() < self.approved_ratio else rng.choice(['pending', 'pending', 'rejected'])
+        professional_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        full_name = f"{first} {last}"
+
+        focus = rng.choice(BIO_FOCUS)
+        bio = (f"{rng.choice(BIO_OPENERS)} {category.lower()} with {experience} years of experience "
+               f"{'in ' + subcategory.lower() + ' ' if subcategory else ''}serving {focus} in {location['city']}. "
+               f"{rng.choice(BIO_CLOSERS)}")
+
+        in_person = rng.random() < 0.6
+        professional = {
+            'id': professional_id,
+            'fullName': full_name,
+            'email': f"{first.lower()}.{last.lower()}.{self.seed}.{index}@seed.expertbridge.com",
+            'phone': f"+{rng.randint(20, 299)}-{rng.randint(100, 999)}-{rng.randint(1000000, 9999999)}",
+            'password': self.password_hash,
+            'category': category,
+            'subcategory': subcategory,
+            'bio': bio,
+            'experience': experience,
+            'location': location,
+            'serviceOptions': {
+                'inPerson': in_person,
+                'virtual': not in_person or rng.random() < 0.7,
+                'serviceRadius': rng.choice(['city', 'city', 'state', 'country'])
+            },
+            'languages': ['English'] + rng.sample(LANGUAGES.get(location['country'], []),
+                                                  min(len(LANGUAGES.get(location['country'], [])), rng.randint(0, 2))),
+            'socialLinks': {'linkedin': f"https://linkedin.com/in/{first.lower()}{last.lower()}{index}"}
+            if rng.random() < 0.5 else {},
+            'profilePhoto': {
+                'url': f"https://ui-avatars.com/api/?name={first}+{last}&background=3b82f6&color=fff&size=200",
+                'publicId': None
+            },
+            'verification': {
+                'status': status,
+                'idCard': None,
+                'certificate': None,
+                'officePhoto': None,
+                'additionalDocs': [],
+                'rejectionReason': 'Does not meet requirements' if status == 'rejected' else None,
+                'verifiedAt': created_at + timedelta(days=1) if status == 'approved' else None,
+                'verifiedBy': 'seed' if status == 'approved' else None
+            },
+            'featured': {'isFeatured': False, 'featuredUntil': None, 'featuredTier': 'basic'},
+            'subscription': {'plan': None, 'status': 'inactive', 'startDate': None, 'endDate': None,
+                             'paystackRef': None},
+            'analytics': {
+                'profileViews': int(rng.paretovariate(1.1) * 10) if status == 'approved' else 0,
+                'contactClicks': 0,
+                'lastViewedAt': None
+            },
+            'ratings': {'average': 0, 'count': 0, 'sum': 0, 'histogram': {str(star): 0 for star in range(1, 6)}},
+            'isActive': True,
+            'isEmailVerified': rng.random() < 0.8,
+            'createdAt': created_at,
+            'updatedAt': created_at
+        }
+        professional['analytics']['contactClicks'] = int(professional['analytics']['profileViews'] * rng.uniform(0, 0.1))
+
+        if status == 'approved' and rng.random() < self.featured_ratio:
+            plan = rng.choice(['monthly', 'monthly', 'yearly'])
+            start = self.now - timedelta(days=rng.randint(0, 29 if plan == 'monthly' else 364))
+            end = start + timedelta(days=30 if plan == 'monthly' else 365)
+            professional['subscription'] = {'plan': plan, 'status': 'active', 'startDate': start, 'endDate': end,
+                                            'paystackRef': f"seed_{professional_id}"}
+            professional['featured'] = {'isFeatured': True, 'featuredUntil': end, 'featuredTier': plan}
+
+        reviews = []
+        ratings = professional['ratings']
+        for _ in range(self._review_count(rng, status)):
+            rating = _weighted(rng, RATING_WEIGHTS)
+            ratings['sum'] += rating
+            ratings['histogram'][str(rating)] += 1
+            reviews.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'professionalId': professional_id,
+                'clientName': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)[0]}.",
+                'clientEmail': f"client{rng.randint(1, 10 ** 9)}@example.com",
+                'rating': rating,
+                'comment': rng.choice(REVIEW_COMMENTS[rating]),
+                'isVerified': False,
+                'status': 'approved',
+                'createdAt': created_at + timedelta(seconds=rng.randint(0, max(1, int((self.now - created_at).total_seconds()))))
+            })
+        if reviews:
+            ratings['count'] = len(reviews)
+            ratings['average'] = round(ratings['sum'] / len(reviews) * 10) / 10
+        return professional, reviews
+
+    def generate(self, count, start=0):
+        """Yield (professional, reviews) for rows start..start+count-1"""
+        for index in range(start, start + count):
+            yield self.professional(index)
+
+
+def registration_payload(professional, password=SEED_PASSWORD):
+    """Body for POST /auth/register built from a generated professional"""
+    return {
+        'fullName': professional['fullName'],
+        'email': professional['email'],
+        'phone': professional['phone'],
+        'password': password,
+        'category': professional['category'],
+        'subcategory': professional['subcategory'],
+        'bio': professional['bio'],
+        'experience': professional['experience'],
+        'location': professional['location'],
+        'serviceOptions': professional['serviceOptions'],
+        'languages': professional['languages'],
+        'socialLinks': professional['socialLinks']
+    }
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_ndjson(generator, count, professionals_path, reviews_path=None, batch_size=DEFAULT_BATCH_SIZE,
+                 mongo_dates=False):
+    """Stream `count` professionals (and reviews) to NDJSON files one batch at a time"""
+    def encode(value):
+        if isinstance(value, datetime):
+            return {'$date': _iso(value)} if mongo_dates else _iso(value)
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    written = reviews_written = 0
+    started = time.perf_counter()
+    with open(professionals_path, 'w') as pro_file, \
+            (open(reviews_path, 'w') if reviews_path else contextlib.nullcontext()) as review_file:
+        for batch in batched(generator.generate(count), batch_size):
+            pro_file.write(''.join(json.dumps(p, default=encode) + '\n' for p, _ in batch))
+            if reviews_path:
+                lines = [json.dumps(r, default=encode) + '\n' for _, reviews in batch for r in reviews]
+                review_file.write(''.join(lines))
+                reviews_written += len(lines)
+            written += len(batch)
+            print(f"  📝 {written}/{count} professionals ({written / (time.perf_counter() - started):.0f}/s)",
+                  end='\r', file=sys.stderr)
+    print(file=sys.stderr)
+    return written, reviews_written
+
+
+def seed_api(generator, count, base_url, concurrency=16, batch_size=DEFAULT_BATCH_SIZE, approve=True,
+             max_reviews=5):
+    """Register generated professionals through the API with bounded concurrency.
+
+    Only what the public API accepts can be seeded this way: profiles are
+    registered, optionally approved by the default admin, and given up to
+    `max_reviews` reviews each. Featured state needs direct database seeding.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, pool_block=True)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    admin_token = None
+    if approve:
+        response = session.post(f"{base_url}/auth/admin/login",
+                                json={'email': 'admin@expertbridge.com', 'password': 'admin123'})
+        if response.status_code == 200:
+            admin_token = response.json()['token']
+        else:
+            print(f"⚠️  Admin login failed (HTTP {response.status_code}); professionals stay pending")
+
+    counts = {'registered': 0, 'approved': 0, 'reviews': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def seed_one(item):
+        professional, reviews = item
+        result = {'registered': 0, 'approved': 0, 'reviews': 0, 'errors': 0}
+        try:
+            response = session.post(f"{base_url}/auth/register", json=registration_payload(professional))
+            if response.status_code != 200:
+                result['errors'] += 1
+                return result
+            result['registered'] += 1
+            professional_id = response.json()['professional']['id']
+            if admin_token and professional['verification']['status'] == 'approved':
+                response = session.put(f"{base_url}/admin/approve/{professional_id}",
+                                       headers={'Authorization': f'Bearer {admin_token}'})
+                result['approved' if response.status_code == 200 else 'errors'] += 1
+            for review in reviews[:max_reviews]:
+                response = session.post(f"{base_url}/reviews", json={
+                    'professionalId': professional_id,
+                    'clientName': review['clientName'],
+                    'clientEmail': review['clientEmail'],
+                    'rating': review['rating'],
+                    'comment': review['comment']
+                })
+                result['reviews' if response.status_code == 200 else 'errors'] += 1
+        except requests.exceptions.RequestException:
+            result['errors'] += 1
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # One batch in flight at a time keeps memory flat regardless of `count`
+        for batch in batched(generator.generate(count), batch_size):
+            for result in executor.map(seed_one, batch):
+                with lock:
+                    for key, value in result.items():
+                        counts[key] += value
+            done = counts['registered'] + counts['errors']
+            print(f"  🌱 {counts['registered']}/{count} registered ({done / (time.perf_counter() - started):.0f}/s)",
+                  end='\r', file=sys.stderr)
+    print(file=sys.stderr)
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate and bulk-seed synthetic ExpertBridge marketplace data")
+    parser.add_argument('count', type=int, help="Number of professionals to generate")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (same seed, same data)")
+    parser.add_argument('--approved-ratio', type=float, default=0.85)
+    parser.add_argument('--featured-ratio', type=float, default=0.05)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--ndjson', metavar='PATH', help="Write professionals as NDJSON to PATH")
+    parser.add_argument('--reviews-ndjson', metavar='PATH', help="Write reviews as NDJSON to PATH")
+    parser.add_argument('--mongo-dates', action='store_true',
+                        help="Encode dates as Extended JSON {\"$date\": ...} for mongoimport")
+    parser.add_argument('--api', metavar='BASE_URL', help="Register professionals through a running API")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent requests in --api mode")
+    parser.add_argument('--no-approve', action='store_true', help="Leave API-seeded professionals pending")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.ndjson and not args.api:
+        print("❌ Nothing to do: pass --ndjson PATH and/or --api BASE_URL")
+        sys.exit(2)
+
+    generator = MarketplaceDatasetGenerator(seed=args.seed, approved_ratio=args.approved_ratio,
+                                            featured_ratio=args.featured_ratio)
+
+    if args.ndjson:
+        professionals, reviews = write_ndjson(generator, args.count, args.ndjson, args.reviews_ndjson,
+                                              batch_size=args.batch_size, mongo_dates=args.mongo_dates)
+        print(f"✅ Wrote {professionals} professionals to {args.ndjson}"
+              + (f" and {reviews} reviews to {args.reviews_ndjson}" if args.reviews_ndjson else ''))
+
+    if args.api:
+        counts = seed_api(generator, args.count, args.api, concurrency=args.concurrency,
+                          batch_size=args.batch_size, approve=not args.no_approve)
+        print(f"✅ Seeded {args.api}: {counts}")
+        sys.exit(0 if counts['errors'] == 0 else 1)
@@ -0,0 +1,1918 @@
+#!/usr/bin/env python3
+"""
+ExpertBridge Local API Server
+In-process stand-in for app/api/[[...path]]/route.js backed by an in-memory
+store, so functional and performance runs are repeatable offline
+"""
+
+import argparse
+import base64
+import copy
+import csv
+import gzip
+import io
+import hashlib
+import heapq
+import hmac
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+from backend_dataset import SEED_PASSWORD, MarketplaceDatasetGenerator
+
+# Configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 3001
+JWT_SECRET = "expertbridge-secret-key-2024"
+TOKEN_TTL = 7 * 24 * 60 * 60
+PASSWORD_ITERATIONS = 20000  # default pbkdf2 rounds; stands in for BCRYPT_COST 10
+
+# Search indexing, mirroring buildSearchFields in route.js
+SEARCH_MIN_PREFIX = 2
+SEARCH_MAX_PREFIX = 15
+SEARCH_MAX_BIO_WORDS = 60
+SEARCH_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'i', 'in', 'is', 'it',
+    'my', 'of', 'on', 'or', 'our', 'the', 'to', 'with', 'we', 'you', 'your', 'over', 'years'
+}
+
+# Request spans and /metrics, mirroring the INSTRUMENTATION section of route.js
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+_spans = threading.local()
+
+# Search facets, mirroring the SEARCH FACETS section of route.js
+RATING_BUCKETS = [0, 1, 2, 3, 4]
+EXPERIENCE_BANDS = [0, 3, 6, 11, 21]
+FACET_LIMIT = 50
+
+# Geo search, mirroring the GEO SEARCH section of route.js
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib', 'gazetteer.json')
+SERVICE_RADIUS_KM = {'city': 50, 'state': 250, 'country': 1500}
+GEO_DEFAULT_KM = 50
+GEO_MAX_KM = 2000
+EARTH_RADIUS_KM = 6378.1  # the sphere MongoDB uses for 2dsphere distances
+
+SUBSCRIPTION_PLANS = {
+    'monthly': {
+        'id': 'monthly',
+        'name': 'Monthly Subscription',
+        'amount': 1500000,
+        'currency': 'NGN',
+        'duration': 30,
+        'benefits': ['Featured Expert Carousel', 'Verified Badge', 'Social Media Promotions']
+    },
+    'yearly': {
+        'id': 'yearly',
+        'name': 'Yearly Subscription',
+        'amount': 4000000,
+        'currency': 'NGN',
+        'duration': 365,
+        'benefits': ['Featured Expert Carousel', 'Verified Badge', 'Social Media Promotions', 'Google Ads Inclusion']
+    }
+}
+
+# Outbound job queue, mirroring the JOB QUEUE section of route.js
+JOB_CONCURRENCY = 4
+JOB_MAX_ATTEMPTS = 5
+JOB_BACKOFF_BASE = 2.0  # seconds, doubled per attempt
+JOB_BACKOFF_MAX = 600.0
+JOB_PRIORITY = {'profile_photo': 5}  # claimed highest first among due jobs, like route.js
+JOB_STATS_WINDOW = timedelta(days=1)  # finished jobs counted by /admin/jobs
+EMAIL_BATCH_SIZE = 100
+MODERATION_BATCH_MAX = 5000
+MODERATION_STATUS = {'approve': 'approved', 'reject': 'rejected'}
+
+# Listing projections and response compression, mirroring LIST PROJECTIONS / COMPRESSION in route.js
+LIST_FIELDS = [
+    'id', 'fullName', 'category', 'subcategory', 'bio', 'experience', 'languages', 'socialLinks',
+    'location', 'location.country', 'location.state', 'location.city', 'serviceOptions',
+    'profilePhoto', 'profilePhoto.url', 'ratings', 'ratings.average', 'ratings.count',
+    'featured', 'featured.isFeatured', 'featured.featuredUntil', 'verification.status',
+    'createdAt', 'updatedAt', 'distanceKm'
+]
+CARD_FIELDS = [
+    'id', 'fullName', 'category', 'experience', 'location.country', 'location.city', 'serviceOptions',
+    'profilePhoto.url', 'ratings.average', 'ratings.count', 'featured.isFeatured', 'featured.featuredUntil',
+    'verification.status', 'distanceKm'
+]
+CARD_BIO_CHARS = 160
+COMPRESS_MIN_BYTES = 1024
+
+# Request capture, mirroring REQUEST CAPTURE in route.js
+CAPTURE_FORMAT = 'expertbridge-capture'
+CAPTURE_BODY_MAX = 64 * 1024
+CAPTURE_SECRET_FIELDS = ('password', 'currentPassword', 'newPassword')
+CAPTURE_HASHED_FIELDS = ('email', 'clientEmail')
+CAPTURE_PII_FIELDS = ('fullName', 'clientName', 'phone', 'comment')
+
+# Streaming export, mirroring the EXPORT section of route.js
+EXPORT_FIELDS = [
+    'id', 'fullName', 'email', 'phone', 'category', 'subcategory', 'experience',
+    'location.country', 'location.state', 'location.city', 'verification.status',
+    'featured.isFeatured', 'featured.featuredUntil', 'subscription.plan', 'subscription.status',
+    'ratings.average', 'ratings.count', 'analytics.profileViews', 'analytics.contactClicks',
+    'isActive', 'createdAt', 'updatedAt'
+]
+EXPORT_DEFAULT_FIELDS = ['id', 'fullName', 'email', 'category', 'location.country', 'location.city',
+                         'verification.status', 'createdAt']
+
+CATEGORIES = [
+    'Psychologist', 'Lawyer', 'Financial Advisor', 'Career Coach',
+    'Business Consultant', 'Physiotherapist', 'Nutritionist',
+    'Accountant', 'Architect', 'Marriage Counselor', 'Tax Consultant',
+    'Real Estate Agent', 'IT Consultant', 'Marketing Consultant',
+    'HR Consultant', 'Life Coach', 'Immigration Consultant',
+    'Event Planner', 'Interior Designer', 'Education Consultant',
+    'Web Developer', 'Graphics Designer', 'Teacher', 'Housing Agent', 'Caterer'
+]
+
+
+def utcnow():
+    # Millisecond precision, like BSON dates, so cursors round-trip exactly
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def parse_timestamp(value):
+    """ISO 8601 timestamp as an aware datetime (UTC when no offset is given), or None if invalid"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def to_json(value):
+    """json.dumps default: serialize datetimes the way the Mongo driver does"""
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def route_label(route):
+    """Ids and references collapse to :id so metric labels stay bounded"""
+    return '/'.join(':id' if re.search(r'\d', seg) and len(seg) >= 8 else seg for seg in route.split('/'))
+
+
+def record_phase(name, ms, desc=None, docs=0):
+    """Add `ms` to a phase of the current thread's request span; store reads count as queries"""
+    span = getattr(_spans, 'span', None)
+    if span is None:
+        return
+    phase = span['phases'].setdefault(name, {'ms': 0.0, 'count': 0, 'desc': set(), 'docs': 0})
+    phase['ms'] += ms
+    phase['count'] += 1
+    phase['docs'] += docs
+    if desc:
+        phase['desc'].add(desc)
+    if name.startswith('db-'):
+        span['queries'] += 1
+        span['docs'] += docs
+
+
+def server_timing(span, total_ms):
+    """Server-Timing header value in the format route.js emits"""
+    entries = [f'total;dur={total_ms:.1f}']
+    if span['queries']:
+        db_ms = sum(p['ms'] for name, p in span['phases'].items() if name.startswith('db-'))
+        entries.append(f'db;dur={db_ms:.1f};desc="{span["queries"]} queries, {span["docs"]} docs"')
+    for name, phase in span['phases'].items():
+        desc = f"{' '.join(sorted(phase['desc']))} x{phase['count']}" if phase['desc'] else f"x{phase['count']}"
+        entries.append(f'{name};dur={phase["ms"]:.1f};desc="{desc}"')
+    return ', '.join(entries)
+
+
+def hash_password(password, salt=None, iterations=PASSWORD_ITERATIONS):
+    """pbkdf2$<iterations>$<salt>$<digest>; hashlib releases the GIL, so handler threads keep serving"""
+    started = time.perf_counter()
+    salt = salt or uuid.uuid4().hex[:16]
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+    record_phase('bcrypt', (time.perf_counter() - started) * 1000)
+    return f"pbkdf2${iterations}${salt}${digest}"
+
+
+def password_rounds(hashed):
+    """Iterations a stored hash was made with (hashes without the field used PASSWORD_ITERATIONS)"""
+    parts = hashed.split('$') if isinstance(hashed, str) else []
+    return int(parts[1]) if len(parts) == 4 and parts[1].isdigit() else PASSWORD_ITERATIONS
+
+
+def check_password(password, hashed):
+    try:
+        *_, salt, digest = hashed.split('$')
+    except (AttributeError, ValueError):
+        return False
+    return hmac.compare_digest(hash_password(password, salt, password_rounds(hashed)).split('$')[-1], digest)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def sign_token(payload):
+    """HS256 JWT compatible with the jsonwebtoken tokens route.js issues"""
+    now = int(time.time())
+    claims = dict(payload, iat=now, exp=now + TOKEN_TTL)
+    header = _b64(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+    body = _b64(json.dumps(claims, separators=(',', ':')).encode())
+    signature = hmac.new(JWT_SECRET.encode(), f"{header}.{body}".encode(), hashlib.sha256).digest()
+    return f"{header}.{body}.{_b64(signature)}"
+
+
+def verify_token(auth_header):
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    started = time.perf_counter()
+    try:
+        return _verify_token(auth_header)
+    finally:
+        record_phase('jwt', (time.perf_counter() - started) * 1000)
+
+
+def _verify_token(auth_header):
+    try:
+        header, body, signature = auth_header.split(' ')[1].split('.')
+        expected = hmac.new(JWT_SECRET.encode(), f"{header}.{body}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _unb64(signature)):
+            return None
+        claims = json.loads(_unb64(body))
+    except (ValueError, IndexError):
+        return None
+    if claims.get('exp', 0) < time.time():
+        return None
+    return claims
+
+
+def safe(professional):
+    return {k: v for k, v in professional.items() if k != 'password'}
+
+
+def project(document, paths, card=False):
+    """Copy just the dotted `paths` of a document, like a Mongo inclusion projection"""
+    shaped = {}
+    for path in paths:
+        *parents, leaf = path.split('.')
+        source, target = document, shaped
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            target = target.setdefault(key, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+    if card:
+        shaped['bio'] = (document.get('bio') or '')[:CARD_BIO_CHARS]
+    return shaped
+
+
+def list_projection(params, sort_fields):
+    """(shape, error) for ?view=card / ?fields=a,b; `id` and the sort keys are always kept"""
+    view = params.get('view', [None])[0]
+    requested = params.get('fields', [None])[0]
+    if view not in (None, 'card', 'full'):
+        return None, f'Unknown view: {view}'
+    if requested is None and view != 'card':
+        return safe, None
+    fields = [f.strip() for f in requested.split(',') if f.strip()] if requested else CARD_FIELDS
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    paths = list(dict.fromkeys(['id', *fields, *sort_fields]))
+    paths = [path for path in paths if not any(path.startswith(other + '.') for other in paths)]
+    card = view == 'card' and not requested
+    return (lambda professional: project(professional, paths, card)), None
+
+
+def negotiate_encoding(accept_encoding):
+    """gzip when Accept-Encoding allows it, else None (the stdlib has no brotli encoder)"""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        name, *options = [token.strip() for token in part.lower().split(';')]
+        q = next((option[2:] for option in options if option.startswith('q=')), None)
+        try:
+            weights[name] = float(q) if q is not None else 1.0
+        except ValueError:
+            weights[name] = 0.0
+    return 'gzip' if weights.get('gzip', weights.get('*', 0)) > 0 else None
+
+
+def empty_ratings():
+    return {'average': 0, 'count': 0, 'sum': 0, 'histogram': {str(star): 0 for star in range(1, 6)}}
+
+
+def new_professional(fields, hashed_password, created_at=None):
+    """Build a professional document with the same shape /auth/register stores"""
+    created_at = created_at or utcnow()
+    location = fields.get('location') or {}
+    service_options = fields.get('serviceOptions') or {}
+    return {
+        'id': fields.get('id') or str(uuid.uuid4()),
+        'fullName': fields['fullName'],
+        'email': fields['email'].lower(),
+        'phone': fields.get('phone') or '',
+        'password': hashed_password,
+        'category': fields['category'],
+        'subcategory': fields.get('subcategory') or '',
+        'bio': fields['bio'],
+        'experience': int(fields['experience']),
+        'location': {
+            'country': location.get('country') or '',
+            'state': location.get('state') or '',
+            'city': location.get('city') or ''
+        },
+        'serviceOptions': {
+            'inPerson': service_options.get('inPerson') or False,
+            'virtual': service_options.get('virtual') or True,
+            'serviceRadius': service_options.get('serviceRadius') or 'city'
+        },
+        'languages': fields.get('languages') or ['English'],
+        'socialLinks': fields.get('socialLinks') or {},
+        'profilePhoto': {'url': f"https://ui-avatars.com/api/?name={fields['fullName']}", 'publicId': None},
+        'verification': {
+            'status': fields.get('status') or 'pending',
+            'idCard': None,
+            'certificate': None,
+            'officePhoto': None,
+            'additionalDocs': [],
+            'rejectionReason': None,
+            'verifiedAt': None,
+            'verifiedBy': None
+        },
+        'featured': {'isFeatured': False, 'featuredUntil': None, 'featuredTier': 'basic'},
+        'subscription': {'plan': None, 'status': 'inactive', 'startDate': None, 'endDate': None, 'paystackRef': None},
+        'analytics': {'profileViews': 0, 'contactClicks': 0, 'lastViewedAt': None},
+        'ratings': empty_ratings(),
+        'isActive': True,
+        'isEmailVerified': False,
+        'createdAt': created_at,
+        'updatedAt': created_at
+    }
+
+
+def normalize_text(value):
+    """Lowercase, strip accents and punctuation"""
+    decomposed = unicodedata.normalize('NFD', str(value or ''))
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', stripped).strip()
+
+
+def tokenize(value):
+    return [w for w in normalize_text(value).split(' ') if w and w not in SEARCH_STOPWORDS]
+
+
+def prefixes(words):
+    out = set()
+    for word in words:
+        if len(word) < SEARCH_MIN_PREFIX:
+            out.add(word)
+            continue
+        for i in range(SEARCH_MIN_PREFIX, min(len(word), SEARCH_MAX_PREFIX) + 1):
+            out.add(word[:i])
+    return out
+
+
+def build_search_fields(professional):
+    name_words = tokenize(professional['fullName']) + tokenize(professional['subcategory']) + tokenize(professional['category'])
+    bio_words = list(dict.fromkeys(tokenize(professional['bio'])))[:SEARCH_MAX_BIO_WORDS]
+    return {
+        'tokens': prefixes(name_words + bio_words),
+        'nameTokens': prefixes(name_words),
+        'country': normalize_text(professional['location'].get('country')),
+        'city': normalize_text(professional['location'].get('city')),
+        **geo_fields(professional)
+    }
+
+
+def load_gazetteer(path=GAZETTEER_PATH):
+    """(lng, lat) lookups keyed like GAZETTEER in route.js; the first city listed for a state stands in for it"""
+    by_city, by_city_name, by_state = {}, {}, {}
+    with open(path) as f:
+        places = json.load(f)['places']
+    for place in places:
+        point = (place['lng'], place['lat'])
+        city, state, country = (normalize_text(place[k]) for k in ('city', 'state', 'country'))
+        by_city.setdefault((city, country), point)
+        by_city_name.setdefault(city, point)
+        by_state.setdefault((state, country), point)
+    return {'by_city': by_city, 'by_city_name': by_city_name, 'by_state': by_state}
+
+
+GAZETTEER = load_gazetteer()
+
+
+def geocode_location(location):
+    """(lng, lat) for a {city, state, country} location, or None when the gazetteer does not know it"""
+    location = location or {}
+    city, state, country = (normalize_text(location.get(k)) for k in ('city', 'state', 'country'))
+    if city:
+        point = GAZETTEER['by_city'].get((city, country)) if country else GAZETTEER['by_city_name'].get(city)
+        if point:
+            return point
+    return GAZETTEER['by_state'].get((state, country)) if state and country else None
+
+
+def geo_fields(professional):
+    point = geocode_location(professional.get('location'))
+    if not point:
+        return {}
+    radius = (professional.get('serviceOptions') or {}).get('serviceRadius')
+    return {'geo': point, 'radiusKm': SERVICE_RADIUS_KM.get(radius, SERVICE_RADIUS_KM['city'])}
+
+
+def search_facets(professionals):
+    """Facet counts over a matched set, in the shape formatFacets returns in route.js"""
+    def counts(values):
+        return [{'value': v, 'count': c}
+                for v, c in sorted(Counter(values).items(), key=lambda kv: (-kv[1], str(kv[0])))[:FACET_LIMIT]]
+
+    def bands(bounds, values):
+        # Values outside every band make up the trailing 'other' band, like the $bucket default
+        hist = Counter(next(b for b in reversed(bounds) if v >= b)
+                       if isinstance(v, (int, float)) and not isinstance(v, bool) and v >= bounds[0] else 'other'
+                       for v in values)
+        result = [{'min': b, 'max': bounds[i + 1] if i + 1 < len(bounds) else None, 'count': hist[b]}
+                  for i, b in enumerate(bounds)]
+        if hist['other']:
+            result.append({'min': None, 'max': None, 'count': hist['other']})
+        return result
+
+    return {
+        'category': counts(p['category'] for p in professionals),
+        'country': counts(p['location'].get('country') for p in professionals),
+        'serviceType': {'virtual': sum(1 for p in professionals if p['serviceOptions'].get('virtual') is True),
+                        'inPerson': sum(1 for p in professionals if p['serviceOptions'].get('inPerson') is True)},
+        'rating': bands(RATING_BUCKETS, [p['ratings']['average'] or 0 for p in professionals]),
+        'experience': bands(EXPERIENCE_BANDS, [p.get('experience') or 0 for p in professionals])
+    }
+
+
+def distance_km(a, b):
+    """Great-circle (haversine) distance between two (lng, lat) points"""
+    lng1, lat1, lng2, lat2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def search_terms(keyword):
+    return list(dict.fromkeys(w[:SEARCH_MAX_PREFIX] for w in tokenize(keyword)))
+
+
+def field_value(doc, field):
+    value = doc
+    for part in field.split('.'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def comparable(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return 0 if value is None else value
+
+
+def sort_key(fields, computed=None):
+    """Multi-field sort key over dotted paths; sort with reverse=True for descending order.
+
+    `computed` maps pseudo-fields (such as search relevance) to functions of the document.
+    """
+    computed = computed or {}
+
+    def key(doc):
+        return tuple(comparable(computed[f](doc) if f in computed else field_value(doc, f)) for f in fields)
+    return key
+
+
+def encode_cursor(doc, fields, computed=None):
+    """Opaque cursor in the same format route.js uses: base64url JSON of the sort values"""
+    computed = computed or {}
+    values = []
+    for field in fields:
+        value = computed[field](doc) if field in computed else field_value(doc, field)
+        values.append({'$date': to_json(value)} if isinstance(value, datetime) else value)
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor, fields):
+    """Comparable sort-value tuple for a cursor, or None when it is malformed"""
+    try:
+        values = json.loads(_unb64(cursor))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    return tuple(comparable(datetime.fromisoformat(v['$date'].replace('Z', '+00:00'))
+                            if isinstance(v, dict) and '$date' in v else v) for v in values)
+
+
+def professional_stats(professional):
+    """Counters one professional contributes to the stats snapshot (same keys as route.js)"""
+    if not professional:
+        return {}
+    status = professional['verification']['status']
+    category = professional['category']
+    return {
+        'professionals.total': 1,
+        f'professionals.{status}': 1,
+        f'categories.{category}.total': 1,
+        f'categories.{category}.listed': 1 if status == 'approved' and professional['isActive'] else 0
+    }
+
+
+class MarketplaceStore:
+    """In-memory collections mirroring the professionals/admins/reviews/subscriptions collections"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.professionals = {}
+        self.by_email = {}
+        self.admins = {}
+        self.reviews = {}
+        self.reviews_by_professional = {}
+        self.subscriptions = []
+        # Inverted index: token prefix -> ids, plus per-id search fields
+        self.search_index = {}
+        self.search_fields = {}
+        # Materialized counters behind /admin/stats and /categories
+        self.stats = Counter()
+        # Buffered view/contact increments keyed (professionalId, day), and the flushed daily buckets
+        self.analytics_buffer = {}
+        self.analytics_daily = {}
+
+    def seed(self, count, seed=42):
+        """Load `count` generated professionals (password SEED_PASSWORD) and their reviews"""
+        generator = MarketplaceDatasetGenerator(seed=seed, password_hash=hash_password(SEED_PASSWORD))
+        with self.lock:
+            for professional, reviews in generator.generate(count):
+                self.insert_professional(professional)
+                for review in reviews:
+                    self.insert_review(review)
+
+    def insert_professional(self, professional):
+        with self.lock:
+            self.professionals[professional['id']] = professional
+            self.by_email[professional['email']] = professional
+            self.index_professional(professional)
+            self.update_stats(professional_stats(professional))
+
+    def index_professional(self, professional):
+        with self.lock:
+            self.unindex_professional(professional['id'])
+            fields = build_search_fields(professional)
+            self.search_fields[professional['id']] = fields
+            for token in fields['tokens']:
+                self.search_index.setdefault(token, set()).add(professional['id'])
+
+    def unindex_professional(self, professional_id):
+        fields = self.search_fields.pop(professional_id, None)
+        if fields:
+            for token in fields['tokens']:
+                postings = self.search_index.get(token)
+                postings.discard(professional_id)
+                if not postings:
+                    del self.search_index[token]
+
+    def search_candidates(self, terms):
+        """Ids containing every term, intersecting the shortest posting lists first"""
+        started = time.perf_counter()
+        postings = sorted((self.search_index.get(t, set()) for t in terms), key=len)
+        result = set(postings[0]) if postings else set()
+        for ids in postings[1:]:
+            result &= ids
+        record_phase('db-tokens', (time.perf_counter() - started) * 1000, 'search_index', len(result))
+        return result
+
+    def delete_professional(self, professional_id):
+        with self.lock:
+            professional = self.professionals.pop(professional_id)
+            self.by_email.pop(professional['email'], None)
+            self.unindex_professional(professional_id)
+            self.update_stats(before=professional_stats(professional))
+            for review in self.reviews_by_professional.pop(professional_id, []):
+                self.reviews.pop(review['id'], None)
+                self.update_stats(before=self.review_stats(review))
+            for subscription in self.subscriptions:
+                if subscription['professionalId'] == professional_id and subscription['status'] == 'completed':
+                    self.update_stats(before={'subscriptions.completed': 1})
+            self.subscriptions = [s for s in self.subscriptions if s['professionalId'] != professional_id]
+
+    def insert_review(self, review):
+        with self.lock:
+            self.reviews[review['id']] = review
+            self.reviews_by_professional.setdefault(review['professionalId'], []).append(review)
+            self.update_stats(self.review_stats(review))
+
+    @staticmethod
+    def review_stats(review):
+        return {'reviews.total': 1, 'reviews.pending': 1 if review['status'] == 'pending' else 0}
+
+    def update_stats(self, after=None, before=None):
+        """Move counters from a `before` contribution to an `after` one"""
+        with self.lock:
+            self.stats.update(after or {})
+            self.stats.subtract(before or {})
+
+    def recount_stats(self):
+        """Rebuild the counters from the collections to correct drift"""
+        stats = Counter()
+        with self.lock:
+            for professional in self.professionals.values():
+                stats.update(professional_stats(professional))
+            for review in self.reviews.values():
+                stats.update(self.review_stats(review))
+            stats['subscriptions.completed'] = sum(1 for s in self.subscriptions if s['status'] == 'completed')
+            self.stats = stats
+
+    def apply_rating(self, professional_id, rating):
+        """Fold one approved review into the professional's rating aggregate"""
+        with self.lock:
+            professional = self.professionals.get(professional_id)
+            if not professional:
+                return
+            ratings = professional['ratings']
+            if 'sum' not in ratings:
+                ratings.update(sum=ratings['average'] * ratings['count'],
+                               histogram={str(star): 0 for star in range(1, 6)})
+            ratings['sum'] += rating
+            ratings['count'] += 1
+            ratings['histogram'][str(rating)] = ratings['histogram'].get(str(rating), 0) + 1
+            ratings['average'] = round(ratings['sum'] / ratings['count'] * 10) / 10
+
+    def reconcile_ratings(self, professional_ids=None):
+        """Rebuild rating aggregates from approved reviews; returns how many changed"""
+        changed = 0
+        with self.lock:
+            for professional_id in (professional_ids or list(self.professionals)):
+                professional = self.professionals.get(professional_id)
+                if not professional:
+                    continue
+                ratings = empty_ratings()
+                for review in self.reviews_by_professional.get(professional_id, []):
+                    if review['status'] == 'approved':
+                        ratings['sum'] += review['rating']
+                        ratings['count'] += 1
+                        ratings['histogram'][str(review['rating'])] += 1
+                if ratings['count']:
+                    ratings['average'] = round(ratings['sum'] / ratings['count'] * 10) / 10
+                if professional['ratings'] != ratings:
+                    professional['ratings'] = ratings
+                    changed += 1
+        return changed
+
+    def record_analytics(self, professional_id, field, now):
+        with self.lock:
+            key = (professional_id, now.date().isoformat())
+            entry = self.analytics_buffer.setdefault(key, {'views': 0, 'contacts': 0, 'lastViewedAt': None})
+            entry[field] += 1
+            if field == 'views':
+                entry['lastViewedAt'] = now
+
+    def flush_analytics(self):
+        """Apply buffered increments to the professionals and the daily buckets (flushAnalytics in route.js)"""
+        with self.lock:
+            buffer, self.analytics_buffer = self.analytics_buffer, {}
+            for (professional_id, day), entry in buffer.items():
+                bucket = self.analytics_daily.setdefault((professional_id, day), {'views': 0, 'contacts': 0})
+                bucket['views'] += entry['views']
+                bucket['contacts'] += entry['contacts']
+                professional = self.professionals.get(professional_id)
+                if not professional:
+                    continue
+                analytics = professional['analytics']
+                analytics['profileViews'] += entry['views']
+                analytics['contactClicks'] += entry['contacts']
+                if entry['lastViewedAt'] and (not analytics['lastViewedAt']
+                                              or entry['lastViewedAt'] > analytics['lastViewedAt']):
+                    analytics['lastViewedAt'] = entry['lastViewedAt']
+        return len(buffer)
+
+    def find(self, predicate, sort_fields, skip=0, limit=None, candidates=None, computed=None, after=None):
+        """Matching professionals sorted descending by `sort_fields`.
+
+        Returns (total, page). `after` is a decoded cursor tuple: only documents
+        strictly after it are returned, as with keyset pagination in route.js.
+        """
+        started = time.perf_counter()
+        # list() copies in one step, so a concurrent registration cannot resize the dict mid-scan
+        source = list(self.professionals.values()) if candidates is None else \
+            (self.professionals[i] for i in candidates if i in self.professionals)
+        matches = [p for p in source if predicate(p)]
+        key = sort_key(sort_fields, computed)
+        matches.sort(key=key, reverse=True)
+        total = len(matches)
+        if after is not None:
+            matches = [p for p in matches if key(p) < after]
+        end = None if limit is None else skip + limit
+        page = matches[skip:end]
+        record_phase('db-find', (time.perf_counter() - started) * 1000, 'professionals', len(page))
+        return total, page
+
+
+class TrafficCapture:
+    """Appends every request to an NDJSON capture for `backend_test.py --mode replay`
+    (REQUEST CAPTURE in route.js). Keep-alive connections stand in for client sessions.
+    Emails are hashed and other personal fields replaced unless `keep_pii` is set."""
+
+    def __init__(self, path, keep_pii=False):
+        self.lock = threading.Lock()
+        self.keep_pii = keep_pii
+        self.file = open(path, 'a', buffering=1)
+        self.file.write(json.dumps({'format': CAPTURE_FORMAT, 'version': 1, 'startedAt': to_json(utcnow())}) + '\n')
+
+    def redact(self, value):
+        if isinstance(value, list):
+            return [self.redact(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        redacted = {}
+        for field, inner in value.items():
+            if field in CAPTURE_SECRET_FIELDS:
+                inner = '<redacted>'
+            elif not self.keep_pii and isinstance(inner, str) and field in CAPTURE_HASHED_FIELDS:
+                digest = hmac.new(JWT_SECRET.encode(), inner.lower().encode(), hashlib.sha256).hexdigest()
+                inner = f"{digest[:16]}@capture.invalid"
+            elif not self.keep_pii and isinstance(inner, str) and field in CAPTURE_PII_FIELDS:
+                inner = '<pii>'
+            else:
+                inner = self.redact(inner)
+            redacted[field] = inner
+        return redacted
+
+    def body_fields(self, raw):
+        if not raw:
+            return {}
+        if len(raw) > CAPTURE_BODY_MAX:
+            return {'bodyOmitted': len(raw)}
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            return {'bodyOmitted': len(raw)}
+        return {'body': self.redact(body)}
+
+    def record(self, handler, method, received_at, status, elapsed_ms):
+        auth_header = handler.headers.get('Authorization')
+        session = handler.server.sessions.verify(auth_header)
+        client = auth_header if session else '%s:%s' % handler.client_address
+        record = {'ts': round(received_at * 1000, 3), 'session': _b64(hashlib.sha256(client.encode()).digest())[:16],
+                  'method': method, 'path': handler.path[len('/api'):] or '/',
+                  'auth': session['claims']['role'] if session else 'invalid' if auth_header else None}
+        if session:
+            record['account'] = session['claims']['id']
+        record.update(self.body_fields(handler.request_body), status=status, ms=round(elapsed_ms, 3))
+        line = json.dumps(record, default=to_json) + '\n'
+        with self.lock:
+            self.file.write(line)
+
+
+class RequestMetrics:
+    """Per-route request counts, latency histograms and phase totals behind /api/metrics"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.durations = {}
+        self.phases = {}
+        self.commands = {}
+
+    @staticmethod
+    def _add(table, key, seconds, docs=0):
+        entry = table.setdefault(key, {'sum': 0.0, 'count': 0, 'docs': 0})
+        entry['sum'] += seconds
+        entry['count'] += 1
+        entry['docs'] += docs
+
+    def observe(self, span, status, total_ms):
+        seconds = total_ms / 1000
+        with self.lock:
+            self.requests[(span['method'], span['route'], status)] += 1
+            duration = self.durations.setdefault(span['route'], {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    duration['buckets'][i] += 1
+            duration['sum'] += seconds
+            duration['count'] += 1
+            for name, phase in span['phases'].items():
+                self._add(self.phases, name, phase['ms'] / 1000)
+                if name.startswith('db-'):
+                    for collection in phase['desc'] or {'-'}:
+                        self._add(self.commands, (name[3:], collection), phase['ms'] / 1000, phase['docs'])
+
+    def render(self):
+        """Prometheus text exposition format, same metric names as route.js"""
+        def labels(**values):
+            return '{' + ','.join(f'{k}="{v}"' for k, v in values.items()) + '}'
+
+        with self.lock:
+            lines = ['# HELP expertbridge_http_requests_total API requests by route and status.',
+                     '# TYPE expertbridge_http_requests_total counter']
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'expertbridge_http_requests_total{labels(method=method, route=route, status=status)} {count}')
+            lines += ['# HELP expertbridge_http_request_duration_seconds API request latency.',
+                      '# TYPE expertbridge_http_request_duration_seconds histogram']
+            for route, duration in sorted(self.durations.items()):
+                for bound, count in zip(LATENCY_BUCKETS, duration['buckets']):
+                    lines.append(f'expertbridge_http_request_duration_seconds_bucket{labels(route=route, le=bound)} {count}')
+                lines += [f'expertbridge_http_request_duration_seconds_bucket{labels(route=route, le="+Inf")} {duration["count"]}',
+                          f'expertbridge_http_request_duration_seconds_sum{labels(route=route)} {duration["sum"]}',
+                          f'expertbridge_http_request_duration_seconds_count{labels(route=route)} {duration["count"]}']
+            lines += ['# HELP expertbridge_phase_duration_seconds Time spent per phase (db-<op>, bcrypt, jwt).',
+                      '# TYPE expertbridge_phase_duration_seconds summary']
+            for phase, sample in sorted(self.phases.items()):
+                lines += [f'expertbridge_phase_duration_seconds_sum{labels(phase=phase)} {sample["sum"]}',
+                          f'expertbridge_phase_duration_seconds_count{labels(phase=phase)} {sample["count"]}']
+            lines += ['# HELP expertbridge_db_command_duration_seconds Store operation latency by operation and collection.',
+                      '# TYPE expertbridge_db_command_duration_seconds summary']
+            for (op, collection), sample in sorted(self.commands.items()):
+                lines += [f'expertbridge_db_command_duration_seconds_sum{labels(op=op, collection=collection)} {sample["sum"]}',
+                          f'expertbridge_db_command_duration_seconds_count{labels(op=op, collection=collection)} {sample["count"]}']
+            lines += ['# HELP expertbridge_db_documents_returned_total Documents returned by store operations.',
+                      '# TYPE expertbridge_db_documents_returned_total counter']
+            for (op, collection), sample in sorted(self.commands.items()):
+                lines.append(f'expertbridge_db_documents_returned_total{labels(op=op, collection=collection)} {sample["docs"]}')
+        return '\n'.join(lines) + '\n'
+
+
+class SessionCache:
+    """Verified token claims and account snapshots keyed by token hash (SESSIONS in route.js)"""
+
+    def __init__(self, max_entries=10000, user_ttl=30.0):
+        self.max_entries = max_entries
+        self.user_ttl = user_ttl
+        self.entries = OrderedDict()
+        self.by_account = {}
+        self.lock = threading.Lock()
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            keys = self.by_account.get(entry['claims']['id'], set())
+            keys.discard(key)
+            if not keys:
+                self.by_account.pop(entry['claims']['id'], None)
+
+    def verify(self, auth_header):
+        """Session for a bearer header, or None when it is missing, invalid or expired"""
+        if not auth_header or not auth_header.startswith('Bearer '):
+            return None
+        key = hashlib.sha256(auth_header.split(' ')[1].encode()).hexdigest()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry['expiresAt'] > time.time():
+                self.entries.move_to_end(key)
+                return entry
+            self._drop(key)
+        claims = verify_token(auth_header)
+        if not claims:
+            return None
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self._drop(next(iter(self.entries)))
+            entry = self.entries[key] = {'claims': claims, 'expiresAt': claims.get('exp') or time.time() + self.user_ttl,
+                                         'user': None, 'userExpiresAt': 0, 'version': 0}
+            self.by_account.setdefault(claims['id'], set()).add(key)
+        return entry
+
+    def user(self, entry, load):
+        """Cached account snapshot for a session; `load` reads it when missing or stale"""
+        with self.lock:
+            if entry['user'] and entry['userExpiresAt'] > time.time():
+                return entry['user']
+            version = entry['version']
+        user = load()
+        with self.lock:
+            if user and entry['version'] == version:
+                entry['user'], entry['userExpiresAt'] = user, time.time() + self.user_ttl
+        return user
+
+    def invalidate(self, *account_ids):
+        with self.lock:
+            for account_id in account_ids:
+                for key in self.by_account.get(account_id, ()):
+                    self.entries[key]['user'] = None
+                    self.entries[key]['version'] += 1
+
+
+class ResponseCache:
+    """TTL + LRU cache of serialized responses with tag invalidation (mirrors cachedJSON in route.js)"""
+
+    def __init__(self, ttl=30.0, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(route, query):
+        # Blank values stay in the key: a bare "cursor=" selects cursor mode
+        return f"{route}?{urlencode(sorted(parse_qsl(query, keep_blank_values=True)))}"
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if not entry or entry['expiresAt'] <= time.monotonic():
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, tags):
+        entry = {'body': body, 'etag': 'W/"%s"' % _b64(hashlib.sha1(body).digest()), 'tags': tags,
+                 'expiresAt': time.monotonic() + self.ttl, 'encoded': {}}
+        if key:
+            with self.lock:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for key in [k for k, e in self.entries.items() if set(e['tags']) & set(tags)]:
+                del self.entries[key]
+
+
+class PermanentJobError(Exception):
+    """A job failure that retrying cannot fix"""
+
+
+class LocalProviders:
+    """Stand-ins for SendGrid and Cloudinary with simulated latency and failure rate"""
+
+    def __init__(self, latency_ms=0.0, failure_rate=0.0, seed=42):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.outbox = []
+
+    def _call(self, name):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+        with self.lock:
+            failed = self.rng.random() < self.failure_rate
+        if failed:
+            raise RuntimeError(f"{name} stand-in: simulated failure")
+
+    def send_email(self, to, subject, html):
+        self._call('SendGrid')
+        with self.lock:
+            self.outbox.append({'to': to, 'subject': subject, 'sentAt': utcnow()})
+        return {'success': True, 'mocked': True}
+
+    def send_emails(self, messages):
+        self._call('SendGrid')
+        with self.lock:
+            self.outbox.extend({'to': m['to'], 'subject': m['subject'], 'sentAt': utcnow()} for m in messages)
+        return {'success': True, 'sent': len(messages), 'mocked': True}
+
+    def upload_profile_photo(self, professional_id, image_data):
+        self._call('Cloudinary')
+        return {'url': f"https://ui-avatars.com/api/?name={professional_id}&background=3b82f6&color=fff&size=200",
+                'publicId': None, 'mocked': True}
+
+
+class JobQueue:
+    """In-memory retrying job queue with a fixed worker pool (runJobs/runJob in route.js)"""
+
+    def __init__(self, handlers, concurrency=JOB_CONCURRENCY, seed=42):
+        self.handlers = handlers
+        self.jobs = {}
+        self.ready = []  # heap of (runAt monotonic, sequence, job id)
+        self.due = []  # heap of (-priority, runAt, sequence, job id) for jobs whose runAt has passed
+        self.sequence = 0
+        self.rng = random.Random(seed)
+        self.cond = threading.Condition()
+        for _ in range(concurrency):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def enqueue(self, job_type, payload, owner_id=None, max_attempts=JOB_MAX_ATTEMPTS):
+        now = utcnow()
+        job = {'id': str(uuid.uuid4()), 'type': job_type, 'payload': payload, 'ownerId': owner_id,
+               'priority': JOB_PRIORITY.get(job_type, 0), 'status': 'queued', 'attempts': 0, 'maxAttempts': max_attempts, 'lastError': None,
+               'result': None, 'createdAt': now, 'updatedAt': now}
+        with self.cond:
+            self.jobs[job['id']] = job
+            self._schedule(job, 0)
+        return job
+
+    def _schedule(self, job, delay):
+        self.sequence += 1
+        heapq.heappush(self.ready, (time.monotonic() + delay, self.sequence, job['id']))
+        self.cond.notify()
+
+    def _claim(self):
+        with self.cond:
+            while True:
+                while self.ready and self.ready[0][0] <= time.monotonic():
+                    run_at, sequence, job_id = heapq.heappop(self.ready)
+                    heapq.heappush(self.due, (-self.jobs[job_id]['priority'], run_at, sequence, job_id))
+                if self.due:
+                    job = self.jobs[heapq.heappop(self.due)[3]]
+                    job.update(status='running', attempts=job['attempts'] + 1, updatedAt=utcnow())
+                    return job
+                self.cond.wait(self.ready[0][0] - time.monotonic() if self.ready else None)
+
+    def _worker(self):
+        while True:
+            job = self._claim()
+            handler = self.handlers.get(job['type'])
+            try:
+                if not handler:
+                    raise PermanentJobError(f"Unknown job type {job['type']}")
+                update = {'status': 'done', 'result': handler(job['payload']), 'lastError': None}
+                delay = None
+            except Exception as e:
+                permanent = isinstance(e, PermanentJobError) or job['attempts'] >= job['maxAttempts']
+                update = {'status': 'failed' if permanent else 'queued', 'lastError': str(e)}
+                delay = None if permanent else \
+                    min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * 2 ** (job['attempts'] - 1)) * self.rng.uniform(0.5, 1)
+            with self.cond:
+                job.update(update, updatedAt=utcnow())
+                if delay is None:
+                    job['finishedAt'] = job['updatedAt']
+                    job.pop('payload', None)
+                else:
+                    self._schedule(job, delay)
+
+    def view(self, job):
+        return {k: v for k, v in job.items() if k != 'payload'}
+
+
+LISTING_SORT = ['featured.isFeatured', 'ratings.average', 'createdAt', 'id']
+FEATURED_SORT = ['ratings.average', 'createdAt', 'id']
+ADMIN_LISTING_SORT = ['createdAt', 'id']
+RESPONSE_CACHE_PAGES = 3
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return to_json(value) if isinstance(value, datetime) else value
+
+
+def export_rows(professionals, fields, fmt):
+    """Yield encoded NDJSON or CSV lines one professional at a time (exportStream in route.js)"""
+    if fmt == 'csv':
+        yield (','.join(fields) + '\n').encode()
+    for professional in professionals:
+        values = [field_value(professional, field) for field in fields]
+        if fmt == 'csv':
+            out = io.StringIO()
+            csv.writer(out, lineterminator='\n').writerow([csv_value(v) for v in values])
+            yield out.getvalue().encode()
+        else:
+            yield (json.dumps(dict(zip(fields, values)), default=to_json) + '\n').encode()
+
+
+def is_featured(professional, now):
+    featured = professional['featured']
+    return featured['isFeatured'] and featured['featuredUntil'] is not None and featured['featuredUntil'] > now
+
+
+def int_param(params, name, default):
+    try:
+        return int(params.get(name, [''])[0]) or default
+    except ValueError:
+        return default
+
+
+def float_param(params, name, default):
+    try:
+        return float(params.get(name, [''])[0]) or default
+    except ValueError:
+        return default
+
+
+class ExpertBridgeHandler(BaseHTTPRequestHandler):
+    """Routes /api/* requests the same way handleRoute in route.js does"""
+
+    server_version = "ExpertBridgeLocal/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_OPTIONS(self):
+        self.send_json({}, 200)
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def send_json(self, payload, status=200, headers=None):
+        """Send a JSON payload (or pre-serialized bytes); 304 responses carry no body"""
+        body = b'' if status == 304 else payload if isinstance(payload, bytes) else \
+            json.dumps(payload, default=to_json).encode()
+        headers = dict(headers or {})
+        if len(body) >= COMPRESS_MIN_BYTES and 'Content-Encoding' not in headers and \
+                negotiate_encoding(self.headers.get('Accept-Encoding')):
+            body = gzip.compress(body)
+            headers.update({'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'})
+        self.send_response(status)
+        self.send_header('Content-Type', headers.pop('Content-Type', 'application/json'))
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, chunks, status=200, headers=None):
+        """Send an iterable of byte chunks with chunked transfer encoding; each write blocks
+        until the socket accepts it, so a slow client throttles the producer"""
+        self.send_response(status)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        self.request_body = self.rfile.read(length)
+        try:
+            return json.loads(self.request_body or b'{}') or {}
+        except json.JSONDecodeError:
+            return {}
+
+    def simulate_latency(self):
+        latency = self.server.latency_ms
+        if self.server.jitter_ms:
+            with self.server.rng_lock:
+                latency += self.server.rng.uniform(0, self.server.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000.0)
+
+    def dispatch(self, method):
+        parsed = urlparse(self.path)
+        if not parsed.path.startswith('/api'):
+            return self.send_json({'error': f'Route {parsed.path} not found'}, 404)
+        path = [p for p in parsed.path[len('/api'):].split('/') if p]
+        route = '/' + '/'.join(path)
+        params = parse_qs(parsed.query)
+
+        received_at = time.time()
+        self.request_body = None
+        self.simulate_latency()
+        headers = None
+        span = _spans.span = {'method': method, 'route': route_label(route), 'phases': {}, 'queries': 0, 'docs': 0}
+        started = time.perf_counter()
+        try:
+            result = self.handle_route(method, route, path, params)
+            payload, status = result[:2]
+            if len(result) > 2:
+                headers = result[2]
+        except Exception as e:  # mirror the 500 handler in route.js
+            payload, status = {'error': 'Internal server error', 'details': str(e)}, 500
+        finally:
+            _spans.span = None
+        total_ms = (time.perf_counter() - started) * 1000
+        self.server.metrics.observe(span, status, total_ms)
+        if self.server.capture and route != '/metrics' and not route.startswith('/upload/'):
+            self.server.capture.record(self, method, received_at, status, total_ms)
+        headers = dict(headers or {}, **{'Server-Timing': server_timing(span, total_ms)})
+        if hasattr(payload, '__next__'):
+            return self.send_stream(payload, status, headers)
+        self.send_json(payload, status, headers)
+
+    def cached(self, key, tags, build, max_age=0):
+        """Serve build()'s (payload, status) through the response cache, honouring If-None-Match"""
+        cache = self.server.response_cache
+        entry = cache.get(key) if key else None
+        state = 'HIT'
+        if not entry:
+            payload, status = build()
+            if status != 200:
+                return payload, status
+            entry = cache.put(key, json.dumps(payload, default=to_json).encode(), tags)
+            state = 'MISS' if key else 'BYPASS'
+        headers = {'ETag': entry['etag'], 'Cache-Control': f'public, max-age={max_age}, must-revalidate',
+                   'X-Cache': state}
+        headers['Vary'] = 'Accept-Encoding'
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match and entry['etag'] in [t.strip() for t in if_none_match.split(',')]:
+            return b'', 304, headers
+        # The encoded body is kept on the entry, so a cache hit is served without compressing again
+        encoding = len(entry['body']) >= COMPRESS_MIN_BYTES and negotiate_encoding(self.headers.get('Accept-Encoding'))
+        if encoding:
+            if encoding not in entry['encoded']:
+                entry['encoded'][encoding] = gzip.compress(entry['body'])
+            headers['Content-Encoding'] = encoding
+            return entry['encoded'][encoding], 200, headers
+        return entry['body'], 200, headers
+
+    def paginate(self, params, predicate, sort_fields, default_limit, candidates=None, computed=None):
+        """Page- or cursor-paginated listing; returns (professionals, pagination) or an error tuple"""
+        store = self.server.store
+        limit = int_param(params, 'limit', default_limit)
+        if not self.raw_cursor_param():
+            page = int_param(params, 'page', 1)
+            total, professionals = store.find(predicate, sort_fields, (page - 1) * limit, limit, candidates, computed)
+            return professionals, {'page': page, 'limit': limit, 'total': total, 'pages': -(-total // limit)}
+
+        raw = params.get('cursor', [''])[0]
+        after = decode_cursor(raw, sort_fields) if raw else None
+        if raw and after is None:
+            return None, {'error': 'Invalid cursor'}
+        total, docs = store.find(predicate, sort_fields, 0, limit + 1, candidates, computed, after)
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        pagination = {'limit': limit, 'hasMore': has_more,
+                      'nextCursor': encode_cursor(docs[-1], sort_fields, computed) if has_more else None}
+        if params.get('withTotal', [''])[0] == 'true':
+            pagination['total'] = total
+        return docs, pagination
+
+    def raw_cursor_param(self):
+        # parse_qs drops blank values, so detect a bare "cursor=" (first cursor page) from the raw query
+        query = urlparse(self.path).query
+        return any(part.split('=', 1)[0] == 'cursor' for part in query.split('&'))
+
+    def rehash_password(self, account, password):
+        """Bring a stored hash to the configured cost after a successful login (upgradePasswordHash in route.js)"""
+        iterations = self.server.password_iterations
+        if password_rounds(account['password']) != iterations:
+            account['password'] = hash_password(password, iterations=iterations)
+
+    def current_user(self):
+        session = self.server.sessions.verify(self.headers.get('Authorization'))
+        return session['claims'] if session else None
+
+    def require_admin(self):
+        user = self.current_user()
+        return user if user and user.get('role') == 'admin' else None
+
+    def moderate(self, admin, action, body, now):
+        """Batch approve/reject (moderateProfessionals in route.js)"""
+        store = self.server.store
+        status = MODERATION_STATUS[action]
+        ids = body.get('ids') if isinstance(body.get('ids'), list) else None
+        with store.lock:
+            if ids is not None:
+                ids = ids[:MODERATION_BATCH_MAX]
+                targets = [store.professionals[i] for i in dict.fromkeys(ids) if i in store.professionals]
+            else:
+                flt = body.get('filter') or {}
+                created_before = flt.get('createdBefore') and parse_timestamp(flt['createdBefore'])
+                _, targets = store.find(
+                    lambda p: p['verification']['status'] == (flt.get('status') or 'pending')
+                    and (not flt.get('category') or p['category'] == flt['category'])
+                    and (not created_before or p['createdAt'] < created_before), ['createdAt'])
+                targets.reverse()  # oldest first, like the sort in route.js
+            has_more = ids is None and len(targets) > MODERATION_BATCH_MAX
+            targets = targets[:MODERATION_BATCH_MAX]
+
+            results = [{'id': p['id'], 'result': 'unchanged' if p['verification']['status'] == status else status}
+                       for p in targets]
+            eligible = [p for p in targets if p['verification']['status'] != status]
+            for professional in eligible:
+                before = professional_stats(professional)
+                if action == 'approve':
+                    professional['verification'].update(status=status, verifiedAt=now, verifiedBy=admin['id'])
+                else:
+                    professional['verification'].update(
+                        status=status, rejectionReason=body.get('reason') or 'Does not meet requirements')
+                professional['updatedAt'] = now
+                store.update_stats(professional_stats(professional), before)
+        if ids is not None:
+            found = {p['id'] for p in targets}
+            results += [{'id': i, 'result': 'not_found'} for i in ids if i not in found]
+
+        if eligible:
+            self.server.response_cache.invalidate('professionals', 'categories')
+            self.server.sessions.invalidate(*(p['id'] for p in eligible))
+            subject = 'Your ExpertBridge Profile is Approved!' if action == 'approve' else \
+                'ExpertBridge Profile Review Update'
+            messages = [{'to': p['email'], 'subject': subject, 'html': ''} for p in eligible]
+            for i in range(0, len(messages), EMAIL_BATCH_SIZE):
+                self.server.jobs.enqueue('email_batch', {'messages': messages[i:i + EMAIL_BATCH_SIZE]})
+        return {'action': action, 'matched': len(targets), 'updated': len(eligible), 'hasMore': has_more,
+                'results': results}
+
+    def handle_route(self, method, route, path, params):
+        store = self.server.store
+        now = utcnow()
+
+        if route in ('/', '/root') and method == 'GET':
+            return {'message': 'ExpertBridge API v1.0', 'categories': CATEGORIES}, 200
+
+        if route == '/metrics' and method == 'GET':
+            return self.server.metrics.render().encode(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+        # ==================== AUTH ROUTES ====================
+
+        if route == '/auth/register' and method == 'POST':
+            body = self.read_json()
+            required = ('fullName', 'email', 'password', 'category', 'bio', 'experience', 'location')
+            if any(not body.get(f) for f in required):
+                return {'error': 'Missing required fields'}, 400
+            if body['email'].lower() in store.by_email:
+                return {'error': 'Email already registered'}, 400
+            professional = new_professional(body, hash_password(body['password'], iterations=self.server.password_iterations))
+            store.insert_professional(professional)
+            self.server.jobs.enqueue('email', {'to': professional['email'], 'subject': 'Welcome to ExpertBridge!',
+                                               'html': ''})
+            token = sign_token({'id': professional['id'], 'email': professional['email'], 'role': 'professional'})
+            return {'message': 'Registration successful', 'token': token, 'professional': safe(professional)}, 200
+
+        if route == '/auth/login' and method == 'POST':
+            body = self.read_json()
+            if not body.get('email') or not body.get('password'):
+                return {'error': 'Email and password required'}, 400
+            professional = store.by_email.get(body['email'].lower())
+            if not professional or not check_password(body['password'], professional['password']):
+                return {'error': 'Invalid credentials'}, 401
+            self.rehash_password(professional, body['password'])
+            token = sign_token({'id': professional['id'], 'email': professional['email'], 'role': 'professional'})
+            return {'message': 'Login successful', 'token': token, 'professional': safe(professional)}, 200
+
+        if route == '/auth/admin/login' and method == 'POST':
+            body = self.read_json()
+            email, password = body.get('email'), body.get('password')
+            if not email or not password:
+                return {'error': 'Email and password required'}, 400
+            admin = next((a for a in store.admins.values() if a['email'] == email.lower()), None)
+            if not admin:
+                if email == 'admin@expertbridge.com' and password == 'admin123':
+                    admin = {'id': str(uuid.uuid4()), 'email': email,
+                             'password': hash_password(password, iterations=self.server.password_iterations),
+                             'fullName': 'Super Admin', 'role': 'superadmin', 'isActive': True, 'createdAt': now}
+                    store.admins[admin['id']] = admin
+                else:
+                    return {'error': 'Invalid credentials'}, 401
+            elif not check_password(password, admin['password']):
+                return {'error': 'Invalid credentials'}, 401
+            else:
+                self.rehash_password(admin, password)
+            token = sign_token({'id': admin['id'], 'email': admin['email'], 'role': 'admin'})
+            return {'message': 'Login successful', 'token': token, 'admin': {
+                'id': admin['id'], 'email': admin['email'], 'fullName': admin['fullName'], 'role': admin['role']}}, 200
+
+        if route == '/auth/me' and method == 'GET':
+            session = self.server.sessions.verify(self.headers.get('Authorization'))
+            if not session:
+                return {'error': 'Unauthorized'}, 401
+            user = session['claims']
+            collection = store.professionals if user['role'] == 'professional' else store.admins
+
+            def load():
+                record = collection.get(user['id'])
+                return copy.deepcopy(safe(record)) if record else None
+            record = self.server.sessions.user(session, load)
+            if not record:
+                return {'error': 'User not found'}, 404
+            return {'user': record, 'role': user['role']}, 200
+
+        # ==================== PROFESSIONAL ROUTES ====================
+
+        if route == '/professionals' and method == 'GET':
+            featured = params.get('featured', [''])[0] == 'true'
+            shape, error = list_projection(params, LISTING_SORT)
+            if error:
+                return {'error': error, 'allowed': LIST_FIELDS}, 400
+
+            def predicate(p):
+                if p['verification']['status'] != 'approved' or not p['isActive']:
+                    return False
+                return not featured or is_featured(p, now)
+
+            def build():
+                professionals, pagination = self.paginate(params, predicate, LISTING_SORT, 12)
+                if professionals is None:
+                    return pagination, 400
+                return {'professionals': [shape(p) for p in professionals], 'pagination': pagination}, 200
+
+            if self.raw_cursor_param():
+                cacheable = not params.get('cursor')
+            else:
+                cacheable = int_param(params, 'page', 1) <= RESPONSE_CACHE_PAGES
+            key = ResponseCache.key(route, urlparse(self.path).query) if cacheable else None
+            return self.cached(key, ['professionals'], build)
+
+        if route == '/professionals/featured' and method == 'GET':
+            limit = int_param(params, 'limit', 6)
+            shape, error = list_projection(params, FEATURED_SORT)
+            if error:
+                return {'error': error, 'allowed': LIST_FIELDS}, 400
+
+            def build():
+                _, professionals = store.find(
+                    lambda p: p['verification']['status'] == 'approved' and p['isActive'] and is_featured(p, now),
+                    FEATURED_SORT, 0, limit)
+                return {'professionals': [shape(p) for p in professionals]}, 200
+
+            return self.cached(ResponseCache.key(route, urlparse(self.path).query), ['professionals'], build)
+
+        if re.match(r'^/professionals/[^/]+$', route) and method == 'GET':
+            professional = store.professionals.get(path[1])
+            if not professional:
+                return {'error': 'Professional not found'}, 404
+            response = safe(professional)
+            store.record_analytics(path[1], 'views', now)
+            reviews = [r for r in store.reviews_by_professional.get(path[1], []) if r['status'] == 'approved']
+            reviews.sort(key=sort_key(['createdAt']), reverse=True)
+            return {'professional': response, 'reviews': reviews[:10]}, 200
+
+        if re.match(r'^/professionals/[^/]+$', route) and method == 'PUT':
+            user = self.current_user()
+            if not user or user['role'] != 'professional':
+                return {'error': 'Unauthorized'}, 401
+            if user['id'] != path[1]:
+                return {'error': 'Forbidden'}, 403
+            body = self.read_json()
+            professional = store.professionals.get(path[1])
+            if not professional:
+                return {'error': 'Professional not found'}, 404
+            with store.lock:
+                before = professional_stats(professional)
+                for field in ('fullName', 'phone', 'category', 'bio', 'location', 'serviceOptions',
+                              'languages', 'socialLinks', 'profilePhoto'):
+                    if body.get(field):
+                        professional[field] = body[field]
+                if 'subcategory' in body:
+                    professional['subcategory'] = body['subcategory']
+                if body.get('experience'):
+                    professional['experience'] = int(body['experience'])
+                professional['updatedAt'] = now
+                store.index_professional(professional)
+                store.update_stats(professional_stats(professional), before)
+            self.server.response_cache.invalidate('professionals', 'categories')
+            self.server.sessions.invalidate(professional['id'])
+            return {'message': 'Profile updated', 'professional': safe(professional)}, 200
+
+        if re.match(r'^/professionals/[^/]+/contact$', route) and method == 'POST':
+            store.record_analytics(path[1], 'contacts', now)
+            return {'message': 'Contact click tracked'}, 200
+
+        if re.match(r'^/professionals/[^/]+/analytics$', route) and method == 'GET':
+            user = self.current_user()
+            if not user or (user['role'] != 'admin' and user['id'] != path[1]):
+                return {'error': 'Unauthorized'}, 401
+            days = max(1, min(365, int_param(params, 'days', 30)))
+            since = (now - timedelta(days=days - 1)).date().isoformat()
+            with store.lock:
+                series = sorted(({'day': day, **bucket} for (pid, day), bucket in store.analytics_daily.items()
+                                 if pid == path[1] and day >= since), key=lambda b: b['day'])
+            totals = {'views': sum(b['views'] for b in series), 'contacts': sum(b['contacts'] for b in series)}
+            return {'professionalId': path[1], 'days': days, 'since': since, 'totals': totals, 'series': series}, 200
+
+        # ==================== UPLOAD ROUTES ====================
+
+        if route == '/upload/profile-photo' and method == 'POST':
+            user = self.current_user()
+            if not user or user['role'] != 'professional':
+                return {'error': 'Unauthorized'}, 401
+            image_data = self.read_json().get('imageData')
+            if not image_data:
+                return {'error': 'No image data provided'}, 400
+            job = self.server.jobs.enqueue('profile_photo', {'professionalId': user['id'], 'imageData': image_data},
+                                           owner_id=user['id'])
+            return {'message': 'Profile photo upload queued', 'jobId': job['id'], 'status': job['status']}, 202
+
+        if re.match(r'^/jobs/[^/]+$', route) and method == 'GET':
+            user = self.current_user()
+            if not user:
+                return {'error': 'Unauthorized'}, 401
+            job = self.server.jobs.jobs.get(path[1])
+            if not job or (user['role'] != 'admin' and job['ownerId'] != user['id']):
+                return {'error': 'Job not found'}, 404
+            return {'job': self.server.jobs.view(job)}, 200
+
+        # ==================== SEARCH ROUTES ====================
+
+        if route == '/search' and method == 'GET':
+            category = params.get('category', [None])[0]
+            country = params.get('country', [None])[0]
+            city = params.get('city', [None])[0]
+            keyword = params.get('keyword', [None])[0]
+            service_type = params.get('serviceType', [None])[0]
+            min_experience = int_param(params, 'minExperience', 0)
+            min_rating = float_param(params, 'minRating', 0)
+            sort_by = params.get('sortBy', ['relevance'])[0]
+            near = params.get('near', [None])[0]
+            origin = None
+            if 'lat' in params or 'lng' in params or near:
+                try:
+                    within_km = float(params.get('withinKm', [''])[0] or GEO_DEFAULT_KM)
+                except ValueError:
+                    within_km = math.nan
+                if not (math.isfinite(within_km) and within_km > 0):
+                    return {'error': 'withinKm must be a positive number'}, 400
+                within_km = min(within_km, GEO_MAX_KM)
+            if 'lat' in params or 'lng' in params:
+                try:
+                    origin = (float(params['lng'][0]), float(params['lat'][0]))
+                except (KeyError, ValueError):
+                    origin = (math.nan, math.nan)
+                if not (abs(origin[0]) <= 180 and abs(origin[1]) <= 90):
+                    return {'error': 'Invalid coordinates'}, 400
+            elif near:
+                origin = geocode_location({'city': near, 'state': near, 'country': country})
+                if not origin:
+                    return {'error': f'Unknown location: {near}'}, 400
+            distances = {}
+
+            # Normalized prefix matching served from the inverted index, like route.js
+            terms = search_terms(keyword) if keyword else []
+            country_norm = normalize_text(country) if country else None
+            city_norm = normalize_text(city) if city else None
+            candidates = store.search_candidates(terms) if terms else None
+
+            def predicate(p):
+                if p['verification']['status'] != 'approved' or not p['isActive']:
+                    return False
+                if category and p['category'] != category:
+                    return False
+                fields = store.search_fields.get(p['id'])
+                if country_norm and not fields['country'].startswith(country_norm):
+                    return False
+                if city_norm and not fields['city'].startswith(city_norm):
+                    return False
+                if service_type == 'virtual' and not p['serviceOptions'].get('virtual'):
+                    return False
+                if service_type == 'inPerson' and not p['serviceOptions'].get('inPerson'):
+                    return False
+                if min_experience > 0 and p['experience'] < min_experience:
+                    return False
+                if min_rating > 0 and p['ratings']['average'] < min_rating:
+                    return False
+                if origin:
+                    # Within the searcher's distance and the professional's own service radius
+                    if 'geo' not in fields:
+                        return False
+                    distances[p['id']] = distance_km(origin, fields['geo'])
+                    return distances[p['id']] <= min(within_km, fields['radiusKm'])
+                return True
+
+            def relevance(p):
+                fields = store.search_fields[p['id']]
+                return sum(1 for t in terms if t in fields['tokens']) + 2 * sum(1 for t in terms if t in fields['nameTokens'])
+
+            sort_fields = ['featured.isFeatured']
+            if origin:
+                # find() sorts descending, so nearest first means largest negated distance
+                sort_fields = ['distanceKm', 'id']
+            elif sort_by == 'experience':
+                sort_fields.append('experience')
+            elif sort_by == 'rating' or not terms:
+                sort_fields.append('ratings.average')
+            else:
+                sort_fields += ['relevance', 'ratings.average']
+            if not origin:
+                sort_fields += ['createdAt', 'id']
+            shape, error = list_projection(params, sort_fields)
+            if error:
+                return {'error': error, 'allowed': LIST_FIELDS}, 400
+
+            # ?facets=true: counts come from the same predicate pass that produces the page
+            with_facets = params.get('facets', [''])[0] == 'true'
+            matched = []
+
+            def collect(p):
+                if predicate(p):
+                    matched.append(p)
+                    return True
+                return False
+
+            professionals, pagination = self.paginate(params, collect if with_facets else predicate, sort_fields, 12,
+                                                      candidates, {'relevance': relevance,
+                                                                   'distanceKm': lambda p: -distances[p['id']]})
+            if professionals is None:
+                return pagination, 400
+            filters = {'category': category, 'country': country, 'city': city, 'keyword': keyword,
+                       'serviceType': service_type, 'minExperience': min_experience, 'minRating': min_rating}
+            if origin:
+                filters.update(near=near, origin=list(origin), withinKm=within_km)
+                professionals = [shape(dict(p, distanceKm=distances[p['id']])) for p in professionals]
+            else:
+                professionals = [shape(p) for p in professionals]
+            response = {'professionals': professionals, 'filters': filters, 'pagination': pagination}
+            if with_facets:
+                response['facets'] = search_facets(matched)
+                pagination['total'] = len(matched)
+            return response, 200
+
+        # ==================== REVIEW ROUTES ====================
+
+        if route == '/reviews' and method == 'POST':
+            body = self.read_json()
+            if any(not body.get(f) for f in ('professionalId', 'clientName', 'clientEmail', 'rating', 'comment')):
+                return {'error': 'Missing required fields'}, 400
+            # Whole stars only, like route.js
+            rating = body['rating']
+            if isinstance(rating, str) and re.fullmatch(r'\s*[1-5]\s*', rating):
+                rating = int(rating)
+            if isinstance(rating, float) and rating.is_integer():
+                rating = int(rating)
+            if isinstance(rating, bool) or not isinstance(rating, int) or not 1 <= rating <= 5:
+                return {'error': 'Rating must be an integer from 1 to 5'}, 400
+            if body['professionalId'] not in store.professionals:
+                return {'error': 'Professional not found'}, 404
+            review = {
+                'id': str(uuid.uuid4()),
+                'professionalId': body['professionalId'],
+                'clientName': body['clientName'],
+                'clientEmail': body['clientEmail'].lower(),
+                'rating': rating,
+                'comment': body['comment'],
+                'isVerified': False,
+                'status': 'approved',
+                'createdAt': now
+            }
+            store.insert_review(review)
+            store.apply_rating(review['professionalId'], review['rating'])
+            self.server.response_cache.invalidate('professionals')
+            return {'message': 'Review submitted successfully', 'review': review}, 200
+
+        if re.match(r'^/reviews/[^/]+$', route) and method == 'GET':
+            reviews = [r for r in store.reviews_by_professional.get(path[1], []) if r['status'] == 'approved']
+            reviews.sort(key=sort_key(['createdAt']), reverse=True)
+            return {'reviews': reviews}, 200
+
+        # ==================== SUBSCRIPTION ROUTES ====================
+
+        if route == '/subscriptions/plans' and method == 'GET':
+            return self.cached(route, ['plans'], lambda: ({'plans': SUBSCRIPTION_PLANS}, 200), max_age=3600)
+
+        # ==================== ADMIN ROUTES ====================
+
+        if route.startswith('/admin/') and not self.require_admin():
+            return {'error': 'Unauthorized'}, 401
+        admin = self.current_user()
+
+        if route == '/admin/pending' and method == 'GET':
+            limit = int_param(params, 'limit', 0) or None
+            _, pending = store.find(lambda p: p['verification']['status'] == 'pending', ['createdAt'], 0, limit)
+            return {'pending': [safe(p) for p in pending]}, 200
+
+        if re.match(r'^/admin/export/(pending|professionals)$', route) and method == 'GET':
+            fmt = params.get('format', ['ndjson'])[0]
+            if fmt not in ('ndjson', 'csv'):
+                return {'error': 'format must be ndjson or csv'}, 400
+            fields = [f.strip() for f in params['fields'][0].split(',') if f.strip()] if 'fields' in params \
+                else EXPORT_DEFAULT_FIELDS
+            unknown = [f for f in fields if f not in EXPORT_FIELDS]
+            if unknown or not fields:
+                return {'error': f"Unknown export fields: {', '.join(unknown)}", 'allowed': EXPORT_FIELDS}, 400
+            status = 'pending' if path[2] == 'pending' else params.get('status', [None])[0]
+            category = params.get('category', [None])[0]
+            _, professionals = store.find(lambda p: (not status or p['verification']['status'] == status)
+                                          and (not category or p['category'] == category), ['createdAt', 'id'])
+            extension = 'csv' if fmt == 'csv' else 'ndjson'
+            return export_rows(professionals, fields, fmt), 200, {
+                'Content-Type': 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/x-ndjson',
+                'Content-Disposition': f'attachment; filename="expertbridge-{path[2]}-{now.date()}.{extension}"',
+                'Cache-Control': 'no-store'
+            }
+
+        if re.match(r'^/admin/(approve|reject)/[^/]+$', route) and method == 'PUT':
+            professional = store.professionals.get(path[2])
+            if not professional:
+                return {'error': 'Professional not found'}, 404
+            with store.lock:
+                before = professional_stats(professional)
+                if path[1] == 'approve':
+                    professional['verification'].update(status='approved', verifiedAt=now, verifiedBy=admin['id'])
+                else:
+                    reason = self.read_json().get('reason')
+                    professional['verification'].update(status='rejected',
+                                                        rejectionReason=reason or 'Does not meet requirements')
+                professional['updatedAt'] = now
+                store.update_stats(professional_stats(professional), before)
+            self.server.response_cache.invalidate('professionals', 'categories')
+            self.server.sessions.invalidate(professional['id'])
+            subject = 'Your ExpertBridge Profile is Approved!' if path[1] == 'approve' else \
+                'ExpertBridge Profile Review Update'
+            self.server.jobs.enqueue('email', {'to': professional['email'], 'subject': subject, 'html': ''})
+            return {'message': 'Professional approved' if path[1] == 'approve' else 'Professional rejected'}, 200
+
+        if re.match(r'^/admin/batch/(approve|reject)$', route) and method == 'POST':
+            body = self.read_json()
+            if not isinstance(body.get('ids'), list) and not body.get('filter'):
+                return {'error': 'Provide ids or filter'}, 400
+            if not isinstance(body.get('ids'), list):
+                # A filter on the target status would match the same page forever with hasMore set
+                if (body['filter'].get('status') or 'pending') == MODERATION_STATUS[path[2]]:
+                    return {'error': f"filter.status cannot be {MODERATION_STATUS[path[2]]}"}, 400
+                if body['filter'].get('createdBefore') and not parse_timestamp(body['filter']['createdBefore']):
+                    return {'error': 'Invalid createdBefore'}, 400
+            return self.moderate(admin, path[2], body, now), 200
+
+        if re.match(r'^/admin/professionals/[^/]+$', route) and method == 'DELETE':
+            if path[2] not in store.professionals:
+                return {'error': 'Professional not found'}, 404
+            store.delete_professional(path[2])
+            self.server.response_cache.invalidate('professionals', 'categories')
+            self.server.sessions.invalidate(path[2])
+            return {'message': 'Professional deleted successfully'}, 200
+
+        if route == '/admin/professionals' and method == 'GET':
+            status = params.get('status', [None])[0]
+            professionals, pagination = self.paginate(
+                params, lambda p: not status or p['verification']['status'] == status, ADMIN_LISTING_SORT, 20)
+            if professionals is None:
+                return pagination, 400
+            return {'professionals': [safe(p) for p in professionals], 'pagination': pagination}, 200
+
+        if route == '/admin/stats' and method == 'GET':
+            stats = store.stats
+            breakdown = {key[len('categories.'):-len('.total')]: n for key, n in stats.items()
+                         if key.startswith('categories.') and key.endswith('.total') and n > 0}
+            return {
+                'stats': {
+                    'totalProfessionals': stats['professionals.total'],
+                    'pendingApprovals': stats['professionals.pending'],
+                    'approvedProfessionals': stats['professionals.approved'],
+                    'rejectedProfessionals': stats['professionals.rejected'],
+                    'featuredProfessionals': sum(1 for p in store.professionals.values() if is_featured(p, now)),
+                    'totalReviews': stats['reviews.total'],
+                    'pendingReviews': stats['reviews.pending'],
+                    'totalSubscriptions': stats['subscriptions.completed']
+                },
+                'categoryBreakdown': [{'_id': c, 'count': n}
+                                      for c, n in sorted(breakdown.items(), key=lambda kv: -kv[1])]
+            }, 200
+
+        if route == '/admin/jobs' and method == 'GET':
+            jobs = list(self.server.jobs.jobs.values())
+            since = utcnow() - JOB_STATS_WINDOW
+            counts = Counter((j['type'], j['status']) for j in jobs
+                             if j['status'] in ('queued', 'running') or j['updatedAt'] >= since)
+            failed = sorted((j for j in jobs if j['status'] == 'failed'), key=lambda j: j['updatedAt'], reverse=True)
+            return {'counts': [{'type': t, 'status': st, 'count': n} for (t, st), n in counts.items()],
+                    'failed': [self.server.jobs.view(j) for j in failed[:20]]}, 200
+
+        if route == '/admin/stats/recount' and method == 'POST':
+            store.recount_stats()
+            self.server.response_cache.invalidate('categories')
+            return {'message': 'Stats recounted', 'recountedAt': utcnow()}, 200
+
+        if re.match(r'^/admin/reviews/[^/]+/approve$', route) and method == 'PUT':
+            review = store.reviews.get(path[2])
+            if not review:
+                return {'error': 'Review not found'}, 404
+            with store.lock:
+                newly_approved = review['status'] != 'approved'
+                before = store.review_stats(review)
+                review['status'] = 'approved'
+                store.update_stats(store.review_stats(review), before)
+            if newly_approved:
+                store.apply_rating(review['professionalId'], review['rating'])
+                self.server.response_cache.invalidate('professionals')
+            return {'message': 'Review approved'}, 200
+
+        if route == '/admin/ratings/reconcile' and method == 'POST':
+            body = self.read_json()
+            ids = body.get('professionalIds') if isinstance(body.get('professionalIds'), list) else None
+            updated = store.reconcile_ratings(ids)
+            self.server.response_cache.invalidate('professionals')
+            return {'message': 'Ratings reconciled', 'updated': updated}, 200
+
+        if route == '/admin/reviews/pending' and method == 'GET':
+            pending = sorted((r for r in store.reviews.values() if r['status'] == 'pending'),
+                             key=sort_key(['createdAt']), reverse=True)
+            return {'reviews': pending}, 200
+
+        # ==================== CATEGORIES ROUTE ====================
+
+        if route == '/categories' and method == 'GET':
+            return self.cached(route, ['categories'], lambda: (
+                {'categories': [{'name': c, 'count': store.stats[f'categories.{c}.listed']} for c in CATEGORIES]}, 200))
+
+        return {'error': f'Route {route} not found'}, 404
+
+
+class ExpertBridgeLocalServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store=None, latency_ms=0.0, jitter_ms=0.0, seed=42, verbose=False,
+                 analytics_flush_ms=5000, provider_latency_ms=0.0, provider_failure_rate=0.0,
+                 password_iterations=PASSWORD_ITERATIONS, capture_path=None, capture_pii=False):
+        super().__init__(address, ExpertBridgeHandler)
+        self.capture = TrafficCapture(capture_path, keep_pii=capture_pii) if capture_path else None
+        self.store = store or MarketplaceStore()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.verbose = verbose
+        self.response_cache = ResponseCache()
+        self.metrics = RequestMetrics()
+        self.sessions = SessionCache()
+        self.password_iterations = password_iterations
+        self.analytics_flush_ms = analytics_flush_ms
+        threading.Thread(target=self._flush_analytics_forever, daemon=True).start()
+        self.providers = LocalProviders(provider_latency_ms, provider_failure_rate, seed)
+        self.jobs = JobQueue({
+            'email': lambda p: self.providers.send_email(p['to'], p['subject'], p['html']),
+            'email_batch': lambda p: self.providers.send_emails(p['messages']),
+            'profile_photo': self._upload_profile_photo
+        }, seed=seed)
+
+    def _upload_profile_photo(self, payload):
+        photo = self.providers.upload_profile_photo(payload['professionalId'], payload['imageData'])
+        professional = self.store.professionals.get(payload['professionalId'])
+        if professional:
+            with self.store.lock:
+                professional['profilePhoto'] = {'url': photo['url'], 'publicId': photo['publicId']}
+                professional['updatedAt'] = utcnow()
+            self.response_cache.invalidate('professionals')
+            self.sessions.invalidate(payload['professionalId'])
+        return photo
+
+    def _flush_analytics_forever(self):
+        while True:
+            time.sleep(self.analytics_flush_ms / 1000.0)
+            self.store.flush_analytics()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+
+def start_in_background(port=0, seed_professionals=0, seed=42, **kwargs):
+    """Start a seeded server on a daemon thread; returns the server (see .base_url)"""
+    store = MarketplaceStore()
+    store.seed(seed_professionals, seed)
+    server = ExpertBridgeLocalServer((DEFAULT_HOST, port), store=store, seed=seed, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local in-memory stand-in for the ExpertBridge API")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed-professionals', type=int, default=10000, help="Synthetic professionals to preload")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for data and latency")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Fixed latency added to every request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Extra uniform random latency per request")
+    parser.add_argument('--analytics-flush-ms', type=float, default=5000,
+                        help="Interval between flushes of buffered view/contact counters")
+    parser.add_argument('--provider-latency-ms', type=float, default=0,
+                        help="Latency of the local email/image provider stand-ins")
+    parser.add_argument('--provider-failure-rate', type=float, default=0,
+                        help="Fraction of provider stand-in calls that fail (exercises job retries)")
+    parser.add_argument('--password-iterations', type=int, default=PASSWORD_ITERATIONS,
+                        help="pbkdf2 cost for new hashes; older hashes are upgraded on login")
+    parser.add_argument('--capture', metavar='PATH',
+                        help="Append every request to this NDJSON capture (replay with backend_test.py --mode replay)")
+    parser.add_argument('--capture-pii', action='store_true',
+                        help="Keep emails, names, phone numbers and review text in the capture")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    store = MarketplaceStore()
+    started = time.perf_counter()
+    store.seed(args.seed_professionals, args.seed)
+    print(f"🌱 Seeded {args.seed_professionals} professionals in {time.perf_counter() - started:.1f}s")
+
+    server = ExpertBridgeLocalServer((args.host, args.port), store=store, latency_ms=args.latency_ms,
+                                     jitter_ms=args.jitter_ms, seed=args.seed, verbose=args.verbose,
+                                     analytics_flush_ms=args.analytics_flush_ms,
+                                     provider_latency_ms=args.provider_latency_ms,
+                                     provider_failure_rate=args.provider_failure_rate,
+                                     password_iterations=args.password_iterations,
+                                     capture_path=args.capture, capture_pii=args.capture_pii)
+    print(f"🚀 ExpertBridge local API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
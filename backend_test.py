@@ -4,19 +4,263 @@ ExpertBridge Backend API Testing Suite
 Tests all major backend endpoints for the professional services marketplace
 """
 
+import argparse
+import csv
+import io
+import math
+import random
+import re
 import requests
+import sys
 import json
+import os
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 # Configuration
-BASE_URL = "https://expertfinder-22.preview.emergentagent.com/api"
+BASE_URL = os.environ.get("EXPERTBRIDGE_BASE_URL", "https://expertfinder-22.preview.emergentagent.com/api")
 TIMEOUT = 30
+# View/contact counters are flushed in batches; wait this long for a view to show up
+ANALYTICS_CONSISTENCY_TIMEOUT = 15
+ANALYTICS_POLL_INTERVAL = 1
+
+# Load mode defaults: relative weight of each scenario in the traffic mix
+DEFAULT_LOAD_MIX = {
+    'search': 5,
+    'professionals': 3,
+    'categories': 2,
+    'profile': 2,
+    'login': 1
+}
+LOAD_PROFILES = ('steady', 'ramp', 'spike')
+
+# Replay mode: captured traffic (see TrafficReplayer for the format)
+CAPTURE_FORMAT = 'expertbridge-capture'
+CAPTURE_VERSION = 1
+REPLAY_MAX_CLIENTS = 256
+REPLAY_PASSWORD = "SeedPass123!"  # stands in for redacted passwords; the seeded accounts' password
+ACCESS_LOG_LINE = re.compile(r'^(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" '
+                             r'(?P<status>\d{3}) \S+(?: "[^"]*" "(?P<agent>[^"]*)")?')
+
+# Latency reporting
+REPORT_PERCENTILES = (50, 90, 99, 99.9)
+HISTOGRAM_SIGNIFICANT_BITS = 7  # exact below 128us, then <= 1/64 (~1.6%) relative error
+ID_SEGMENT = re.compile(r'^[0-9a-fA-F-]{16,}$|^\d+$')
+
+
+def parse_server_timing(header):
+    """Server-Timing header -> {metric: {'dur': ms, 'desc': str}}, e.g. 'db;dur=8.1;desc="4 queries"'"""
+    timings = {}
+    # Commas and semicolons may appear inside quoted desc values
+    for entry in re.findall(r'(?:[^,"]|"[^"]*")+', header or ''):
+        parts = [part.strip() for part in re.findall(r'(?:[^;"]|"[^"]*")+', entry)]
+        if not parts[0]:
+            continue
+        metric = {'dur': 0.0, 'desc': ''}
+        for param in parts[1:]:
+            name, _, value = param.partition('=')
+            if name == 'dur':
+                try:
+                    metric['dur'] = float(value)
+                except ValueError:
+                    pass
+            elif name == 'desc':
+                metric['desc'] = value.strip('"')
+        timings[parts[0]] = metric
+    return timings
+
+
+class LatencyHistogram:
+    """HDR-style latency histogram with log-linear buckets.
+
+    Values are recorded in microseconds and keep their top HISTOGRAM_SIGNIFICANT_BITS
+    bits: values below 2**bits (128us at the default of 7) are exact, and each power-of-two
+    range above that is split into 2**(bits - 1) = 64 equal sub-buckets. A bucket starting
+    at sub-bucket s spans 1/s of its value, so percentiles (reported at the bucket's upper
+    edge) overstate the true value by at most 1/64 ~ 1.6% at the bottom of a range, down
+    to 1/127 ~ 0.8% at the top, whatever the magnitude; memory stays bounded.
+    """
+
+    def __init__(self, significant_bits=HISTOGRAM_SIGNIFICANT_BITS):
+        self.significant_bits = significant_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        shift = max(0, value.bit_length() - self.significant_bits)
+        return shift, value >> shift
+
+    def record(self, micros):
+        value = max(0, int(micros))
+        key = self._bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Value (in microseconds) at or below which `pct` percent of samples fall"""
+        if not self.count:
+            return 0
+        target = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for shift, sub in sorted(self.counts, key=lambda k: (k[1] << k[0])):
+            seen += self.counts[(shift, sub)]
+            if seen >= target:
+                # Report the bucket's upper edge, clamped to the observed max
+                return min(((sub + 1) << shift) - 1, self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+class RequestMetrics:
+    """Thread-safe per-endpoint latency, byte and error accounting"""
 
-class ExpertBridgeAPITester:
     def __init__(self):
-        self.base_url = BASE_URL
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    @staticmethod
+    def endpoint_key(method, endpoint):
+        """Collapse ids and query strings so /professionals/<uuid> groups together"""
+        path = endpoint.split('?', 1)[0]
+        segments = [':id' if ID_SEGMENT.match(seg) else seg for seg in path.split('/')]
+        return f"{method.upper()} {'/'.join(segments) or '/'}"
+
+    def record(self, method, endpoint, seconds, status=None, bytes_in=0, bytes_out=0, server_timing=None,
+               bytes_decoded=None):
+        key = self.endpoint_key(method, endpoint)
+        with self._lock:
+            entry = self.endpoints.get(key)
+            if entry is None:
+                entry = self.endpoints[key] = {
+                    'histogram': LatencyHistogram(),
+                    'requests': 0,
+                    'errors': 0,
+                    'client_errors': 0,
+                    'bytes_in': 0,
+                    'bytes_decoded': 0,
+                    'bytes_out': 0,
+                    'timed': 0,
+                    'server_timing': {}
+                }
+            entry['histogram'].record(seconds * 1_000_000)
+            entry['requests'] += 1
+            entry['bytes_in'] += bytes_in
+            entry['bytes_decoded'] += bytes_in if bytes_decoded is None else bytes_decoded
+            entry['bytes_out'] += bytes_out
+            if server_timing:
+                entry['timed'] += 1
+                for metric, timing in server_timing.items():
+                    entry['server_timing'][metric] = entry['server_timing'].get(metric, 0.0) + timing['dur']
+            if status is None or status >= 500:
+                entry['errors'] += 1
+            elif status >= 400:
+                entry['client_errors'] += 1
+
+    def timed_request(self, session, method, endpoint, url, **kwargs):
+        """Send a request through `session`, timing it with a monotonic clock"""
+        body = kwargs.get('json')
+        bytes_out = len(json.dumps(body)) if body is not None else 0
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            self.record(method, endpoint, time.perf_counter() - started, bytes_out=bytes_out)
+            raise
+        # requests decodes gzip/br bodies; Content-Length still gives the size on the wire
+        decoded = len(response.content)
+        encoded = response.headers.get('Content-Encoding') and response.headers.get('Content-Length')
+        self.record(method, endpoint, time.perf_counter() - started, response.status_code,
+                    bytes_in=int(encoded) if encoded else decoded, bytes_out=bytes_out,
+                    server_timing=parse_server_timing(response.headers.get('Server-Timing')),
+                    bytes_decoded=decoded)
+        return response
+
+    def summary(self):
+        """Per-endpoint report rows with latencies in milliseconds"""
+        rows = []
+        with self._lock:
+            items = sorted(self.endpoints.items())
+        for key, entry in items:
+            histogram = entry['histogram']
+            row = {
+                'endpoint': key,
+                'requests': entry['requests'],
+                'errors': entry['errors'],
+                'client_errors': entry['client_errors'],
+                'error_rate': round(entry['errors'] / entry['requests'], 4) if entry['requests'] else 0,
+                'bytes_in': entry['bytes_in'],
+                'bytes_out': entry['bytes_out'],
+                # Mean response size on the wire and after decompression
+                'bytes_per_response': round(entry['bytes_in'] / entry['requests']) if entry['requests'] else 0,
+                'decoded_bytes_per_response': round(entry['bytes_decoded'] / entry['requests']) if entry['requests'] else 0,
+                'min_ms': round((histogram.min or 0) / 1000, 3),
+                'mean_ms': round(histogram.mean() / 1000, 3),
+                'max_ms': round((histogram.max or 0) / 1000, 3),
+                # Mean server-side ms per request for each Server-Timing metric, largest first
+                'server_timing': {metric: round(total / entry['timed'], 3) for metric, total in
+                                  sorted(entry['server_timing'].items(), key=lambda kv: -kv[1])}
+            }
+            for pct in REPORT_PERCENTILES:
+                row[f'p{pct:g}_ms'] = round(histogram.percentile(pct) / 1000, 3)
+            rows.append(row)
+        return rows
+
+    def print_report(self):
+        print("\n⏱️  LATENCY BY ENDPOINT (ms):")
+        header = f"  {'endpoint':<40} {'reqs':>6} {'err%':>6} " + ' '.join(f"{'p' + format(p, 'g'):>8}" for p in REPORT_PERCENTILES) + f" {'bytes/resp':>10} {'decoded':>10}"
+        print(header)
+        for row in self.summary():
+            percentiles = ' '.join(f"{row[f'p{p:g}_ms']:>8.1f}" for p in REPORT_PERCENTILES)
+            print(f"  {row['endpoint']:<40} {row['requests']:>6} {row['error_rate'] * 100:>5.1f}% {percentiles} {row['bytes_per_response']:>10} {row['decoded_bytes_per_response']:>10}")
+
+        timed = [row for row in self.summary() if row['server_timing']]
+        if timed:
+            print("\n🔬 SERVER TIMING (mean ms per request):")
+            for row in timed:
+                phases = ' '.join(f"{metric}={ms:.1f}" for metric, ms in row['server_timing'].items())
+                print(f"  {row['endpoint']:<40} {phases}")
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'generatedAt': datetime.now().isoformat(), 'endpoints': self.summary()}, f, indent=2)
+
+    def export_csv(self, path):
+        rows = self.summary()
+        if not rows:
+            return
+        for row in rows:
+            row['server_timing'] = ' '.join(f"{metric}={ms}" for metric, ms in row['server_timing'].items())
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+class ExpertBridgeAPITester:
+    def __init__(self, base_url=BASE_URL, analytics_timeout=ANALYTICS_CONSISTENCY_TIMEOUT):
+        self.base_url = base_url
+        # 0 checks view counts strictly (visible on the very next read); otherwise poll up to this many seconds
+        self.analytics_timeout = analytics_timeout
         self.session = requests.Session()
         self.session.timeout = TIMEOUT
         self.professional_token = None
@@ -24,6 +268,7 @@ class ExpertBridgeAPITester:
         self.test_professional_id = None
         self.test_professional_email = None
         self.results = []
+        self.metrics = RequestMetrics()
         
     def log_result(self, test_name, success, message, details=None):
         """Log test result"""
@@ -51,19 +296,16 @@ class ExpertBridgeAPITester:
         if auth_token:
             req_headers['Authorization'] = f'Bearer {auth_token}'
             
+        if method.upper() not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise ValueError(f"Unsupported method: {method}")
+
         try:
-            if method.upper() == 'GET':
-                response = self.session.get(url, headers=req_headers)
-            elif method.upper() == 'POST':
-                response = self.session.post(url, json=data, headers=req_headers)
-            elif method.upper() == 'PUT':
-                response = self.session.put(url, json=data, headers=req_headers)
-            elif method.upper() == 'DELETE':
-                response = self.session.delete(url, headers=req_headers)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
-                
-            return response
+            return self.metrics.timed_request(
+                self.session, method.upper(), endpoint, url,
+                json=data if method.upper() in ('POST', 'PUT') else None,
+                headers=req_headers,
+                timeout=TIMEOUT
+            )
         except requests.exceptions.RequestException as e:
             print(f"Request failed: {e}")
             return None
@@ -298,6 +540,113 @@ class ExpertBridgeAPITester:
             self.log_result("Search Professionals", False, f"HTTP {response.status_code}", response.text)
             return False
     
+    def test_search_facets(self):
+        """Test GET /search?facets=true - facet counts agree with the result total"""
+        print("\n=== Testing Search Facets ===")
+
+        response = self.make_request('GET', '/search?country=Nigeria&facets=true')
+        if response is None:
+            self.log_result("Search Facets", False, "Request failed")
+            return False
+        if response.status_code != 200:
+            self.log_result("Search Facets", False, f"HTTP {response.status_code}", response.text)
+            return False
+
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            self.log_result("Search Facets", False, "Invalid JSON response", response.text)
+            return False
+
+        facets = data.get('facets') or {}
+        missing = [f for f in ('category', 'country', 'serviceType', 'rating', 'experience') if f not in facets]
+        if missing:
+            self.log_result("Search Facets", False, f"Missing facets: {missing}", data.get('facets'))
+            return False
+
+        total = data['pagination']['total']
+        band_totals = {name: sum(band['count'] for band in facets[name]) for name in ('rating', 'experience')}
+        if any(count != total for count in band_totals.values()):
+            self.log_result("Search Facets", False, f"Band counts {band_totals} disagree with total {total}")
+            return False
+
+        self.log_result("Search Facets", True, f"{total} results across {len(facets['category'])} categories")
+        return True
+
+    def test_list_projection(self):
+        """Test GET /professionals?view=card and ?fields= - slimmer listing payloads"""
+        print("\n=== Testing List Projection ===")
+
+        full = self.make_request('GET', '/professionals?limit=12')
+        card = self.make_request('GET', '/professionals?limit=12&view=card')
+        picked = self.make_request('GET', '/professionals?limit=12&fields=fullName,category')
+        if any(r is None or r.status_code != 200 for r in (full, card, picked)):
+            self.log_result("List Projection", False, "Listing request failed")
+            return False
+
+        cards = card.json().get('professionals', [])
+        if any('analytics' in p or 'email' in p or len(p.get('bio') or '') > 160 for p in cards):
+            self.log_result("List Projection", False, "Card view returned fields a card does not render")
+            return False
+        # Besides the selection, only id and the sort keys (which cursors are built from) come back
+        allowed = {'id', 'fullName', 'category', 'featured', 'ratings', 'createdAt'}
+        extra = {key for p in picked.json().get('professionals', []) for key in p} - allowed
+        if extra:
+            self.log_result("List Projection", False, f"fields= returned unselected fields: {sorted(extra)}")
+            return False
+
+        unknown = self.make_request('GET', '/professionals?fields=password')
+        if unknown is None or unknown.status_code != 400:
+            self.log_result("List Projection", False, "Unknown field was not rejected",
+                            unknown.status_code if unknown is not None else None)
+            return False
+
+        sizes = {name: (len(r.content), r.headers.get('Content-Encoding'), r.headers.get('Content-Length'))
+                 for name, r in (('full', full), ('card', card), ('fields', picked))}
+        summary = ', '.join(f"{name} {raw}B" + (f" ({encoding} {wire}B)" if encoding else '')
+                            for name, (raw, encoding, wire) in sizes.items())
+        self.log_result("List Projection", True, summary)
+        return True
+
+    def test_geo_search(self):
+        """Test GET /search?near= - "near me" results within range, nearest first"""
+        print("\n=== Testing Geo Search ===")
+
+        response = self.make_request('GET', '/search?near=Lagos&country=Nigeria&withinKm=200&limit=50')
+        if response is None:
+            self.log_result("Geo Search", False, "Request failed")
+            return False
+        if response.status_code != 200:
+            self.log_result("Geo Search", False, f"HTTP {response.status_code}", response.text)
+            return False
+
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            self.log_result("Geo Search", False, "Invalid JSON response", response.text)
+            return False
+
+        distances = [p.get('distanceKm') for p in data.get('professionals', [])]
+        if any(d is None or d > 200 for d in distances):
+            self.log_result("Geo Search", False, "Result missing distanceKm or outside withinKm", distances)
+            return False
+        if distances != sorted(distances):
+            self.log_result("Geo Search", False, "Results not ordered by distance", distances)
+            return False
+
+        unknown = self.make_request('GET', '/search?near=Atlantis')
+        if unknown is None or unknown.status_code != 400:
+            self.log_result("Geo Search", False, "Unknown place was not rejected with 400")
+            return False
+
+        negative = self.make_request('GET', '/search?near=Lagos&withinKm=-5')
+        if negative is None or negative.status_code != 400:
+            self.log_result("Geo Search", False, "Negative withinKm was not rejected with 400")
+            return False
+
+        self.log_result("Geo Search", True, f"{len(distances)} professionals within 200km of Lagos, nearest first")
+        return True
+
     def test_admin_pending_approvals(self):
         """Test GET /admin/pending - Get pending approvals"""
         print("\n=== Testing Admin Pending Approvals ===")
@@ -361,6 +710,165 @@ class ExpertBridgeAPITester:
             self.log_result("Admin Approve Professional", False, f"HTTP {response.status_code}", response.text)
             return False
     
+    def test_session_refresh(self):
+        """Test GET /auth/me - cached session reflects a profile update on the next read"""
+        print("\n=== Testing Session Refresh ===")
+
+        if not self.professional_token or not self.test_professional_id:
+            self.log_result("Session Refresh", False, "No professional session available")
+            return False
+
+        warm = self.make_request('GET', '/auth/me', auth_token=self.professional_token)
+        if warm is None or warm.status_code != 200:
+            self.log_result("Session Refresh", False, "Initial /auth/me failed", warm.text if warm is not None else None)
+            return False
+
+        bio = f"Session refresh check {str(uuid.uuid4())[:8]}"
+        update = self.make_request('PUT', f'/professionals/{self.test_professional_id}', {"bio": bio},
+                                   auth_token=self.professional_token)
+        if update is None or update.status_code != 200:
+            self.log_result("Session Refresh", False, "Profile update failed", update.text if update is not None else None)
+            return False
+
+        response = self.make_request('GET', '/auth/me', auth_token=self.professional_token)
+        if response is None or response.status_code != 200:
+            self.log_result("Session Refresh", False, "Follow-up /auth/me failed", response.text if response is not None else None)
+            return False
+        if response.json().get('user', {}).get('bio') != bio:
+            self.log_result("Session Refresh", False, "/auth/me served a stale account after the update")
+            return False
+
+        self.log_result("Session Refresh", True, "/auth/me reflects the profile update immediately")
+        return True
+
+    def test_admin_batch_moderation(self, batch_size=3):
+        """Test POST /admin/batch/approve - Approve several professionals in one request"""
+        print("\n=== Testing Admin Batch Moderation ===")
+
+        if not self.admin_token:
+            self.log_result("Admin Batch Moderation", False, "No admin token available")
+            return False
+
+        # Register a few throwaway professionals to moderate
+        ids = []
+        for _ in range(batch_size):
+            unique_id = str(uuid.uuid4())[:8]
+            response = self.make_request('POST', '/auth/register', {
+                "fullName": f"Batch Tester {unique_id}",
+                "email": f"batchpro_{unique_id}@expertbridge.com",
+                "password": "SecurePass123!",
+                "category": "Accountant",
+                "bio": "Chartered accountant registered by the batch moderation test.",
+                "experience": 5,
+                "location": {"country": "Nigeria", "state": "Lagos", "city": "Lagos"}
+            })
+            if response is None or response.status_code != 200:
+                self.log_result("Admin Batch Moderation", False, "Failed to register batch professionals")
+                return False
+            ids.append(response.json()['professional']['id'])
+
+        missing_id = str(uuid.uuid4())
+        response = self.make_request('POST', '/admin/batch/approve', {"ids": ids + [missing_id]},
+                                     auth_token=self.admin_token)
+        if response is None or response.status_code != 200:
+            self.log_result("Admin Batch Moderation", False,
+                            f"HTTP {response.status_code if response is not None else None}",
+                            response.text if response is not None else None)
+            return False
+
+        try:
+            data = response.json()
+            results = {r['id']: r['result'] for r in data['results']}
+        except (json.JSONDecodeError, KeyError, TypeError):
+            self.log_result("Admin Batch Moderation", False, "Invalid batch response", response.text)
+            return False
+
+        # A filter on the target status would never run out of matches, so it is rejected
+        looping = self.make_request('POST', '/admin/batch/approve', {"filter": {"status": "approved"}},
+                                    auth_token=self.admin_token)
+        if looping is None or looping.status_code != 400:
+            self.log_result("Admin Batch Moderation", False, "Filter on the target status was not rejected",
+                            looping.text if looping is not None else None)
+            return False
+
+        if all(results.get(i) == 'approved' for i in ids) and results.get(missing_id) == 'not_found' \
+                and data.get('updated') == len(ids):
+            self.log_result("Admin Batch Moderation", True,
+                            f"Batch approved {data['updated']} professionals in one request")
+            return True
+        self.log_result("Admin Batch Moderation", False, "Unexpected per-item results", data)
+        return False
+
+    def stream_export(self, kind='professionals', fmt='ndjson', fields=None, status=None):
+        """Yield rows from GET /admin/export/{kind} as they arrive, without buffering the body.
+
+        NDJSON rows are decoded dicts; CSV rows are dicts of strings keyed by the header.
+        """
+        endpoint = f'/admin/export/{kind}'
+        params = {'format': fmt}
+        if fields:
+            params['fields'] = ','.join(fields)
+        if status:
+            params['status'] = status
+
+        started = time.perf_counter()
+        status_code = None
+        bytes_in = 0
+        try:
+            with self.session.get(f"{self.base_url}{endpoint}", params=params, stream=True, timeout=TIMEOUT,
+                                  headers={'Authorization': f'Bearer {self.admin_token}'}) as response:
+                status_code = response.status_code
+                response.raise_for_status()
+                response.raw.decode_content = True
+                text = io.TextIOWrapper(response.raw, encoding='utf-8', newline='')
+                if fmt == 'csv':
+                    reader = csv.DictReader(text)
+                    for row in reader:
+                        bytes_in = response.raw.tell()
+                        yield row
+                else:
+                    for line in text:
+                        bytes_in += len(line)
+                        if line.strip():
+                            yield json.loads(line)
+                bytes_in = max(bytes_in, response.raw.tell())
+        finally:
+            self.metrics.record('GET', endpoint, time.perf_counter() - started, status_code, bytes_in=bytes_in)
+
+    def test_admin_export_stream(self):
+        """Test GET /admin/export/professionals - Stream NDJSON and CSV exports"""
+        print("\n=== Testing Admin Export Stream ===")
+
+        if not self.admin_token:
+            self.log_result("Admin Export Stream", False, "No admin token available")
+            return False
+
+        fields = ['id', 'email', 'verification.status']
+        try:
+            ndjson_rows = 0
+            found = False
+            for row in self.stream_export('professionals', 'ndjson', fields):
+                ndjson_rows += 1
+                if set(row) != set(fields):
+                    self.log_result("Admin Export Stream", False, "NDJSON row has unexpected fields", row)
+                    return False
+                found = found or row['id'] == self.test_professional_id
+
+            csv_rows = sum(1 for _ in self.stream_export('professionals', 'csv', fields))
+        except (requests.exceptions.RequestException, json.JSONDecodeError, csv.Error) as e:
+            self.log_result("Admin Export Stream", False, f"Export failed: {e}")
+            return False
+
+        if self.test_professional_id and not found:
+            self.log_result("Admin Export Stream", False, "Test professional missing from export")
+            return False
+        # Concurrent registrations can add rows between the two exports
+        if csv_rows < ndjson_rows:
+            self.log_result("Admin Export Stream", False, f"CSV rows {csv_rows} < NDJSON rows {ndjson_rows}")
+            return False
+        self.log_result("Admin Export Stream", True, f"Streamed {ndjson_rows} NDJSON and {csv_rows} CSV rows")
+        return True
+
     def test_admin_stats(self):
         """Test GET /admin/stats - Get platform statistics"""
         print("\n=== Testing Admin Stats ===")
@@ -412,26 +920,33 @@ class ExpertBridgeAPITester:
             self.log_result("Professional Profile View", False, "Invalid initial profile response")
             return False
         
-        # Wait a moment and view again
+        # Wait a moment and view again; in eventually consistent mode keep re-reading until the
+        # buffered view counts are flushed or analytics_timeout runs out
         time.sleep(1)
-        response2 = self.make_request('GET', f'/professionals/{self.test_professional_id}')
-        if not response2 or response2.status_code != 200:
-            self.log_result("Professional Profile View", False, "Failed to get second profile view")
-            return False
-            
-        try:
-            data2 = response2.json()
-            new_views = data2['professional']['analytics']['profileViews']
-            
+        deadline = time.time() + self.analytics_timeout
+        while True:
+            response2 = self.make_request('GET', f'/professionals/{self.test_professional_id}')
+            if not response2 or response2.status_code != 200:
+                self.log_result("Professional Profile View", False, "Failed to get second profile view")
+                return False
+
+            try:
+                data2 = response2.json()
+                new_views = data2['professional']['analytics']['profileViews']
+            except (json.JSONDecodeError, KeyError):
+                self.log_result("Professional Profile View", False, "Invalid second profile response")
+                return False
+
             if new_views > initial_views:
-                self.log_result("Professional Profile View", True, f"View tracking working. Views: {initial_views} → {new_views}")
+                mode = "eventually consistent" if self.analytics_timeout else "strict"
+                self.log_result("Professional Profile View", True,
+                                f"View tracking working ({mode}). Views: {initial_views} → {new_views}")
                 return True
-            else:
-                self.log_result("Professional Profile View", False, f"View count not incremented. Views: {initial_views} → {new_views}")
+            if time.time() >= deadline:
+                self.log_result("Professional Profile View", False,
+                                f"View count not incremented. Views: {initial_views} → {new_views}")
                 return False
-        except (json.JSONDecodeError, KeyError):
-            self.log_result("Professional Profile View", False, "Invalid second profile response")
-            return False
+            time.sleep(ANALYTICS_POLL_INTERVAL)
     
     def test_error_cases(self):
         """Test various error cases"""
@@ -481,8 +996,14 @@ class ExpertBridgeAPITester:
             self.test_admin_login,
             self.test_get_professionals,
             self.test_search_professionals,
+            self.test_search_facets,
+            self.test_list_projection,
+            self.test_geo_search,
             self.test_admin_pending_approvals,
             self.test_admin_approve_professional,
+            self.test_session_refresh,
+            self.test_admin_batch_moderation,
+            self.test_admin_export_stream,
             self.test_admin_stats,
             self.test_professional_profile_view,
             self.test_error_cases
@@ -516,12 +1037,661 @@ class ExpertBridgeAPITester:
         for result in self.results:
             status = "✅" if result['success'] else "❌"
             print(f"{status} {result['test']}: {result['message']}")
+
+        self.metrics.print_report()
         
         return passed, failed
 
+class ExpertBridgeLoadTester:
+    """Replays a weighted mix of API scenarios from many concurrent virtual users.
+
+    Requests are dispatched on an open schedule (a target rate in requests per
+    second) so a slow server shows up as queueing and dropped requests instead
+    of silently lowering the offered load.
+    """
+
+    def __init__(self, base_url=BASE_URL, users=50, pool_size=None, mix=None):
+        self.base_url = base_url
+        self.users = users
+        self.pool_size = pool_size or users
+        self.mix = mix or dict(DEFAULT_LOAD_MIX)
+
+        # One session shared by all workers; the adapter caps open connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.scenarios = {
+            'search': self.scenario_search,
+            'professionals': self.scenario_professionals,
+            'categories': self.scenario_categories,
+            'profile': self.scenario_profile,
+            'login': self.scenario_login
+        }
+        unknown = set(self.mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Unknown load scenarios: {', '.join(sorted(unknown))}")
+
+        self.login_email = None
+        self.login_password = "LoadTestPass123!"
+        self.professional_ids = []
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(users)
+        self.metrics = RequestMetrics()
+        self.stats = {}
+        self.timeline = {}
+        self.dropped = 0
+
+    def request(self, method, endpoint, data=None, auth_token=None):
+        """Send one request on the shared pool; returns None on transport errors"""
+        headers = {'Content-Type': 'application/json'}
+        if auth_token:
+            headers['Authorization'] = f'Bearer {auth_token}'
+        try:
+            return self.metrics.timed_request(self.session, method, endpoint, f"{self.base_url}{endpoint}",
+                                              json=data, headers=headers, timeout=TIMEOUT)
+        except requests.exceptions.RequestException:
+            return None
+
+    # ==================== SCENARIOS ====================
+
+    def scenario_search(self):
+        category = random.choice(['Psychologist', 'Lawyer', 'Accountant', 'Web Developer', 'Life Coach'])
+        keyword = random.choice(['', 'therapy', 'tax', 'design', 'business'])
+        endpoint = f"/search?category={category}"
+        if keyword:
+            endpoint += f"&keyword={keyword}"
+        return self.request('GET', endpoint)
+
+    def scenario_professionals(self):
+        return self.request('GET', f"/professionals?limit=12&page={random.randint(1, 5)}")
+
+    def scenario_categories(self):
+        return self.request('GET', '/categories')
+
+    def scenario_profile(self):
+        if not self.professional_ids:
+            return self.scenario_professionals()
+        return self.request('GET', f"/professionals/{random.choice(self.professional_ids)}")
+
+    def scenario_login(self):
+        if not self.login_email:
+            return self.request('POST', '/auth/login', {"email": "invalid@test.com", "password": "wrong"})
+        return self.request('POST', '/auth/login', {"email": self.login_email, "password": self.login_password})
+
+    # ==================== RUNNER ====================
+
+    def setup(self):
+        """Create a login account and collect profile ids for the scenarios"""
+        if self.mix.get('login'):
+            email = f"loadtest_{str(uuid.uuid4())[:8]}@expertbridge.com"
+            response = self.request('POST', '/auth/register', {
+                "fullName": "Load Test User",
+                "email": email,
+                "password": self.login_password,
+                "category": "Life Coach",
+                "bio": "Account created by the load generator.",
+                "experience": 1,
+                "location": {"country": "Nigeria", "state": "Lagos", "city": "Lagos"}
+            })
+            if response is not None and response.status_code == 200:
+                self.login_email = email
+            else:
+                print("⚠️  Could not register a load test account; login scenario will use invalid credentials")
+
+        if self.mix.get('profile'):
+            response = self.request('GET', '/professionals?limit=50')
+            if response is not None and response.status_code == 200:
+                self.professional_ids = [p['id'] for p in response.json().get('professionals', [])]
+
+    def rate_at(self, elapsed, profile, rate, start_rate, ramp_time, spike_every, spike_length, spike_factor):
+        """Target requests per second at `elapsed` seconds into the run"""
+        if profile == 'ramp':
+            if ramp_time <= 0:
+                return rate
+            return start_rate + (rate - start_rate) * min(1.0, elapsed / ramp_time)
+        if profile == 'spike':
+            if spike_every > 0 and elapsed % spike_every < spike_length:
+                return rate * spike_factor
+            return rate
+        return rate
+
+    def _execute(self, name, started):
+        try:
+            response = self.scenarios[name]()
+            ok = response is not None and response.status_code < 500
+            second = int(time.monotonic() - started)  # timeline buckets by completion time
+            with self._lock:
+                stat = self.stats.setdefault(name, {'requests': 0, 'errors': 0})
+                stat['requests'] += 1
+                bucket = self.timeline.setdefault(second, {'requests': 0, 'errors': 0})
+                bucket['requests'] += 1
+                if not ok:
+                    stat['errors'] += 1
+                    bucket['errors'] += 1
+        finally:
+            self._slots.release()
+
+    def run(self, duration=60, rate=20.0, profile='steady', start_rate=1.0, ramp_time=None,
+            spike_every=20.0, spike_length=5.0, spike_factor=5.0):
+        """Drive the scenario mix for `duration` seconds following a load profile"""
+        if profile not in LOAD_PROFILES:
+            raise ValueError(f"Unsupported load profile: {profile}")
+        ramp_time = duration if ramp_time is None else ramp_time
+
+        print("🚀 Starting ExpertBridge Load Test")
+        print(f"Base URL: {self.base_url}")
+        print(f"Profile: {profile} | Target rate: {rate}/s | Users: {self.users} | Pool: {self.pool_size}")
+        print(f"Mix: {', '.join(f'{k}={v}' for k, v in self.mix.items())}")
+        print("=" * 60)
+
+        self.setup()
+
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        started = time.monotonic()
+        next_at = started
+
+        with ThreadPoolExecutor(max_workers=self.users) as executor:
+            while True:
+                now = time.monotonic()
+                elapsed = now - started
+                if elapsed >= duration:
+                    break
+                if next_at > now:
+                    time.sleep(next_at - now)
+                    continue
+
+                current_rate = self.rate_at(elapsed, profile, rate, start_rate, ramp_time,
+                                            spike_every, spike_length, spike_factor)
+                next_at += 1.0 / max(current_rate, 0.001)
+
+                # Every virtual user busy: the server is not keeping up with the offered load
+                if not self._slots.acquire(blocking=False):
+                    with self._lock:
+                        self.dropped += 1
+                    continue
+                name = random.choices(names, weights)[0]
+                executor.submit(self._execute, name, started)
+
+        self.print_report(time.monotonic() - started)
+        return self.stats
+
+    def print_report(self, elapsed):
+        total = sum(s['requests'] for s in self.stats.values())
+        errors = sum(s['errors'] for s in self.stats.values())
+
+        print("\n" + "=" * 60)
+        print("🏁 LOAD TEST SUMMARY")
+        print("=" * 60)
+        print(f"📊 Requests: {total} in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f}/s)")
+        print(f"❌ Errors: {errors} ({(errors / total * 100) if total else 0:.1f}%)")
+        print(f"⏳ Dropped (all users busy): {self.dropped}")
+
+        print("\n📋 PER SCENARIO:")
+        for name, stat in sorted(self.stats.items()):
+            print(f"  {name:<15} requests={stat['requests']:<7} errors={stat['errors']}")
+
+        print("\n📈 TIMELINE (completed per second):")
+        for second in sorted(self.timeline):
+            bucket = self.timeline[second]
+            print(f"  t={second:>4}s  requests={bucket['requests']:<6} errors={bucket['errors']}")
+
+        self.metrics.print_report()
+
+
+def parse_speed(value):
+    """'1', '10x' or 'max' -> replay speed multiplier (0 means as fast as possible)"""
+    if value.lower() == 'max':
+        return 0.0
+    try:
+        speed = float(value.lower().rstrip('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid speed: {value} (use e.g. 1, 10x or max)")
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("Speed must be positive")
+    return speed
+
+
+def read_capture(path, start=0.0, duration=None):
+    """Records of an NDJSON capture in arrival order, optionally just the window
+    [start, start + duration) in seconds from the first record"""
+    records = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'format' in record:
+                if record['format'] != CAPTURE_FORMAT or record.get('version', 1) > CAPTURE_VERSION:
+                    raise ValueError(f"{path}:{number}: unsupported capture {record['format']} v{record.get('version')}")
+                continue
+            missing = [key for key in ('ts', 'method', 'path') if key not in record]
+            if missing:
+                raise ValueError(f"{path}:{number}: record is missing {', '.join(missing)}")
+            records.append(record)
+    # Stable sort: captures from several instances may be concatenated
+    records.sort(key=lambda r: r['ts'])
+    if records and (start or duration):
+        first = records[0]['ts'] + start * 1000
+        last = first + duration * 1000 if duration else math.inf
+        records = [r for r in records if first <= r['ts'] < last]
+    return records
+
+
+def infer_auth(method, route):
+    """(auth, account) for an access-log request, which carries no token; mirrors the routes that
+    call verifyToken in route.js"""
+    if route.startswith('/admin'):
+        return 'admin', None
+    match = re.match(r'^/professionals/([^/]+)(/analytics)?$', route)
+    if match and (method == 'PUT' or match.group(2)):
+        return 'professional', match.group(1)
+    if route in ('/auth/me', '/upload/profile-photo', '/subscriptions/initialize', '/subscriptions/activate') or \
+            route.startswith('/jobs/'):
+        return 'professional', None
+    return None, None
+
+
+def access_log_capture(lines, prefix='/api'):
+    """Capture records from Common/Combined Log Format lines for requests under `prefix`.
+    Logs hold no bodies, tokens or durations: the caller is inferred from the route, the client
+    is IP + user agent, and each client's requests replay strictly one after another."""
+    records = []
+    for line in lines:
+        match = ACCESS_LOG_LINE.match(line)
+        if not match or not match['path'].startswith(prefix):
+            continue
+        path = match['path'][len(prefix):] or '/'
+        auth, account = infer_auth(match['method'], path.split('?', 1)[0])
+        record = {
+            'ts': datetime.strptime(match['time'], '%d/%b/%Y:%H:%M:%S %z').timestamp() * 1000,
+            'session': f"{match['ip']}|{match['agent'] or ''}",
+            'method': match['method'],
+            'path': path,
+            'auth': auth,
+            'status': int(match['status'])
+        }
+        if account:
+            record['account'] = account
+        records.append(record)
+    return records
+
+
+def run_convert_log(args):
+    """Write an access log out as a replay capture; returns an exit code"""
+    with open(args.access_log) as f:
+        records = access_log_capture(f, args.api_prefix)
+    with open(args.capture, 'w') as out:
+        out.write(json.dumps({'format': CAPTURE_FORMAT, 'version': CAPTURE_VERSION, 'source': args.access_log}) + '\n')
+        for record in records:
+            out.write(json.dumps(record) + '\n')
+    print(f"📼 Wrote {len(records)} requests from {args.access_log} to {args.capture}")
+    return 0 if records else 1
+
+
+class TrafficReplayer:
+    """Plays captured traffic back against the API at 1x, Nx or maximum speed.
+
+    A capture is NDJSON: an optional {"format": "expertbridge-capture", "version": 1}
+    header, then one record per request:
+
+        {"ts": 1760600000123.4, "session": "Qx0...", "method": "POST", "path": "/reviews",
+         "body": {...}, "auth": "professional", "account": "<id>", "status": 200, "ms": 41.7}
+
+    ts is the arrival time in epoch ms and path is relative to the API base. auth is null,
+    "professional", "admin" or "invalid", and account is the caller's id. Only ts, method
+    and path are required. `backend_local_server.py --capture` and REQUEST_CAPTURE_PATH in
+    route.js write captures; `--mode convert-log` builds one from an access log.
+
+    Each request goes out at its captured offset divided by the speed. Within a session it
+    also waits for every earlier request that had already completed (ts + ms) when it
+    arrived. Requests that overlapped in the capture overlap again, and ones that followed a
+    response still follow it. Without ms, a session's requests run one at a time. A request
+    that cannot start on time is sent late and the lag is reported, so a slow server does not
+    quietly stretch the schedule.
+
+    Tokens are minted at setup: one replay professional per captured account, plus the admin
+    login. Captured account ids in paths and bodies are rewritten to the replay accounts.
+    Redacted passwords become `password` (`admin_password` for admin logins), and admin
+    logins use `admin_email`, since captures hash email addresses. Registration emails are
+    made unique, and later logins with the captured email use the new one. Other
+    ids, such as the profiles being viewed, must exist on the target: replay against data
+    seeded the same way as the capture, and check the status drift report.
+    """
+
+    def __init__(self, base_url, records, speed=1.0, max_clients=REPLAY_MAX_CLIENTS, password=REPLAY_PASSWORD,
+                 admin_password="admin123", admin_email="admin@expertbridge.com"):
+        self.base_url = base_url
+        self.records = records
+        self.speed = speed
+        self.max_clients = max_clients
+        self.password = password
+        self.admin_password = admin_password
+        self.admin_email = admin_email
+        self.emails = {}  # captured registration email -> replayed one
+
+        self.admin_token = None
+        self.accounts = {}  # captured account id (None: unknown) -> (replay id, token)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.metrics = RequestMetrics()
+        self.lag = LatencyHistogram()
+        self.statuses = {}
+        self.drift = {}
+        self.in_flight = 0
+        self.peak = 0
+
+    # ==================== SETUP ====================
+
+    def register_account(self):
+        """Register a replay professional; returns (id, token) or None"""
+        try:
+            response = requests.post(f"{self.base_url}/auth/register", json={
+                "fullName": "Replay User",
+                "email": f"replay_{str(uuid.uuid4())[:8]}@expertbridge.com",
+                "password": self.password,
+                "category": "Life Coach",
+                "bio": "Account created by the traffic replayer.",
+                "experience": 1,
+                "location": {"country": "Nigeria", "state": "Lagos", "city": "Lagos"}
+            }, timeout=TIMEOUT)
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        return data['professional']['id'], data['token']
+
+    def setup(self):
+        if any(r.get('auth') == 'admin' for r in self.records):
+            tester = ExpertBridgeAPITester(self.base_url)
+            if tester.test_admin_login():
+                self.admin_token = tester.admin_token
+            else:
+                print("⚠️  Admin login failed; admin requests will replay without a token")
+        captured = {r.get('account') for r in self.records if r.get('auth') == 'professional'}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for account, replay in zip(captured, executor.map(lambda _: self.register_account(), captured)):
+                if replay:
+                    self.accounts[account] = replay
+        if len(self.accounts) < len(captured):
+            print(f"⚠️  Registered {len(self.accounts)} of {len(captured)} replay accounts")
+
+    def prepare(self, record):
+        """(method, endpoint, body, token) for a record, rewritten onto the replay accounts"""
+        endpoint, body = record['path'], record.get('body')
+        token = None
+        if record.get('auth') == 'admin':
+            token = self.admin_token
+        elif record.get('auth') == 'invalid':
+            token = 'invalid-token'
+        elif record.get('auth') == 'professional' and record.get('account') in self.accounts:
+            replay_id, token = self.accounts[record.get('account')]
+            if record.get('account'):
+                endpoint = endpoint.replace(record['account'], replay_id)
+                if body is not None:
+                    body = json.loads(json.dumps(body).replace(record['account'], replay_id))
+        if isinstance(body, dict):
+            body = dict(body)
+            password = self.admin_password if record['path'].startswith('/auth/admin') else self.password
+            for field, value in body.items():
+                if value == '<redacted>':
+                    body[field] = password
+            email = body.get('email')
+            if record['path'].startswith('/auth/admin') and isinstance(email, str):
+                body['email'] = self.admin_email
+            elif record['path'].startswith('/auth/register') and isinstance(email, str):
+                body['email'] = f"replay_{str(uuid.uuid4())[:8]}_{email}"
+                with self._lock:
+                    self.emails[email] = body['email']
+            elif isinstance(email, str) and email in self.emails:
+                body['email'] = self.emails[email]
+        return record['method'], endpoint, body, token
+
+    # ==================== RUNNER ====================
+
+    def _send(self, record, due, waits):
+        for future in waits:
+            future.exception()  # wait for it, whatever its outcome
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        if self.speed:
+            lag = max(0.0, time.monotonic() - due)
+            with self._lock:
+                self.lag.record(lag * 1_000_000)
+        method, endpoint, body, token = self.prepare(record)
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            response = self.metrics.timed_request(session, method, endpoint, f"{self.base_url}{endpoint}",
+                                                  json=body, headers=headers, timeout=TIMEOUT)
+            status = response.status_code
+        except requests.exceptions.RequestException:
+            status = None
+        with self._lock:
+            self.in_flight -= 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if record.get('status') and status != record['status']:
+                key = (RequestMetrics.endpoint_key(method, endpoint), record['status'], status)
+                self.drift[key] = self.drift.get(key, 0) + 1
+
+    def run(self):
+        if not self.records:
+            raise ValueError("Capture has no requests")
+        first, last = self.records[0]['ts'], self.records[-1]['ts']
+        sessions = {r.get('session') or index for index, r in enumerate(self.records)}
+        print("🚀 Starting ExpertBridge traffic replay")
+        print(f"Base URL: {self.base_url}")
+        print(f"Capture: {len(self.records)} requests, {len(sessions)} sessions over {(last - first) / 1000:.1f}s | "
+              f"Speed: {f'{self.speed:g}x' if self.speed else 'max'} | Max clients: {self.max_clients}")
+        print("=" * 60)
+        self.setup()
+
+        pending = {}  # session -> [(captured completion ts, future)] not yet known to be done
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_clients) as executor:
+            for index, record in enumerate(self.records):
+                due = started + (record['ts'] - first) / 1000 / self.speed if self.speed else started
+                if due > time.monotonic():
+                    time.sleep(due - time.monotonic())
+                # Records without a session are independent clients
+                session = record.get('session') or ('request', index)
+                earlier = [(end, future) for end, future in pending.get(session, []) if not future.done()]
+                waits = [future for end, future in earlier if end <= record['ts']]
+                future = executor.submit(self._send, record, due, waits)
+                # Without a duration, assume the response arrived just before the next request
+                earlier.append((record['ts'] + record['ms'] if 'ms' in record else record['ts'], future))
+                pending[session] = earlier
+        elapsed = time.monotonic() - started
+
+        summary = {
+            'requests': len(self.records),
+            'sessions': len(sessions),
+            'captured_seconds': round((last - first) / 1000, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'speed': self.speed or 'max',
+            'peak_in_flight': self.peak,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items(), key=str)},
+            'status_drift': sum(self.drift.values()),
+            'lag_ms': {f'p{p:g}': round(self.lag.percentile(p) / 1000, 3) for p in REPORT_PERCENTILES}
+        }
+        self.print_report(summary)
+        return summary
+
+    def print_report(self, summary):
+        captured, elapsed = summary['captured_seconds'], summary['elapsed_seconds']
+        print("\n" + "=" * 60)
+        print("🏁 REPLAY SUMMARY")
+        print("=" * 60)
+        print(f"📊 Requests: {summary['requests']} in {elapsed:.1f}s "
+              f"({summary['requests'] / elapsed if elapsed else 0:.1f}/s, captured "
+              f"{summary['requests'] / captured if captured else 0:.1f}/s)")
+        print(f"🔀 Peak requests in flight: {summary['peak_in_flight']}")
+        print(f"📬 Statuses: {', '.join(f'{status}={count}' for status, count in summary['statuses'].items())}")
+        if self.speed:
+            print(f"⏳ Schedule lag (ms): {' '.join(f'{p}={ms:.1f}' for p, ms in summary['lag_ms'].items())}")
+        if self.drift:
+            print(f"⚠️  {summary['status_drift']} requests answered differently than when captured:")
+            for (endpoint, captured_status, status), count in sorted(self.drift.items(), key=lambda kv: -kv[1])[:10]:
+                print(f"  {endpoint:<40} {captured_status} → {status}  x{count}")
+        self.metrics.print_report()
+
+
+def parse_mix(value):
+    """Parse a scenario mix such as "search=5,login=1" into a weight dict"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ExpertBridge backend API tests and load generator")
+    parser.add_argument('--base-url', default=BASE_URL, help="API base URL")
+    parser.add_argument('--mode', choices=['functional', 'load', 'export', 'replay', 'convert-log'], default='functional')
+    parser.add_argument('--local', action='store_true', help="Run against an in-process local API server")
+    parser.add_argument('--local-seed', type=int, default=10000, help="Professionals to seed the local server with")
+    parser.add_argument('--local-latency-ms', type=float, default=0, help="Simulated latency for the local server")
+    parser.add_argument('--local-capture', default=None, help="Record the local server's traffic to this capture file")
+    parser.add_argument('--users', type=int, default=50, help="Concurrent virtual users (load mode)")
+    parser.add_argument('--pool-size', type=int, default=None, help="HTTP connection pool size (defaults to --users)")
+    parser.add_argument('--mix', type=parse_mix, default=None, help="Weighted scenario mix, e.g. search=5,login=1")
+    parser.add_argument('--profile', choices=LOAD_PROFILES, default='steady')
+    parser.add_argument('--duration', type=float, default=60, help="Run length in seconds")
+    parser.add_argument('--rate', type=float, default=20, help="Target (or peak ramp) requests per second")
+    parser.add_argument('--start-rate', type=float, default=1, help="Initial rate for the ramp profile")
+    parser.add_argument('--ramp-time', type=float, default=None, help="Seconds to reach --rate (defaults to --duration)")
+    parser.add_argument('--spike-every', type=float, default=20, help="Seconds between spikes")
+    parser.add_argument('--spike-length', type=float, default=5, help="Length of each spike in seconds")
+    parser.add_argument('--spike-factor', type=float, default=5, help="Rate multiplier during a spike")
+    parser.add_argument('--analytics-timeout', type=float, default=ANALYTICS_CONSISTENCY_TIMEOUT,
+                        help="Seconds to wait for buffered view counts to appear (0 = strict, no waiting)")
+    parser.add_argument('--export-kind', choices=['pending', 'professionals'], default='pending',
+                        help="Export mode: which listing to stream")
+    parser.add_argument('--export-format', choices=['ndjson', 'csv'], default='ndjson')
+    parser.add_argument('--export-fields', default=None, help="Comma separated fields (server defaults if omitted)")
+    parser.add_argument('--export-status', default=None, help="Verification status filter for professionals")
+    parser.add_argument('--export-out', default=None, help="Write exported rows here (defaults to stdout)")
+    parser.add_argument('--capture', default=None, help="Replay/convert-log mode: NDJSON capture to read or write")
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help="Replay speed: 1, 10x, ... or max")
+    parser.add_argument('--capture-start', type=float, default=0, help="Replay from this many seconds into the capture")
+    parser.add_argument('--capture-duration', type=float, default=None, help="Replay this many captured seconds")
+    parser.add_argument('--max-clients', type=int, default=REPLAY_MAX_CLIENTS, help="Cap on concurrent replayed requests")
+    parser.add_argument('--replay-password', default=REPLAY_PASSWORD, help="Password sent in place of redacted ones")
+    parser.add_argument('--replay-admin-password', default="admin123", help="Password sent for redacted admin logins")
+    parser.add_argument('--replay-admin-email', default="admin@expertbridge.com",
+                        help="Email sent for admin logins (captures hash email addresses)")
+    parser.add_argument('--access-log', default=None, help="Convert-log mode: Common/Combined Log Format file")
+    parser.add_argument('--api-prefix', default='/api', help="Convert-log mode: path prefix of API requests")
+    parser.add_argument('--report-json', default=None, help="Write per-endpoint latency report as JSON")
+    parser.add_argument('--report-csv', default=None, help="Write per-endpoint latency report as CSV")
+    args = parser.parse_args()
+    if args.mode in ('replay', 'convert-log') and not args.capture:
+        parser.error(f"--mode {args.mode} needs --capture")
+    if args.mode == 'convert-log' and not args.access_log:
+        parser.error("--mode convert-log needs --access-log")
+    return args
+
+
+def export_reports(metrics, args):
+    if args.report_json:
+        metrics.export_json(args.report_json)
+        print(f"📝 Latency report written to {args.report_json}")
+    if args.report_csv:
+        metrics.export_csv(args.report_csv)
+        print(f"📝 Latency report written to {args.report_csv}")
+
+
+def run_export(args):
+    """Stream an admin export to a file (or stdout) row by row; returns an exit code"""
+    tester = ExpertBridgeAPITester(args.base_url)
+    if not tester.test_admin_login():
+        return 1
+    fields = args.export_fields.split(',') if args.export_fields else None
+    out = open(args.export_out, 'w', newline='') if args.export_out else sys.stdout
+    rows = 0
+    started = time.perf_counter()
+    try:
+        writer = None
+        for row in tester.stream_export(args.export_kind, args.export_format, fields, args.export_status):
+            if args.export_format == 'csv':
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row) + '\n')
+            rows += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"📦 Exported {rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+def start_local_server(args):
+    """Start backend_local_server in this process and point the run at it"""
+    from backend_local_server import start_in_background
+
+    options = {}
+    if getattr(args, 'local_password_iterations', None):
+        options['password_iterations'] = args.local_password_iterations
+    if getattr(args, 'local_capture', None):
+        options['capture_path'] = args.local_capture
+    server = start_in_background(seed_professionals=args.local_seed, latency_ms=args.local_latency_ms, **options)
+    args.base_url = server.base_url
+    print(f"🏠 Local API server on {server.base_url} ({args.local_seed} seeded professionals)")
+    return server
+
+
 if __name__ == "__main__":
-    tester = ExpertBridgeAPITester()
+    args = parse_args()
+    if args.local:
+        start_local_server(args)
+
+    if args.mode == 'load':
+        load_tester = ExpertBridgeLoadTester(args.base_url, users=args.users, pool_size=args.pool_size, mix=args.mix)
+        stats = load_tester.run(
+            duration=args.duration,
+            rate=args.rate,
+            profile=args.profile,
+            start_rate=args.start_rate,
+            ramp_time=args.ramp_time,
+            spike_every=args.spike_every,
+            spike_length=args.spike_length,
+            spike_factor=args.spike_factor
+        )
+        export_reports(load_tester.metrics, args)
+        exit(0 if sum(s['errors'] for s in stats.values()) == 0 else 1)
+
+    if args.mode == 'export':
+        exit(run_export(args))
+
+    if args.mode == 'convert-log':
+        exit(run_convert_log(args))
+
+    if args.mode == 'replay':
+        records = read_capture(args.capture, args.capture_start, args.capture_duration)
+        replayer = TrafficReplayer(args.base_url, records, speed=args.speed, max_clients=args.max_clients,
+                                   password=args.replay_password, admin_password=args.replay_admin_password,
+                                   admin_email=args.replay_admin_email)
+        summary = replayer.run()
+        export_reports(replayer.metrics, args)
+        exit(0 if not any(s == 'None' or int(s) >= 500 for s in summary['statuses']) else 1)
+
+    tester = ExpertBridgeAPITester(args.base_url, analytics_timeout=args.analytics_timeout)
     passed, failed = tester.run_all_tests()
+    export_reports(tester.metrics, args)
     
     # Exit with appropriate code
     exit(0 if failed == 0 else 1)
\ No newline at end of file